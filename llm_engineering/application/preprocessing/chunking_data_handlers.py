@@ -3,6 +3,7 @@ from abc import ABC, abstractmethod
 from typing import Generic, TypeVar
 from uuid import UUID
 
+from llm_engineering.application.utils import misc
 from llm_engineering.domain.chunks import ArticleChunk, Chunk, PostChunk, RepositoryChunk
 from llm_engineering.domain.cleaned_documents import (
     CleanedArticleDocument,
@@ -51,7 +52,9 @@ class PostChunkingHandler(ChunkingDataHandler):
             cleaned_content, chunk_size=self.metadata["chunk_size"], chunk_overlap=self.metadata["chunk_overlap"]
         )
 
-        for chunk in chunks:
+        chunks_num_tokens = misc.compute_num_tokens_batch(chunks)
+
+        for chunk, num_tokens in zip(chunks, chunks_num_tokens, strict=True):
             chunk_id = hashlib.md5(chunk.encode()).hexdigest()
             model = PostChunk(
                 id=UUID(chunk_id, version=4),
@@ -60,6 +63,7 @@ class PostChunkingHandler(ChunkingDataHandler):
                 document_id=data_model.id,
                 author_id=data_model.author_id,
                 author_full_name=data_model.author_full_name,
+                num_tokens=num_tokens,
                 image=data_model.image if data_model.image else None,
                 metadata=self.metadata,
             )
@@ -84,7 +88,9 @@ class ArticleChunkingHandler(ChunkingDataHandler):
             cleaned_content, min_length=self.metadata["min_length"], max_length=self.metadata["max_length"]
         )
 
-        for chunk in chunks:
+        chunks_num_tokens = misc.compute_num_tokens_batch(chunks)
+
+        for chunk, num_tokens in zip(chunks, chunks_num_tokens, strict=True):
             chunk_id = hashlib.md5(chunk.encode()).hexdigest()
             model = ArticleChunk(
                 id=UUID(chunk_id, version=4),
@@ -94,6 +100,7 @@ class ArticleChunkingHandler(ChunkingDataHandler):
                 document_id=data_model.id,
                 author_id=data_model.author_id,
                 author_full_name=data_model.author_full_name,
+                num_tokens=num_tokens,
                 metadata=self.metadata,
             )
             data_models_list.append(model)
@@ -117,7 +124,9 @@ class RepositoryChunkingHandler(ChunkingDataHandler):
             cleaned_content, chunk_size=self.metadata["chunk_size"], chunk_overlap=self.metadata["chunk_overlap"]
         )
 
-        for chunk in chunks:
+        chunks_num_tokens = misc.compute_num_tokens_batch(chunks)
+
+        for chunk, num_tokens in zip(chunks, chunks_num_tokens, strict=True):
             chunk_id = hashlib.md5(chunk.encode()).hexdigest()
             model = RepositoryChunk(
                 id=UUID(chunk_id, version=4),
@@ -128,6 +137,7 @@ class RepositoryChunkingHandler(ChunkingDataHandler):
                 document_id=data_model.id,
                 author_id=data_model.author_id,
                 author_full_name=data_model.author_full_name,
+                num_tokens=num_tokens,
                 metadata=self.metadata,
             )
             data_models_list.append(model)
@@ -68,7 +68,9 @@ class PostEmbeddingHandler(EmbeddingDataHandler):
             document_id=data_model.document_id,
             author_id=data_model.author_id,
             author_full_name=data_model.author_full_name,
+            num_tokens=data_model.num_tokens,
             metadata={
+                **data_model.metadata,
                 "embedding_model_id": embedding_model.model_id,
                 "embedding_size": embedding_model.embedding_size,
                 "max_input_length": embedding_model.max_input_length,
@@ -87,7 +89,9 @@ class ArticleEmbeddingHandler(EmbeddingDataHandler):
             document_id=data_model.document_id,
             author_id=data_model.author_id,
             author_full_name=data_model.author_full_name,
+            num_tokens=data_model.num_tokens,
             metadata={
+                **data_model.metadata,
                 "embedding_model_id": embedding_model.model_id,
                 "embedding_size": embedding_model.embedding_size,
                 "max_input_length": embedding_model.max_input_length,
@@ -107,7 +111,9 @@ class RepositoryEmbeddingHandler(EmbeddingDataHandler):
             document_id=data_model.document_id,
             author_id=data_model.author_id,
             author_full_name=data_model.author_full_name,
+            num_tokens=data_model.num_tokens,
             metadata={
+                **data_model.metadata,
                 "embedding_model_id": embedding_model.model_id,
                 "embedding_size": embedding_model.embedding_size,
                 "max_input_length": embedding_model.max_input_length,
@@ -1,8 +1,9 @@
-from .chunking import chunk_article, chunk_text
+from .chunking import chunk_article, chunk_text, split_sentences
 from .cleaning import clean_text
 
 __all__ = [
     "chunk_article",
     "chunk_text",
     "clean_text",
+    "split_sentences",
 ]
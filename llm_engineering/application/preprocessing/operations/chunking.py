@@ -29,8 +29,12 @@ def chunk_document(text: str, min_length: int, max_length: int) -> list[str]:
     return chunk_article(text, min_length, max_length)
 
 
+def split_sentences(text: str) -> list[str]:
+    return re.split(r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\!)\s", text)
+
+
 def chunk_article(text: str, min_length: int, max_length: int) -> list[str]:
-    sentences = re.split(r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?|\!)\s", text)
+    sentences = split_sentences(text)
 
     extracts = []
     current_chunk = ""
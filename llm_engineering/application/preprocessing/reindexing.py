@@ -0,0 +1,304 @@
+import re
+import time
+
+from loguru import logger
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    SearchParams,
+    SearchRequest,
+)
+
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.domain.base import VectorBaseDocument
+from llm_engineering.domain.base.vector import COLLECTIONS_METADATA_COLLECTION, get_collection_version_name
+from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+from llm_engineering.domain.exceptions import ReindexingError
+from llm_engineering.infrastructure.db.qdrant import connection
+from llm_engineering.settings import settings
+
+
+class CollectionReindexer:
+    """
+    Re-embeds the chunks of a collection with the current embedding model (e.g., after changing
+    `TEXT_EMBEDDING_MODEL_ID`) into a new version of the collection, while the live one keeps serving the searches:
+    1. The live chunks are streamed, re-embedded and written to the shadow collection `<name>_v<N>`, at a bounded rate.
+    2. The shadow collection is verified: it must hold as many points as the live one, and its index must reach
+        `min_recall` against an exact search.
+    3. The `<name>` alias, which the ODM reads and writes through, is atomically switched to the shadow collection.
+    4. The previous versions are deleted, except the `keep_versions` latest ones, kept for rollbacks.
+
+    The writes to the live collection (i.e., the feature engineering pipeline) should be paused meanwhile, as the
+    chunks written after they were streamed would be missing from the new version.
+
+    The collections created before the ODM put them behind an alias are plain `<name>` collections. An alias can't
+    share its name with a collection, so switching to an alias means deleting the original collection first. Their
+    re-indexing therefore stops after the verification, and the original collection is only replaced by an explicit
+    `cutover()`.
+    """
+
+    def __init__(
+        self,
+        document_class: type[EmbeddedChunk],
+        batch_size: int | None = None,
+        max_points_per_second: float | None = None,
+        min_recall: float | None = None,
+        keep_versions: int | None = None,
+        num_recall_queries: int = 100,
+        recall_k: int = 10,
+    ) -> None:
+        self._document_class = document_class
+        self._batch_size = batch_size or settings.QDRANT_REINDEX_BATCH_SIZE
+        self._max_points_per_second = max_points_per_second or settings.QDRANT_REINDEX_MAX_POINTS_PER_SECOND
+        self._min_recall = min_recall if min_recall is not None else settings.QDRANT_REINDEX_MIN_RECALL
+        self._keep_versions = keep_versions if keep_versions is not None else settings.QDRANT_REINDEX_KEEP_VERSIONS
+        self._num_recall_queries = num_recall_queries
+        self._recall_k = recall_k
+
+    @property
+    def alias(self) -> str:
+        return self._document_class.get_collection_name()
+
+    def run(self) -> str:
+        """
+        Builds, verifies and switches to a new version of the collection. Returns the name of the new version.
+
+        A legacy collection isn't switched: the new version is left next to it until `cutover()` is called.
+        """
+
+        collection_name = self.build()
+        try:
+            self.verify(collection_name)
+        except ReindexingError:
+            connection.delete_collection(collection_name=collection_name)
+
+            raise
+
+        if self.is_legacy():
+            logger.warning(
+                f"'{self.alias}' is a legacy collection, so it's still live. Run the cutover to replace it by an alias "
+                f"to '{collection_name}'."
+            )
+
+            return collection_name
+
+        self.switch(collection_name)
+        self.collect_garbage()
+
+        return collection_name
+
+    def get_versions(self) -> dict[int, str]:
+        pattern = re.compile(rf"^{re.escape(self.alias)}_v(\d+)$")
+        versions = {}
+        for collection in connection.get_collections().collections:
+            match = pattern.match(collection.name)
+            if match:
+                versions[int(match.group(1))] = collection.name
+
+        return dict(sorted(versions.items()))
+
+    def get_live_collection(self) -> str | None:
+        """The collection behind the alias, which is the collection itself if it was never re-indexed."""
+
+        aliases = {alias.alias_name: alias.collection_name for alias in connection.get_aliases().aliases}
+        if self.alias in aliases:
+            return aliases[self.alias]
+
+        return self.alias if connection.collection_exists(collection_name=self.alias) else None
+
+    def is_legacy(self) -> bool:
+        """Whether the live collection is a plain `<name>` collection rather than an alias to a version."""
+
+        return self.get_live_collection() == self.alias
+
+    def build(self) -> str:
+        collection_name = get_collection_version_name(self.alias, max(self.get_versions(), default=0) + 1)
+        self._document_class._create_collection(
+            collection_name=collection_name, use_vector_index=self._document_class.get_use_vector_index()
+        )
+        logger.info(f"Re-indexing '{self.alias}' into '{collection_name}'.")
+
+        embedding_model = EmbeddingModelSingleton()
+        embedding_metadata = {
+            "embedding_model_id": embedding_model.model_id,
+            "embedding_size": embedding_model.embedding_size,
+            "max_input_length": embedding_model.max_input_length,
+        }
+        recorded_metadata: dict[type[VectorBaseDocument], dict] = {}
+        retry_policy = VectorBaseDocument._get_retry_policy()
+
+        start_time = time.monotonic()
+        num_points = 0
+        documents = self._document_class.iter_all(page_size=self._batch_size)
+        for batch in VectorBaseDocument._iter_batches(documents, self._batch_size):
+            embeddings = embedding_model([document.content for document in batch], to_list=True)
+            batch = [
+                document.model_copy(
+                    update={"embedding": embedding, "metadata": {**document.metadata, **embedding_metadata}}
+                )
+                for document, embedding in zip(batch, embeddings, strict=True)
+            ]
+            self._save_collection_metadata(collection_name, batch, recorded_metadata)
+
+            points = [document.to_point(trusted=True) for document in batch]
+            retry_policy.call(lambda points=points: connection.upsert(collection_name=collection_name, points=points))
+
+            num_points += len(batch)
+            # Throttled, so the re-indexing doesn't starve the live service of Qdrant's resources.
+            delay = num_points / self._max_points_per_second - (time.monotonic() - start_time)
+            if delay > 0:
+                time.sleep(delay)
+
+        logger.info(f"Re-indexed {num_points} points into '{collection_name}' in {time.monotonic() - start_time:.1f}s.")
+
+        return collection_name
+
+    def _save_collection_metadata(
+        self,
+        collection_name: str,
+        documents: list[EmbeddedChunk],
+        recorded_metadata: dict[type[VectorBaseDocument], dict],
+    ) -> None:
+        for document_class, class_documents in VectorBaseDocument.group_by_class(documents).items():
+            collection_metadata = document_class._get_new_collection_metadata(
+                class_documents, recorded_metadata.get(document_class, {})
+            )
+            if collection_metadata is None:
+                continue
+
+            if not connection.collection_exists(collection_name=COLLECTIONS_METADATA_COLLECTION):
+                connection.create_collection(collection_name=COLLECTIONS_METADATA_COLLECTION, vectors_config={})
+            connection.upsert(
+                collection_name=COLLECTIONS_METADATA_COLLECTION,
+                points=[document_class._to_collection_metadata_point(collection_metadata, collection_name)],
+            )
+            recorded_metadata[document_class] = collection_metadata
+
+    def verify(self, collection_name: str) -> float:
+        """
+        Checks the new version against the live collection. Returns the recall of its index.
+
+        Raises:
+            ReindexingError: If the number of points differ or the recall is below `min_recall`.
+        """
+
+        live_count = connection.count(collection_name=self.alias, exact=True).count
+        new_count = connection.count(collection_name=collection_name, exact=True).count
+        if new_count != live_count:
+            raise ReindexingError(f"'{collection_name}' holds {new_count} points instead of {live_count}.")
+
+        if new_count == 0:
+            return 1.0
+
+        # The points are scrolled by ID, which are random, so the first ones are a random sample.
+        records, _ = connection.scroll(
+            collection_name=collection_name, limit=self._num_recall_queries, with_payload=False, with_vectors=True
+        )
+        approximate_results = connection.search_batch(
+            collection_name=collection_name,
+            requests=[
+                SearchRequest(
+                    vector=record.vector, limit=self._recall_k, params=self._document_class.get_search_params()
+                )
+                for record in records
+            ],
+        )
+        exact_results = connection.search_batch(
+            collection_name=collection_name,
+            requests=[
+                SearchRequest(vector=record.vector, limit=self._recall_k, params=SearchParams(exact=True))
+                for record in records
+            ],
+        )
+        recall = sum(
+            len({point.id for point in approximate} & {point.id for point in exact}) / len(exact)
+            for approximate, exact in zip(approximate_results, exact_results, strict=True)
+        ) / len(records)
+        if recall < self._min_recall:
+            raise ReindexingError(f"The recall@{self._recall_k} of '{collection_name}' is {recall:.3f}.")
+
+        logger.info(f"'{collection_name}' verified: {new_count} points, recall@{self._recall_k} of {recall:.3f}.")
+
+        return recall
+
+    def switch(self, collection_name: str) -> None:
+        """
+        Atomically points the alias to the given version of the collection.
+
+        Raises:
+            ReindexingError: If the live collection is a legacy one, which only `cutover()` replaces.
+        """
+
+        live_collection = self.get_live_collection()
+        if live_collection == self.alias:
+            raise ReindexingError(f"'{self.alias}' is a legacy collection. Replace it with `cutover()` instead.")
+
+        operations = []
+        if live_collection is not None:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=self.alias)))
+        operations.append(
+            CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=self.alias))
+        )
+
+        # Qdrant applies the alias operations of a request atomically.
+        connection.update_collection_aliases(change_aliases_operations=operations)
+        self._on_switched(collection_name)
+
+    def cutover(self, collection_name: str | None = None) -> str:
+        """
+        Replaces a legacy collection by an alias to one of its verified versions (the latest one by default), which
+        is verified again first. Returns the name of the version.
+
+        The original collection has to be deleted before the alias is created, so the searches fail in between (two
+        requests). The writes must be paused, as they would be lost if made after the verification.
+
+        Raises:
+            ReindexingError: If the collection isn't a legacy one, it has no version or the version doesn't match it.
+        """
+
+        if not self.is_legacy():
+            raise ReindexingError(f"'{self.alias}' isn't a legacy collection.")
+
+        versions = self.get_versions()
+        collection_name = collection_name or versions.get(max(versions, default=0))
+        if collection_name is None or collection_name not in versions.values():
+            raise ReindexingError(f"'{self.alias}' has no version to cut over to. Re-index it first.")
+
+        self.verify(collection_name)
+
+        logger.warning(f"Replacing the '{self.alias}' collection by an alias to '{collection_name}'.")
+        connection.delete_collection(collection_name=self.alias)
+        connection.update_collection_aliases(
+            change_aliases_operations=[
+                CreateAliasOperation(create_alias=CreateAlias(collection_name=collection_name, alias_name=self.alias))
+            ]
+        )
+        self._on_switched(collection_name)
+
+        return collection_name
+
+    def _on_switched(self, collection_name: str) -> None:
+        self._document_class.forget_collection_metadata()
+        self._document_class.bump_write_generation()
+        logger.info(f"'{self.alias}' now points to '{collection_name}'.")
+
+    def collect_garbage(self) -> list[str]:
+        """Deletes the versions older than the live one, except the `keep_versions` latest. Returns their names."""
+
+        live_collection = self.get_live_collection()
+        versions = self.get_versions()
+        live_versions = [version for version, collection_name in versions.items() if collection_name == live_collection]
+        if not live_versions:
+            return []
+
+        previous_versions = [
+            collection_name for version, collection_name in versions.items() if version < live_versions[0]
+        ]
+        deleted_versions = previous_versions[: max(len(previous_versions) - self._keep_versions, 0)]
+        for collection_name in deleted_versions:
+            connection.delete_collection(collection_name=collection_name)
+            logger.info(f"Deleted '{collection_name}'.")
+
+        return deleted_versions
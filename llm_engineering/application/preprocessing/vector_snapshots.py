@@ -0,0 +1,184 @@
+import json
+import time
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+from loguru import logger
+from qdrant_client.models import Record
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    logger.warning("pyarrow not installed. Install with `pip install pyarrow`")
+
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.domain.base import VectorBaseDocument
+from llm_engineering.domain.base.vector import CATEGORY_PAYLOAD_FIELD
+from llm_engineering.domain.exceptions import SnapshotError
+from llm_engineering.settings import settings
+
+SNAPSHOT_METADATA_FILE = "metadata.json"
+SNAPSHOT_PAYLOADS_DIR = "payloads"
+SNAPSHOT_VECTORS_FILE = "vectors.npy"
+
+
+def export_snapshot(document_class: type[VectorBaseDocument], directory: Path, page_size: int | None = None) -> int:
+    """
+    Exports the documents of a class to `<directory>/<class name>/`, so the collection can be reseeded without
+    re-embedding them:
+    - `payloads/part-<N>.parquet`: the IDs and payloads, one file per scrolled page.
+    - `vectors.npy`: the embeddings as a float32 matrix, whose rows follow the payloads' order.
+    - `metadata.json`: the number of documents and the collection metadata (e.g., the embedding model).
+
+    The snapshot doesn't depend on the collection layout, so it can be imported in separate or unified collections.
+    The writes to the collection should be paused meanwhile. Returns the number of exported documents, or 0 if the
+    collection doesn't exist.
+    """
+
+    if not document_class.collection_exists():
+        logger.info(f"'{document_class.get_collection_name()}' doesn't exist, skipping it.")
+
+        return 0
+
+    snapshot_dir = directory / document_class.__name__
+    payloads_dir = snapshot_dir / SNAPSHOT_PAYLOADS_DIR
+    payloads_dir.mkdir(parents=True, exist_ok=True)
+    for part_path in payloads_dir.glob("part-*.parquet"):
+        part_path.unlink()
+
+    has_embedding = document_class._has_class_attribute("embedding")
+    num_documents = document_class.count()
+    vectors = None
+
+    start_time = time.monotonic()
+    num_exported = 0
+    documents = document_class.iter_all(page_size=page_size, with_vectors=has_embedding)
+    for part, batch in enumerate(
+        VectorBaseDocument._iter_batches(documents, page_size or settings.QDRANT_SCROLL_PAGE_SIZE)
+    ):
+        if num_exported + len(batch) > num_documents:
+            raise SnapshotError(f"'{document_class.get_collection_name()}' was written to during the export.")
+
+        points = [document.to_point(trusted=True) for document in batch]
+        rows = []
+        for point in points:
+            point.payload.pop(CATEGORY_PAYLOAD_FIELD, None)
+            rows.append({"id": point.id, **point.payload})
+        pq.write_table(_rows_to_table(rows), payloads_dir / f"part-{part:05d}.parquet")
+
+        if has_embedding:
+            batch_vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+            if vectors is None:
+                # Written in place, so the whole matrix is never held in memory.
+                vectors = np.lib.format.open_memmap(
+                    snapshot_dir / SNAPSHOT_VECTORS_FILE,
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=(num_documents, batch_vectors.shape[1]),
+                )
+            vectors[num_exported : num_exported + len(batch)] = batch_vectors
+
+        num_exported += len(batch)
+
+    if num_exported != num_documents:
+        raise SnapshotError(f"'{document_class.get_collection_name()}' was written to during the export.")
+    if vectors is not None:
+        vectors.flush()
+        del vectors
+
+    metadata = {
+        "document_class": document_class.__name__,
+        "num_documents": num_exported,
+        "collection_metadata": document_class.get_collection_metadata(),
+    }
+    with (snapshot_dir / SNAPSHOT_METADATA_FILE).open("w") as file:
+        json.dump(metadata, file, indent=4)
+
+    logger.info(
+        f"Exported {num_exported} documents of '{document_class.get_collection_name()}' to '{snapshot_dir}' "
+        f"in {time.monotonic() - start_time:.1f}s."
+    )
+
+    return num_exported
+
+
+def _rows_to_table(rows: list[dict]) -> "pa.Table":
+    """
+    `pa.Table.from_pylist()` takes the columns from the first row only, so the schema is built from the union of the
+    rows' keys instead, and every column's type is inferred from all its values.
+    """
+
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    arrays = [pa.array([row.get(name) for row in rows]) for name in names]
+    schema = pa.schema([pa.field(name, array.type) for name, array in zip(names, arrays, strict=True)])
+
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def import_snapshot(
+    document_class: type[VectorBaseDocument], directory: Path, batch_size: int | None = None, workers: int | None = None
+) -> int:
+    """
+    Upserts the documents of a snapshot written by `export_snapshot()` through the bulk loader. The vectors are
+    memory-mapped and the payloads are read one part at a time, so the snapshot is streamed rather than loaded.
+    Returns the number of imported documents, or 0 if there is no snapshot of the class.
+    """
+
+    snapshot_dir = directory / document_class.__name__
+    metadata_path = snapshot_dir / SNAPSHOT_METADATA_FILE
+    if not metadata_path.exists():
+        logger.warning(f"No snapshot of '{document_class.__name__}' in '{directory}'.")
+
+        return 0
+
+    with metadata_path.open() as file:
+        metadata = json.load(file)
+
+    vectors = None
+    if document_class._has_class_attribute("embedding") and metadata["num_documents"] > 0:
+        vectors = np.load(snapshot_dir / SNAPSHOT_VECTORS_FILE, mmap_mode="r")
+        if len(vectors) != metadata["num_documents"]:
+            raise SnapshotError(
+                f"'{snapshot_dir}' holds {len(vectors)} vectors instead of {metadata['num_documents']}."
+            )
+        embedding_size = EmbeddingModelSingleton().embedding_size
+        if vectors.shape[1] != embedding_size:
+            raise SnapshotError(
+                f"The vectors of '{snapshot_dir}' have {vectors.shape[1]} dimensions, but the embedding model "
+                f"outputs {embedding_size}. Re-embed the chunks instead."
+            )
+
+    start_time = time.monotonic()
+    documents = _iter_snapshot_documents(document_class, snapshot_dir, metadata["collection_metadata"], vectors)
+    if not document_class.bulk_upsert(documents, batch_size=batch_size, workers=workers):
+        raise SnapshotError(f"Failed to import '{snapshot_dir}' into '{document_class.get_collection_name()}'.")
+
+    logger.info(
+        f"Imported {metadata['num_documents']} documents from '{snapshot_dir}' into "
+        f"'{document_class.get_collection_name()}' in {time.monotonic() - start_time:.1f}s."
+    )
+
+    return metadata["num_documents"]
+
+
+def _iter_snapshot_documents(
+    document_class: type[VectorBaseDocument],
+    snapshot_dir: Path,
+    collection_metadata: dict,
+    vectors: np.ndarray | None,
+) -> Iterator[VectorBaseDocument]:
+    offset = 0
+    for part_path in sorted((snapshot_dir / SNAPSHOT_PAYLOADS_DIR).glob("part-*.parquet")):
+        rows = pq.read_table(part_path).to_pylist()
+        # Only the rows of the current part are copied out of the memory map.
+        part_vectors = vectors[offset : offset + len(rows)].tolist() if vectors is not None else [None] * len(rows)
+        records = [
+            Record.model_construct(id=row.pop("id"), payload={**collection_metadata, **row}, vector=vector)
+            for row, vector in zip(rows, part_vectors, strict=True)
+        ]
+        # The snapshot was written from validated documents, so they are rebuilt without validation.
+        yield from document_class.from_records(records, trusted=True)
+
+        offset += len(rows)
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import time
+from threading import Lock
+
+from loguru import logger
+
+from llm_engineering.application.utils.cache import TTLCache
+from llm_engineering.domain.base import VectorBaseDocument
+from llm_engineering.domain.embedded_chunks import (
+    EmbeddedArticleChunk,
+    EmbeddedChunk,
+    EmbeddedPostChunk,
+    EmbeddedRepositoryChunk,
+)
+from llm_engineering.infrastructure.db.qdrant import RESPONSE_ERRORS
+from llm_engineering.settings import settings
+
+
+class AnswerCache:
+    """
+    Caches the generated answers by query and context fingerprint.
+
+    The key is built from the model ID, the prompt template hash, the query, the ordered IDs of the chunks used as
+    context and the generation parameters. On top of that, the whole cache is dropped whenever a collection is
+    written to, i.e., its write generation (bumped once by every bulk write and alias switch) changes. The write
+    generations of all the collections are read in a single request, at most every `invalidation_check_interval`
+    seconds, so a stale answer can be served for that long after a write.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.RAG_ANSWER_CACHE_MAX_SIZE,
+        ttl: float = settings.RAG_ANSWER_CACHE_TTL_SECONDS,
+        invalidation_check_interval: float = settings.RAG_ANSWER_CACHE_INVALIDATION_CHECK_SECONDS,
+        collections: tuple[type[VectorBaseDocument], ...] = (
+            EmbeddedPostChunk,
+            EmbeddedArticleChunk,
+            EmbeddedRepositoryChunk,
+        ),
+    ) -> None:
+        self._cache: TTLCache[str, str] = TTLCache(max_size=max_size, ttl=ttl)
+        self._invalidation_check_interval = invalidation_check_interval
+        self._collections = collections
+
+        self._collections_fingerprint: tuple[str | None, ...] | None = None
+        self._last_invalidation_check = float("-inf")
+        self._invalidation_lock = Lock()
+
+    @staticmethod
+    def compute_key(query: str, chunks: list[EmbeddedChunk], prompt: str, parameters: dict) -> str:
+        key = {
+            "model_id": settings.HF_MODEL_ID,
+            "prompt": hashlib.sha256(prompt.encode()).hexdigest(),
+            "query": query,
+            "chunk_ids": [str(chunk.id) for chunk in chunks],
+            "parameters": parameters,
+        }
+
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        self._invalidate_if_collections_changed()
+
+        return self._cache.get(key)
+
+    def set(self, key: str, answer: str) -> None:
+        self._cache.set(key, answer)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _invalidate_if_collections_changed(self) -> None:
+        now = time.monotonic()
+        if now - self._last_invalidation_check < self._invalidation_check_interval:
+            return
+
+        # Only one request pays for the check, the others keep using the current entries.
+        if not self._invalidation_lock.acquire(blocking=False):
+            return
+
+        try:
+            self._last_invalidation_check = now
+
+            try:
+                collections_fingerprint = self._get_collections_fingerprint()
+            except RESPONSE_ERRORS:
+                logger.exception("Failed to check whether the vector DB collections changed.")
+
+                return
+
+            if self._collections_fingerprint is not None and collections_fingerprint != self._collections_fingerprint:
+                logger.info("The vector DB collections changed. Invalidating the answer cache.")
+
+                self.clear()
+            self._collections_fingerprint = collections_fingerprint
+        finally:
+            self._invalidation_lock.release()
+
+    def _get_collections_fingerprint(self) -> tuple[str | None, ...]:
+        return tuple(VectorBaseDocument.get_write_generations(self._collections))
@@ -0,0 +1,146 @@
+from collections import OrderedDict
+from threading import Lock
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+from llm_engineering.application import utils
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.application.preprocessing.operations import split_sentences
+from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+from llm_engineering.domain.queries import Query
+from llm_engineering.infrastructure import metrics, tracing
+from llm_engineering.settings import settings
+
+from .base import RAGStep
+
+
+class SentenceEmbeddingCache:
+    """
+    A thread-safe LRU cache of normalized sentence embeddings and token counts.
+
+    The same chunks are retrieved over and over again, so their sentences are embedded and tokenized only once.
+    """
+
+    def __init__(self, max_size: int = settings.RAG_SENTENCE_EMBEDDING_CACHE_SIZE) -> None:
+        self._max_size = max_size
+        self._entries: OrderedDict[str, tuple[NDArray[np.float32], int]] = OrderedDict()
+        self._lock = Lock()
+
+    def __call__(self, sentences: list[str]) -> tuple[NDArray[np.float32], NDArray[np.int64]]:
+        """
+        Returns the embeddings of the sentences, stacked in their order, along with their token counts.
+        """
+
+        with self._lock:
+            entries = {sentence: self._entries[sentence] for sentence in sentences if sentence in self._entries}
+            for sentence in entries:
+                self._entries.move_to_end(sentence)
+
+        missing_sentences = [sentence for sentence in dict.fromkeys(sentences) if sentence not in entries]
+        metrics.record_cache_lookup("sentence_embedding", hit=True, count=len(entries))
+        metrics.record_cache_lookup("sentence_embedding", hit=False, count=len(missing_sentences))
+        if len(missing_sentences) > 0:
+            missing_embeddings = EmbeddingModelSingleton()(missing_sentences, to_list=False)
+            missing_embeddings /= np.maximum(np.linalg.norm(missing_embeddings, axis=1, keepdims=True), 1e-12)
+            missing_num_tokens = utils.misc.compute_num_tokens_batch(missing_sentences)
+            computed_entries = dict(
+                zip(missing_sentences, zip(missing_embeddings, missing_num_tokens, strict=True), strict=True)
+            )
+            entries.update(computed_entries)
+
+            with self._lock:
+                self._entries.update(computed_entries)
+                while len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+
+        embeddings = np.stack([entries[sentence][0] for sentence in sentences])
+        num_tokens = np.array([entries[sentence][1] for sentence in sentences], dtype=np.int64)
+
+        return embeddings, num_tokens
+
+
+sentence_embedding_cache = SentenceEmbeddingCache()
+
+
+class ContextCompressor(RAGStep):
+    """
+    Query-focused compression of the retrieved chunks.
+
+    Every chunk is split into sentences, which are scored by their cosine similarity with the query. The
+    highest-scoring sentences are kept until `ratio` of the original tokens (or `max_tokens`) is reached. The kept
+    sentences are returned in their original order, inside copies of their source chunks, so the context still
+    attributes every sentence to its type, platform and author.
+    """
+
+    @tracing.track(name="ContextCompressor.generate")
+    def generate(
+        self,
+        query: Query,
+        chunks: list[EmbeddedChunk],
+        ratio: float = settings.RAG_CONTEXT_COMPRESSION_RATIO,
+        max_tokens: int | None = settings.RAG_CONTEXT_COMPRESSION_MAX_TOKENS,
+    ) -> list[EmbeddedChunk]:
+        assert 0 < ratio <= 1, f"'ratio' should be in (0, 1]. Got {ratio}."
+
+        if self._mock or len(chunks) == 0:
+            return chunks
+
+        chunks_sentences = [
+            [
+                stripped_sentence
+                for sentence in split_sentences(chunk.content)
+                if (stripped_sentence := sentence.strip())
+            ]
+            for chunk in chunks
+        ]
+        sentences = utils.misc.flatten(chunks_sentences)
+        if len(sentences) == 0:
+            return chunks
+
+        sentences_embeddings, sentences_num_tokens = sentence_embedding_cache(sentences)
+        total_num_tokens = int(sentences_num_tokens.sum())
+        budget = int(total_num_tokens * ratio)
+        if max_tokens is not None:
+            budget = min(budget, max_tokens)
+
+        query_embeddings, _ = sentence_embedding_cache([query.content])
+        scores = sentences_embeddings @ query_embeddings[0]
+
+        keep = np.zeros(len(sentences), dtype=bool)
+        num_kept_tokens = 0
+        for sentence_idx in np.argsort(-scores, kind="stable"):
+            num_sentence_tokens = int(sentences_num_tokens[sentence_idx])
+            if num_kept_tokens + num_sentence_tokens > budget and keep.any():
+                continue
+
+            keep[sentence_idx] = True
+            num_kept_tokens += num_sentence_tokens
+
+        compressed_chunks = []
+        start = 0
+        for chunk, chunk_sentences in zip(chunks, chunks_sentences, strict=True):
+            chunk_slice = slice(start, start + len(chunk_sentences))
+            start = chunk_slice.stop
+
+            chunk_keep = keep[chunk_slice]
+            if not chunk_keep.any():
+                continue
+
+            kept_sentences = [sentence for sentence, kept in zip(chunk_sentences, chunk_keep, strict=True) if kept]
+            compressed_chunks.append(
+                chunk.model_copy(
+                    update={
+                        "content": " ".join(kept_sentences),
+                        "num_tokens": int(sentences_num_tokens[chunk_slice][chunk_keep].sum()),
+                    }
+                )
+            )
+
+        logger.info(
+            f"Compressed the context from {total_num_tokens} to {num_kept_tokens} tokens "
+            f"({len(compressed_chunks)}/{len(chunks)} chunks kept)."
+        )
+
+        return compressed_chunks
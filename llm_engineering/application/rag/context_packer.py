@@ -0,0 +1,92 @@
+import functools
+from uuid import UUID
+
+from loguru import logger
+
+from llm_engineering.application import utils
+from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+
+
+@functools.lru_cache(maxsize=10_000)
+def _compute_num_header_tokens(header: str) -> int:
+    # The headers only vary by chunk type, platform, author and position, so they are tokenized once per process.
+    return utils.misc.compute_num_tokens(header)
+
+
+class ContextPacker:
+    """
+    Packs reranked chunks into a prompt context that fits into a token budget.
+
+    The chunks are expected to be sorted by their rerank score. They are added greedily, skipping the ones that don't
+    fit anymore, so a long low-ranked chunk never pushes out a short high-ranked one. Text overlapping with an
+    already packed chunk of the same document (e.g., the chunking overlap) is trimmed before counting the tokens.
+    """
+
+    def __init__(self, min_overlap_length: int = 20, max_overlap_length: int = 2000) -> None:
+        self._min_overlap_length = min_overlap_length
+        self._max_overlap_length = max_overlap_length
+
+    def pack(self, chunks: list[EmbeddedChunk], max_tokens: int) -> str:
+        sections = []
+        num_packed_tokens = 0
+        packed_contents: dict[UUID, list[str]] = {}
+        for chunk in chunks:
+            content = self._trim_overlap(chunk.content, packed_contents.get(chunk.document_id, []))
+            if not content:
+                continue
+
+            position = len(sections) + 1
+            num_tokens = self._compute_num_tokens(chunk, content, position)
+            if num_packed_tokens + num_tokens > max_tokens:
+                continue
+
+            sections.append(chunk.to_context_section(position=position, content=content))
+            num_packed_tokens += num_tokens
+            packed_contents.setdefault(chunk.document_id, []).append(content)
+
+        logger.info(
+            f"Packed {len(sections)}/{len(chunks)} chunks into the context ({num_packed_tokens}/{max_tokens} tokens)."
+        )
+
+        return "".join(sections)
+
+    def _compute_num_tokens(self, chunk: EmbeddedChunk, content: str, position: int) -> int:
+        num_header_tokens = _compute_num_header_tokens(chunk.to_context_section(position=position, content=""))
+        if chunk.num_tokens is not None and content == chunk.content:
+            num_content_tokens = chunk.num_tokens
+        else:
+            num_content_tokens = utils.misc.compute_num_tokens(content)
+
+        return num_header_tokens + num_content_tokens
+
+    def _trim_overlap(self, content: str, packed_contents: list[str]) -> str:
+        for packed_content in packed_contents:
+            if content in packed_content:
+                return ""
+
+            overlap = self._overlap_length(packed_content, content)
+            if overlap > 0:
+                content = content[overlap:].lstrip()
+
+            overlap = self._overlap_length(content, packed_content)
+            if overlap > 0:
+                content = content[:-overlap].rstrip()
+
+        return content
+
+    def _overlap_length(self, left: str, right: str) -> int:
+        """Returns the length of the longest suffix of `left` that is also a prefix of `right`."""
+
+        max_overlap_length = min(len(left), len(right), self._max_overlap_length)
+        if max_overlap_length < self._min_overlap_length:
+            return 0
+
+        anchor = right[: self._min_overlap_length]
+        start = len(left) - max_overlap_length
+        while (start := left.find(anchor, start)) != -1:
+            if right.startswith(left[start:]):
+                return len(left) - start
+
+            start += 1
+
+        return 0
@@ -1,8 +1,7 @@
-import opik
-
 from llm_engineering.application.networks import CrossEncoderModelSingleton
 from llm_engineering.domain.embedded_chunks import EmbeddedChunk
 from llm_engineering.domain.queries import Query
+from llm_engineering.infrastructure import tracing
 
 from .base import RAGStep
 
@@ -13,7 +12,7 @@ class Reranker(RAGStep):
 
         self._model = CrossEncoderModelSingleton()
 
-    @opik.track(name="Reranker.generate")
+    @tracing.track(name="Reranker.generate")
     def generate(self, query: Query, chunks: list[EmbeddedChunk], keep_top_k: int) -> list[EmbeddedChunk]:
         if self._mock:
             return chunks
@@ -21,6 +20,40 @@ class Reranker(RAGStep):
         query_doc_tuples = [(query.content, chunk.content) for chunk in chunks]
         scores = self._model(query_doc_tuples)
 
+        return self._keep_top_k(scores, chunks, keep_top_k)
+
+    @tracing.track(name="Reranker.generate_batch")
+    def generate_batch(
+        self, queries: list[Query], chunks: list[list[EmbeddedChunk]], keep_top_k: int
+    ) -> list[list[EmbeddedChunk]]:
+        """Reranks the chunks of every query with a single cross-encoder call over all the (query, chunk) pairs."""
+
+        assert len(queries) == len(chunks), "Each query should have its own list of chunks."
+
+        if self._mock:
+            return chunks
+
+        query_doc_tuples = [
+            (query.content, chunk.content)
+            for query, query_chunks in zip(queries, chunks, strict=True)
+            for chunk in query_chunks
+        ]
+        if len(query_doc_tuples) == 0:
+            return [[] for _ in queries]
+
+        scores = self._model(query_doc_tuples)
+
+        reranked_documents = []
+        start = 0
+        for query_chunks in chunks:
+            end = start + len(query_chunks)
+            reranked_documents.append(self._keep_top_k(scores[start:end], query_chunks, keep_top_k))
+            start = end
+
+        return reranked_documents
+
+    @staticmethod
+    def _keep_top_k(scores: list[float], chunks: list[EmbeddedChunk], keep_top_k: int) -> list[EmbeddedChunk]:
         scored_query_doc_tuples = list(zip(scores, chunks, strict=False))
         scored_query_doc_tuples.sort(key=lambda x: x[0], reverse=True)
 
@@ -1,6 +1,6 @@
+import asyncio
 import concurrent.futures
 
-import opik
 from loguru import logger
 from qdrant_client.models import FieldCondition, Filter, MatchValue
 
@@ -13,6 +13,7 @@ from llm_engineering.domain.embedded_chunks import (
     EmbeddedRepositoryChunk,
 )
 from llm_engineering.domain.queries import EmbeddedQuery, Query
+from llm_engineering.infrastructure import metrics, tracing
 
 from .query_expanison import QueryExpansion
 from .reranking import Reranker
@@ -20,88 +21,266 @@ from .self_query import SelfQuery
 
 
 class ContextRetriever:
+    DATA_CATEGORY_ODMS = (EmbeddedPostChunk, EmbeddedArticleChunk, EmbeddedRepositoryChunk)
+
     def __init__(self, mock: bool = False) -> None:
         self._query_expander = QueryExpansion(mock=mock)
         self._metadata_extractor = SelfQuery(mock=mock)
         self._reranker = Reranker(mock=mock)
 
-    @opik.track(name="ContextRetriever.search")
+    @tracing.track(name="ContextRetriever.search")
     def search(
         self,
         query: str,
         k: int = 3,
         expand_to_n_queries: int = 3,
     ) -> list:
-        query_model = Query.from_str(query)
+        return self.search_batch([query], k=k, expand_to_n_queries=expand_to_n_queries)[0]
+
+    @tracing.track(name="ContextRetriever.search_batch")
+    def search_batch(
+        self,
+        queries: list[str],
+        k: int = 3,
+        expand_to_n_queries: int = 3,
+    ) -> list[list[EmbeddedChunk]]:
+        """
+        Retrieves the top k chunks for every query. The expanded queries of all the inputs share a single
+        embedding batch, one Qdrant batch search per collection and a single cross-encoder reranking batch.
+        """
+
+        query_models = [Query.from_str(query) for query in queries]
+
+        with concurrent.futures.ThreadPoolExecutor() as executor:
+            with metrics.measure_stage("self_query"):
+                query_models = list(
+                    executor.map(tracing.propagate_context(self._metadata_extractor.generate), query_models)
+                )
+            logger.info(
+                f"Successfully extracted the author_full_name for {len(query_models)} queries.",
+            )
+
+            with metrics.measure_stage("query_expansion"):
+                n_generated_queries = list(
+                    executor.map(
+                        tracing.propagate_context(
+                            lambda query_model: self._query_expander.generate(
+                                query_model, expand_to_n=expand_to_n_queries
+                            )
+                        ),
+                        query_models,
+                    )
+                )
+            metrics.stage_candidates_total.inc(
+                sum(len(generated) for generated in n_generated_queries), stage="query_expansion"
+            )
+            logger.info(
+                f"Successfully generated {sum(len(generated) for generated in n_generated_queries)} search queries.",
+            )
+
+        n_k_documents = self._search_batch(utils.misc.flatten(n_generated_queries), k)
+        queries_k_documents = self._group_by_query(n_generated_queries, n_k_documents)
+
+        return self.rerank_batch(query_models, chunks=queries_k_documents, keep_top_k=k)
+
+    @tracing.track(name="ContextRetriever.asearch")
+    async def asearch(
+        self,
+        query: str,
+        k: int = 3,
+        expand_to_n_queries: int = 3,
+    ) -> list:
+        return (await self.asearch_batch([query], k=k, expand_to_n_queries=expand_to_n_queries))[0]
+
+    @tracing.track(name="ContextRetriever.asearch_batch")
+    async def asearch_batch(
+        self,
+        queries: list[str],
+        k: int = 3,
+        expand_to_n_queries: int = 3,
+    ) -> list[list[EmbeddedChunk]]:
+        """
+        Async counterpart of `search_batch()`: the searches of all the collections are issued concurrently on the
+        event loop. The LLM calls, the embedding and the reranking are blocking, so they run in the default thread
+        pool (which also copies the tracing context).
+        """
 
-        query_model = self._metadata_extractor.generate(query_model)
+        query_models = [Query.from_str(query) for query in queries]
+
+        with metrics.measure_stage("self_query"):
+            query_models = await asyncio.gather(
+                *(asyncio.to_thread(self._metadata_extractor.generate, query_model) for query_model in query_models)
+            )
         logger.info(
-            f"Successfully extracted the author_full_name = {query_model.author_full_name} from the query.",
+            f"Successfully extracted the author_full_name for {len(query_models)} queries.",
         )
 
-        n_generated_queries = self._query_expander.generate(query_model, expand_to_n=expand_to_n_queries)
+        with metrics.measure_stage("query_expansion"):
+            n_generated_queries = await asyncio.gather(
+                *(
+                    asyncio.to_thread(self._query_expander.generate, query_model, expand_to_n=expand_to_n_queries)
+                    for query_model in query_models
+                )
+            )
+        metrics.stage_candidates_total.inc(
+            sum(len(generated) for generated in n_generated_queries), stage="query_expansion"
+        )
         logger.info(
-            f"Successfully generated {len(n_generated_queries)} search queries.",
+            f"Successfully generated {sum(len(generated) for generated in n_generated_queries)} search queries.",
         )
 
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            search_tasks = [executor.submit(self._search, _query_model, k) for _query_model in n_generated_queries]
+        n_k_documents = await self._asearch_batch(utils.misc.flatten(n_generated_queries), k)
+        queries_k_documents = self._group_by_query(n_generated_queries, n_k_documents)
 
-            n_k_documents = [task.result() for task in concurrent.futures.as_completed(search_tasks)]
-            n_k_documents = utils.misc.flatten(n_k_documents)
-            n_k_documents = list(set(n_k_documents))
+        return await asyncio.to_thread(self.rerank_batch, query_models, chunks=queries_k_documents, keep_top_k=k)
 
-        logger.info(f"{len(n_k_documents)} documents retrieved successfully")
+    @staticmethod
+    def _group_by_query(
+        n_generated_queries: list[list[Query]], n_k_documents: list[list[EmbeddedChunk]]
+    ) -> list[list[EmbeddedChunk]]:
+        """Merges the chunks retrieved by the expanded queries of every input query, without duplicates."""
 
-        if len(n_k_documents) > 0:
-            k_documents = self.rerank(query, chunks=n_k_documents, keep_top_k=k)
-        else:
-            k_documents = []
+        queries_k_documents = []
+        start = 0
+        for generated_queries in n_generated_queries:
+            end = start + len(generated_queries)
+            query_k_documents = utils.misc.flatten(n_k_documents[start:end])
+            queries_k_documents.append(list(set(query_k_documents)))
+            start = end
 
-        return k_documents
+        logger.info(f"{sum(len(documents) for documents in queries_k_documents)} documents retrieved successfully")
+        metrics.stage_candidates_total.inc(
+            sum(len(documents) for documents in queries_k_documents), stage="vector_search"
+        )
+
+        return queries_k_documents
 
-    def _search(self, query: Query, k: int = 3) -> list[EmbeddedChunk]:
+    def _search_batch(self, queries: list[Query], k: int = 3) -> list[list[EmbeddedChunk]]:
         assert k >= 3, "k should be >= 3"
 
+        if len(queries) == 0:
+            return []
+
         def _search_data_category(
-            data_category_odm: type[EmbeddedChunk], embedded_query: EmbeddedQuery
-        ) -> list[EmbeddedChunk]:
-            if embedded_query.author_id:
-                query_filter = Filter(
-                    must=[
-                        FieldCondition(
-                            key="author_id",
-                            match=MatchValue(
-                                value=str(embedded_query.author_id),
-                            ),
-                        )
-                    ]
-                )
-            else:
-                query_filter = None
+            data_category_odm: type[EmbeddedChunk], embedded_queries: list[EmbeddedQuery]
+        ) -> list[list[EmbeddedChunk]]:
+            data_category_odm.validate_query_metadata(embedded_queries[0].metadata)
 
-            return data_category_odm.search(
-                query_vector=embedded_query.embedding,
+            return data_category_odm.search_batch(
+                query_vectors=[embedded_query.embedding for embedded_query in embedded_queries],
                 limit=k // 3,
-                query_filter=query_filter,
+                query_filters=[self._build_query_filter(embedded_query) for embedded_query in embedded_queries],
+            )
+
+        with metrics.measure_stage("embedding"):
+            embedded_queries: list[EmbeddedQuery] = EmbeddingDispatcher.dispatch(queries)
+
+        if EmbeddedChunk.get_unified_collection():
+            with metrics.measure_stage("vector_search"):
+                for data_category_odm in self.DATA_CATEGORY_ODMS:
+                    data_category_odm.validate_query_metadata(embedded_queries[0].metadata)
+
+                # A single search over all the categories returns the overall top k chunks.
+                return EmbeddedChunk.search_batch(
+                    query_vectors=[embedded_query.embedding for embedded_query in embedded_queries],
+                    limit=k,
+                    query_filters=[self._build_query_filter(embedded_query) for embedded_query in embedded_queries],
+                )
+
+        with metrics.measure_stage("vector_search"), concurrent.futures.ThreadPoolExecutor() as executor:
+            search_tasks = [
+                executor.submit(_search_data_category, data_category_odm, embedded_queries)
+                for data_category_odm in self.DATA_CATEGORY_ODMS
+            ]
+            data_categories_chunks = [task.result() for task in search_tasks]
+
+        return self._merge_data_categories(data_categories_chunks)
+
+    async def _asearch_batch(self, queries: list[Query], k: int = 3) -> list[list[EmbeddedChunk]]:
+        assert k >= 3, "k should be >= 3"
+
+        if len(queries) == 0:
+            return []
+
+        with metrics.measure_stage("embedding"):
+            embedded_queries: list[EmbeddedQuery] = await asyncio.to_thread(EmbeddingDispatcher.dispatch, queries)
+
+        query_vectors = [embedded_query.embedding for embedded_query in embedded_queries]
+        query_filters = [self._build_query_filter(embedded_query) for embedded_query in embedded_queries]
+
+        async def _search_data_category(data_category_odm: type[EmbeddedChunk]) -> list[list[EmbeddedChunk]]:
+            await data_category_odm.aload_collection_metadata()
+            data_category_odm.validate_query_metadata(embedded_queries[0].metadata)
+
+            return await data_category_odm.asearch_batch(
+                query_vectors=query_vectors, limit=k // 3, query_filters=query_filters
+            )
+
+        if EmbeddedChunk.get_unified_collection():
+            with metrics.measure_stage("vector_search"):
+                await EmbeddedChunk.aload_collection_metadata()
+                for data_category_odm in self.DATA_CATEGORY_ODMS:
+                    data_category_odm.validate_query_metadata(embedded_queries[0].metadata)
+
+                return await EmbeddedChunk.asearch_batch(
+                    query_vectors=query_vectors, limit=k, query_filters=query_filters
+                )
+
+        with metrics.measure_stage("vector_search"):
+            data_categories_chunks = await asyncio.gather(
+                *(_search_data_category(data_category_odm) for data_category_odm in self.DATA_CATEGORY_ODMS)
             )
 
-        embedded_query: EmbeddedQuery = EmbeddingDispatcher.dispatch(query)
+        return self._merge_data_categories(data_categories_chunks)
+
+    @staticmethod
+    def _merge_data_categories(data_categories_chunks: list[list[list[EmbeddedChunk]]]) -> list[list[EmbeddedChunk]]:
+        post_chunks, articles_chunks, repositories_chunks = data_categories_chunks
 
-        post_chunks = _search_data_category(EmbeddedPostChunk, embedded_query)
-        articles_chunks = _search_data_category(EmbeddedArticleChunk, embedded_query)
-        repositories_chunks = _search_data_category(EmbeddedRepositoryChunk, embedded_query)
+        return [
+            query_post_chunks + query_articles_chunks + query_repositories_chunks
+            for query_post_chunks, query_articles_chunks, query_repositories_chunks in zip(
+                post_chunks, articles_chunks, repositories_chunks, strict=True
+            )
+        ]
 
-        retrieved_chunks = post_chunks + articles_chunks + repositories_chunks
+    @staticmethod
+    def _build_query_filter(embedded_query: EmbeddedQuery) -> Filter | None:
+        if not embedded_query.author_id:
+            return None
 
-        return retrieved_chunks
+        return Filter(
+            must=[
+                FieldCondition(
+                    key="author_id",
+                    match=MatchValue(
+                        value=str(embedded_query.author_id),
+                    ),
+                )
+            ]
+        )
 
     def rerank(self, query: str | Query, chunks: list[EmbeddedChunk], keep_top_k: int) -> list[EmbeddedChunk]:
         if isinstance(query, str):
             query = Query.from_str(query)
 
-        reranked_documents = self._reranker.generate(query=query, chunks=chunks, keep_top_k=keep_top_k)
+        with metrics.measure_stage("rerank"):
+            reranked_documents = self._reranker.generate(query=query, chunks=chunks, keep_top_k=keep_top_k)
+        metrics.stage_candidates_total.inc(len(reranked_documents), stage="rerank")
 
         logger.info(f"{len(reranked_documents)} documents reranked successfully.")
 
         return reranked_documents
+
+    def rerank_batch(
+        self, queries: list[str | Query], chunks: list[list[EmbeddedChunk]], keep_top_k: int
+    ) -> list[list[EmbeddedChunk]]:
+        queries = [Query.from_str(query) if isinstance(query, str) else query for query in queries]
+
+        with metrics.measure_stage("rerank"):
+            reranked_documents = self._reranker.generate_batch(queries=queries, chunks=chunks, keep_top_k=keep_top_k)
+        metrics.stage_candidates_total.inc(sum(len(documents) for documents in reranked_documents), stage="rerank")
+
+        logger.info(f"{sum(len(documents) for documents in reranked_documents)} documents reranked successfully.")
+
+        return reranked_documents
@@ -1,10 +1,10 @@
-import opik
 from langchain_openai import ChatOpenAI
 from loguru import logger
 
 from llm_engineering.application import utils
 from llm_engineering.domain.documents import UserDocument
 from llm_engineering.domain.queries import Query
+from llm_engineering.infrastructure import tracing
 from llm_engineering.settings import settings
 
 from .base import RAGStep
@@ -12,7 +12,7 @@ from .prompt_templates import SelfQueryTemplate
 
 
 class SelfQuery(RAGStep):
-    @opik.track(name="SelfQuery.generate")
+    @tracing.track(name="SelfQuery.generate")
     def generate(self, query: Query) -> Query:
         if self._mock:
             return query
@@ -1,4 +1,4 @@
-from . import misc
+from . import cache, misc
 from .split_user_full_name import split_user_full_name
 
-__all__ = ["misc", "split_user_full_name"]
+__all__ = ["cache", "misc", "split_user_full_name"]
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Generator
 
 from transformers import AutoTokenizer
@@ -15,7 +16,24 @@ def batch(list_: list, size: int) -> Generator[list, None, None]:
     yield from (list_[i : i + size] for i in range(0, len(list_), size))
 
 
+@lru_cache(maxsize=None)
+def get_tokenizer(model_id: str = settings.HF_MODEL_ID) -> AutoTokenizer:
+    """Load the tokenizer only once per model, as `from_pretrained` hits the disk (or the network) on every call."""
+
+    return AutoTokenizer.from_pretrained(model_id)
+
+
 def compute_num_tokens(text: str) -> int:
-    tokenizer = AutoTokenizer.from_pretrained(settings.HF_MODEL_ID)
+    tokenizer = get_tokenizer(settings.HF_MODEL_ID)
 
     return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def compute_num_tokens_batch(texts: list[str]) -> list[int]:
+    if len(texts) == 0:
+        return []
+
+    tokenizer = get_tokenizer(settings.HF_MODEL_ID)
+    input_ids = tokenizer(texts, add_special_tokens=False)["input_ids"]
+
+    return [len(ids) for ids in input_ids]
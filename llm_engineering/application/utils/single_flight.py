@@ -0,0 +1,221 @@
+import threading
+from typing import Callable, Generic, Hashable, Iterator, TypeVar
+
+from loguru import logger
+
+V = TypeVar("V")
+
+
+class _Call(Generic[V]):
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: V | None = None
+        self.error: BaseException | None = None
+        self.num_waiters = 0
+
+
+class SingleFlight(Generic[V]):
+    """
+    Deduplicates concurrent calls with the same key.
+
+    The first caller (the leader) runs the function, while the callers arriving before it finishes wait for its
+    result (or exception) instead of running the function again. The key is released as soon as the call finishes,
+    so later calls run again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call[V]] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], V]) -> V:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.num_waiters += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+            if call.num_waiters > 0:
+                logger.info(f"Coalesced {call.num_waiters} identical concurrent requests.")
+
+        return call.result
+
+
+class TokenBroadcast:
+    """
+    Fans out one upstream token stream to any number of subscribers.
+
+    A background thread pumps the upstream tokens into a shared buffer. Every subscriber replays the buffer from the
+    beginning and then follows the live tokens. When the last subscriber leaves before the end, the upstream stream
+    is closed, which cancels the generation.
+    """
+
+    def __init__(self, tokens: Iterator[str], on_finish: Callable[[], None] | None = None) -> None:
+        self._upstream = tokens
+        self._on_finish = on_finish
+
+        self._condition = threading.Condition()
+        self._tokens: list[str] = []
+        self._error: BaseException | None = None
+        self._finished = False
+        self._cancelled = False
+        self._num_subscribers = 0
+
+        self._pump_thread = threading.Thread(target=self._pump, daemon=True)
+
+    def start(self) -> "TokenBroadcast":
+        self._pump_thread.start()
+
+        return self
+
+    def subscribe(self) -> "TokenSubscription | None":
+        """Returns None if the broadcast was already cancelled, as its buffer will never be completed."""
+
+        with self._condition:
+            if self._cancelled:
+                return None
+
+            self._num_subscribers += 1
+
+        return TokenSubscription(self)
+
+    def _pump(self) -> None:
+        try:
+            for token in self._upstream:
+                with self._condition:
+                    if self._cancelled:
+                        break
+
+                    self._tokens.append(token)
+                    self._condition.notify_all()
+        except BaseException as e:
+            with self._condition:
+                self._error = e
+        finally:
+            self._close_upstream()
+
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
+
+            if self._on_finish is not None:
+                self._on_finish()
+
+    def _next(self, position: int) -> str:
+        with self._condition:
+            self._condition.wait_for(lambda: position < len(self._tokens) or self._finished)
+
+            if position < len(self._tokens):
+                return self._tokens[position]
+            if self._error is not None:
+                raise self._error
+
+            raise StopIteration
+
+    def _unsubscribe(self) -> None:
+        with self._condition:
+            self._num_subscribers -= 1
+            if self._num_subscribers > 0 or self._finished:
+                return
+
+            self._cancelled = True
+
+        logger.info("All the subscribers left. Cancelling the upstream stream.")
+
+        self._close_upstream()
+
+    def _close_upstream(self) -> None:
+        close = getattr(self._upstream, "close", None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # A generator can't be closed while the pump thread is running it, the pump closes it on exit.
+                pass
+
+
+class TokenSubscription:
+    def __init__(self, broadcast: TokenBroadcast) -> None:
+        self._broadcast = broadcast
+        self._position = 0
+        self._closed = False
+
+    def __iter__(self) -> "TokenSubscription":
+        return self
+
+    def __next__(self) -> str:
+        if self._closed:
+            raise StopIteration
+
+        token = self._broadcast._next(self._position)
+        self._position += 1
+
+        return token
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        self._broadcast._unsubscribe()
+
+
+class StreamSingleFlight:
+    """
+    Deduplicates concurrent streams with the same key.
+
+    The first caller opens the upstream stream, while the callers arriving before it finishes subscribe to the same
+    broadcast and receive every token, including the ones generated before they joined.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._broadcasts: dict[Hashable, TokenBroadcast] = {}
+        self._opening: SingleFlight[TokenBroadcast] = SingleFlight()
+
+    def subscribe(self, key: Hashable, open_stream: Callable[[], Iterator[str]]) -> TokenSubscription:
+        while True:
+            with self._lock:
+                broadcast = self._broadcasts.get(key)
+
+            if broadcast is None:
+                broadcast = self._opening.do(key, lambda: self._open(key, open_stream))
+
+            subscription = broadcast.subscribe()
+            if subscription is not None:
+                return subscription
+
+            self._remove(key, broadcast)
+
+    def _open(self, key: Hashable, open_stream: Callable[[], Iterator[str]]) -> TokenBroadcast:
+        broadcast = TokenBroadcast(open_stream(), on_finish=lambda: self._remove(key, broadcast))
+        with self._lock:
+            self._broadcasts[key] = broadcast
+
+        # Started only once registered, so a fast stream can't finish before it is registered.
+        return broadcast.start()
+
+    def _remove(self, key: Hashable, broadcast: TokenBroadcast) -> None:
+        with self._lock:
+            if self._broadcasts.get(key) is broadcast:
+                del self._broadcasts[key]
@@ -1,21 +1,43 @@
+import functools
+import threading
+import types
 import uuid
 from abc import ABC
-from typing import Generic, Type, TypeVar
+from typing import Generic, Iterator, Type, TypeVar, Union, get_args, get_origin
 
 from loguru import logger
 from pydantic import UUID4, BaseModel, Field
-from pymongo import errors
+from pymongo import IndexModel, errors
+from pymongo.collection import Collection
 
 from llm_engineering.domain.exceptions import ImproperlyConfigured
 from llm_engineering.infrastructure.db.mongo import connection
 from llm_engineering.settings import settings
 
 _database = connection.get_database(settings.DATABASE_NAME)
+# The collections whose declared indexes were ensured by this process.
+_indexed_collections: set[str] = set()
+_indexed_collections_lock = threading.Lock()
 
 
 T = TypeVar("T", bound="NoSQLBaseDocument")
 
 
+@functools.cache
+def _get_uuid_fields(document_class: type["NoSQLBaseDocument"]) -> list[str]:
+    """The fields stored as strings that the trusted construction has to parse back into UUIDs."""
+
+    uuid_fields = []
+    for field_name, field_info in document_class.model_fields.items():
+        annotation = field_info.annotation
+        if get_origin(annotation) in (Union, types.UnionType):
+            annotation = next((arg for arg in get_args(annotation) if arg is not type(None)), None)
+        if annotation is uuid.UUID:
+            uuid_fields.append(field_info.alias or field_name)
+
+    return uuid_fields
+
+
 class NoSQLBaseDocument(BaseModel, Generic[T], ABC):
     id: UUID4 = Field(default_factory=uuid.uuid4)
 
@@ -29,14 +51,27 @@ class NoSQLBaseDocument(BaseModel, Generic[T], ABC):
         return hash(self.id)
 
     @classmethod
-    def from_mongo(cls: Type[T], data: dict) -> T:
-        """Convert "_id" (str object) into "id" (UUID object)."""
+    def from_mongo(cls: Type[T], data: dict, trusted: bool = False) -> T:
+        """
+        Convert "_id" (str object) into "id" (UUID object).
+
+        With `trusted`, the data is assumed to be written by this code base (or partially projected), so the document
+        is built without validation: only the UUIDs are parsed and the missing fields are set to their defaults.
+        """
 
         if not data:
             raise ValueError("Data is empty.")
 
         id = data.pop("_id")
 
+        if trusted:
+            for field_name in _get_uuid_fields(cls):
+                value = data.get(field_name)
+                if isinstance(value, str):
+                    data[field_name] = uuid.UUID(value)
+
+            return cls.model_construct(**dict(data, id=uuid.UUID(id)))
+
         return cls(**dict(data, id=id))
 
     def to_mongo(self: T, **kwargs) -> dict:
@@ -65,7 +100,7 @@ class NoSQLBaseDocument(BaseModel, Generic[T], ABC):
         return dict_
 
     def save(self: T, **kwargs) -> T | None:
-        collection = _database[self.get_collection_name()]
+        collection = self._get_collection()
         try:
             collection.insert_one(self.to_mongo(**kwargs))
 
@@ -77,7 +112,7 @@ class NoSQLBaseDocument(BaseModel, Generic[T], ABC):
 
     @classmethod
     def get_or_create(cls: Type[T], **filter_options) -> T:
-        collection = _database[cls.get_collection_name()]
+        collection = cls._get_collection()
         try:
             instance = collection.find_one(filter_options)
             if instance:
@@ -85,6 +120,9 @@ class NoSQLBaseDocument(BaseModel, Generic[T], ABC):
 
             new_instance = cls(**filter_options)
             new_instance = new_instance.save()
+            if new_instance is None and (instance := collection.find_one(filter_options)):
+                # A concurrent call created it first, so the insert was rejected by a unique index.
+                return cls.from_mongo(instance)
 
             return new_instance
         except errors.OperationFailure:
@@ -94,7 +132,7 @@ class NoSQLBaseDocument(BaseModel, Generic[T], ABC):
 
     @classmethod
     def bulk_insert(cls: Type[T], documents: list[T], **kwargs) -> bool:
-        collection = _database[cls.get_collection_name()]
+        collection = cls._get_collection()
         try:
             collection.insert_many(doc.to_mongo(**kwargs) for doc in documents)
 
@@ -106,7 +144,7 @@ class NoSQLBaseDocument(BaseModel, Generic[T], ABC):
 
     @classmethod
     def find(cls: Type[T], **filter_options) -> T | None:
-        collection = _database[cls.get_collection_name()]
+        collection = cls._get_collection()
         try:
             instance = collection.find_one(filter_options)
             if instance:
@@ -120,7 +158,7 @@ class NoSQLBaseDocument(BaseModel, Generic[T], ABC):
 
     @classmethod
     def bulk_find(cls: Type[T], **filter_options) -> list[T]:
-        collection = _database[cls.get_collection_name()]
+        collection = cls._get_collection()
         try:
             instances = collection.find(filter_options)
             return [document for instance in instances if (document := cls.from_mongo(instance)) is not None]
@@ -129,6 +167,78 @@ class NoSQLBaseDocument(BaseModel, Generic[T], ABC):
 
             return []
 
+    @classmethod
+    def iter_find(
+        cls: Type[T],
+        batch_size: int | None = None,
+        projection: list[str] | None = None,
+        trusted: bool = False,
+        **filter_options,
+    ) -> Iterator[T]:
+        """
+        Lazily yields the documents matching the filter options. Unlike `bulk_find()`, only one batch of the cursor
+        is held in memory at once, whatever the size of the collection.
+
+        Args:
+            batch_size: Documents fetched per round trip. Defaults to `DATABASE_CURSOR_BATCH_SIZE`.
+            projection: Only read these fields. The documents are then built without validation and only the
+                selected fields (and the defaults) are set.
+            trusted: Whether to build the documents without validating them (see `from_mongo()`).
+        """
+
+        collection = cls._get_collection()
+        if projection is not None:
+            projection = ["_id" if field_name == "id" else field_name for field_name in projection]
+        trusted = trusted or projection is not None
+
+        try:
+            # The cursor is closed on the server too if the iteration is stopped early.
+            with collection.find(
+                filter_options, projection=projection, batch_size=batch_size or settings.DATABASE_CURSOR_BATCH_SIZE
+            ) as cursor:
+                for instance in cursor:
+                    yield cls.from_mongo(instance, trusted=trusted)
+        except errors.OperationFailure:
+            logger.error("Failed to retrieve documents")
+
+    @classmethod
+    def ensure_indexes(cls: Type[T]) -> list[str]:
+        """
+        Creates the indexes declared in the Settings. It's idempotent, as MongoDB skips the indexes that already exist.
+
+        Returns:
+            The names of the declared indexes, or [] if they couldn't be created (e.g., a unique index over duplicates
+            or an index with the same name but different options).
+        """
+
+        indexes = cls.get_indexes()
+        if not indexes:
+            return []
+
+        try:
+            return _database[cls.get_collection_name()].create_indexes(list(indexes))
+        except errors.OperationFailure:
+            logger.exception(f"Failed to create the indexes of '{cls.get_collection_name()}'.")
+
+            return []
+
+    @classmethod
+    def _get_collection(cls: Type[T]) -> Collection:
+        """The collection of the documents, whose declared indexes are ensured on first use."""
+
+        collection_name = cls.get_collection_name()
+        if settings.DATABASE_ENSURE_INDEXES and collection_name not in _indexed_collections:
+            with _indexed_collections_lock:
+                if collection_name not in _indexed_collections:
+                    cls.ensure_indexes()
+                    _indexed_collections.add(collection_name)
+
+        return _database[collection_name]
+
+    @classmethod
+    def get_indexes(cls: Type[T]) -> tuple[IndexModel, ...]:
+        return tuple(getattr(getattr(cls, "Settings", None), "indexes", ()))
+
     @classmethod
     def get_collection_name(cls: Type[T]) -> str:
         if not hasattr(cls, "Settings") or not hasattr(cls.Settings, "name"):
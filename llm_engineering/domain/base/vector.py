@@ -1,22 +1,201 @@
+import functools
+import itertools
+import queue
+import threading
+import time
+import types
 import uuid
 from abc import ABC
-from typing import Any, Callable, Dict, Generic, Type, TypeVar
-from uuid import UUID
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_for_futures
+from contextvars import ContextVar
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+from uuid import UUID, SafeUUID
 
 import numpy as np
 from loguru import logger
 from pydantic import UUID4, BaseModel, Field
 from qdrant_client.http import exceptions
-from qdrant_client.http.models import Distance, VectorParams
-from qdrant_client.models import CollectionInfo, PointStruct, Record
+from qdrant_client.http.models import Distance, PayloadSchemaType, VectorParams
+from qdrant_client.models import (
+    CollectionInfo,
+    CreateAlias,
+    CreateAliasOperation,
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PointStruct,
+    Record,
+    SearchParams,
+    SearchRequest,
+)
 
 from llm_engineering.application.networks.embeddings import EmbeddingModelSingleton
 from llm_engineering.domain.exceptions import ImproperlyConfigured
 from llm_engineering.domain.types import DataCategory
-from llm_engineering.infrastructure.db.qdrant import connection
+from llm_engineering.infrastructure.db.qdrant import (
+    RESPONSE_ERRORS,
+    aconnection,
+    connection,
+    is_retryable_qdrant_error,
+)
+from llm_engineering.model.inference.resilience import RetryPolicy
+from llm_engineering.settings import settings
 
 T = TypeVar("T", bound="VectorBaseDocument")
 
+# Collections known to exist, so the bulk loaders don't ask Qdrant before every write.
+_existing_collections: set[str] = set()
+_existing_collections_lock = threading.Lock()
+
+# The fields identical for all the documents of a collection (see `Config.collection_fields`) are stored once, in a
+# record of this (vectorless) collection, instead of in every point's payload.
+COLLECTIONS_METADATA_COLLECTION = "collections_metadata"
+# The collections' metadata records, cached as (expiry time, values) for QDRANT_COLLECTION_METADATA_TTL_SECONDS, so
+# a re-indexing or an ingestion run by another process is eventually seen. Missing records are cached as {} too, so
+# the collections written without one don't cost extra requests on every read.
+_collections_metadata: dict[str, tuple[float, dict]] = {}
+_collections_metadata_lock = threading.Lock()
+# The metadata loaded by `aload_collection_metadata()` in the current task, missing records included, so the documents
+# it reads next are built without blocking the event loop.
+_loaded_collections_metadata: ContextVar[dict[str, dict]] = ContextVar("loaded_collections_metadata", default={})
+
+# The payload field holding the data category of the documents stored in a unified collection.
+CATEGORY_PAYLOAD_FIELD = "category"
+# The payload field holding the ID of the bulk upsert which last wrote a point, used to confirm that it was applied.
+UPSERT_ID_PAYLOAD_FIELD = "upsert_id"
+
+# Field types stored as is in the JSON payload, which can be read back without validation.
+_JSON_NATIVE_TYPES = (str, int, float, bool, dict, list, Any)
+
+
+class _FieldPlan:
+    """What the trusted (de)serialization needs to know about the fields of a class, computed once per class."""
+
+    def __init__(self, document_class: type["VectorBaseDocument"]) -> None:
+        self.has_embedding = "embedding" in document_class.model_fields
+        self.point_fields = {"id", "embedding"} if self.has_embedding else {"id"}
+        self.collection_fields = set(document_class._get_config_attribute("collection_fields") or ())
+        self.uuid_fields: list[str] = []
+        # Classes with fields that need validation to be read back (e.g., nested models or enums) fall back to it.
+        self.supports_trusted_construction = True
+
+        for field_name, field_info in document_class.model_fields.items():
+            if field_name in self.point_fields:
+                continue
+
+            annotation = _unwrap_annotation(field_info.annotation)
+            if annotation is UUID:
+                self.uuid_fields.append(field_info.alias or field_name)
+            elif not _is_json_native(annotation):
+                self.supports_trusted_construction = False
+
+
+def _unwrap_annotation(annotation: Any) -> Any:
+    """Strips `Annotated` and `Optional` from a type annotation."""
+
+    if get_origin(annotation) is Annotated:
+        return _unwrap_annotation(get_args(annotation)[0])
+
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return _unwrap_annotation(args[0])
+
+    return annotation
+
+
+def _is_json_native(annotation: Any) -> bool:
+    origin = get_origin(annotation)
+    if origin in (list, dict):
+        return all(_is_json_native(_unwrap_annotation(arg)) for arg in get_args(annotation))
+
+    return annotation in _JSON_NATIVE_TYPES
+
+
+def get_collection_version_name(collection_name: str, version: int) -> str:
+    """The name of a version of a collection, whose `<collection_name>` alias points to the live version."""
+
+    return f"{collection_name}_v{version}"
+
+
+def _resolve_collection_alias(collection_name: str) -> str:
+    """The collection an alias points to (e.g., the live version of a re-indexed collection), else the name itself."""
+
+    aliases = {alias.alias_name: alias.collection_name for alias in connection.get_aliases().aliases}
+
+    return aliases.get(collection_name, collection_name)
+
+
+async def _aresolve_collection_alias(collection_name: str) -> str:
+    aliases = {alias.alias_name: alias.collection_name for alias in (await aconnection.get_aliases()).aliases}
+
+    return aliases.get(collection_name, collection_name)
+
+
+def _get_cached_collection_metadata(collection_key: str) -> dict | None:
+    cached_entry = _collections_metadata.get(collection_key)
+    if cached_entry is not None and cached_entry[0] > time.monotonic():
+        return cached_entry[1]
+
+    return _loaded_collections_metadata.get().get(collection_key)
+
+
+def _cache_collection_metadata(collection_key: str, collection_metadata: dict) -> None:
+    expires_at = time.monotonic() + settings.QDRANT_COLLECTION_METADATA_TTL_SECONDS
+    _collections_metadata[collection_key] = (expires_at, collection_metadata)
+
+
+def _collections_metadata_collection_exists() -> bool:
+    # Never deleted once created, so only its existence is cached.
+    if COLLECTIONS_METADATA_COLLECTION in _existing_collections:
+        return True
+
+    exists = connection.collection_exists(collection_name=COLLECTIONS_METADATA_COLLECTION)
+    if exists:
+        with _existing_collections_lock:
+            _existing_collections.add(COLLECTIONS_METADATA_COLLECTION)
+
+    return exists
+
+
+@functools.cache
+def _get_field_plan(document_class: type["VectorBaseDocument"]) -> _FieldPlan:
+    return _FieldPlan(document_class)
+
+
+def _uuid_from_int(value: int) -> UUID:
+    # Skips the parsing and checks of UUID.__init__(), which dominate the cost of reading the IDs back.
+    uuid_ = object.__new__(UUID)
+    object.__setattr__(uuid_, "int", value)
+    object.__setattr__(uuid_, "is_safe", SafeUUID.unknown)
+
+    return uuid_
+
+
+def _parse_uuids(values: list[str | None]) -> list[UUID | None]:
+    """Parses UUID strings in bulk: all the hex digits are decoded at once instead of one UUID at a time."""
+
+    hex_digits = "".join(value for value in values if value is not None).replace("-", "")
+    raw = bytes.fromhex(hex_digits)
+    ints = iter([int.from_bytes(raw[i : i + 16], "big") for i in range(0, len(raw), 16)])
+
+    return [_uuid_from_int(next(ints)) if value is not None else None for value in values]
+
 
 class VectorBaseDocument(BaseModel, Generic[T], ABC):
     id: UUID4 = Field(default_factory=uuid.uuid4)
@@ -31,24 +210,119 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
         return hash(self.id)
 
     @classmethod
-    def from_record(cls: Type[T], point: Record) -> T:
+    def from_records(cls: Type[T], records: list[Record], partial: bool = False, trusted: bool = False) -> list[T]:
+        """
+        Builds the documents of a batch of records, reading the collection metadata once for the whole batch. With
+        `trusted`, the records are assumed to be written by this code base, so the documents are built without
+        validation: only the IDs are parsed (in bulk) and the rest of the payload is used as is.
+        """
+
+        if cls._is_unified_collection_base():
+            # The records of a unified collection are built by the class of their category.
+            records_by_class: dict[type[VectorBaseDocument], list[tuple[int, Record]]] = {}
+            for i, record in enumerate(records):
+                records_by_class.setdefault(cls._get_record_class(record), []).append((i, record))
+
+            documents: list[T | None] = [None] * len(records)
+            for record_class, class_records in records_by_class.items():
+                class_documents = record_class.from_records(
+                    [record for _, record in class_records], partial=partial, trusted=trusted
+                )
+                for (i, _), document in zip(class_records, class_documents, strict=True):
+                    documents[i] = document
+
+            return documents
+
+        collection_values = cls.get_collection_metadata()
+        field_plan = _get_field_plan(cls)
+        if not trusted or not field_plan.supports_trusted_construction:
+            return [
+                cls.from_record(record, partial=partial, collection_metadata=collection_values) for record in records
+            ]
+
+        ids = _parse_uuids([str(record.id) for record in records])
+        uuid_columns = {
+            field_name: _parse_uuids([(record.payload or {}).get(field_name) for record in records])
+            for field_name in field_plan.uuid_fields
+        }
+
+        unified_collection = cls.get_unified_collection()
+        documents = []
+        for i, record in enumerate(records):
+            attributes = {**collection_values, **(record.payload or {}), "id": ids[i]}
+            attributes.pop(UPSERT_ID_PAYLOAD_FIELD, None)
+            if unified_collection:
+                attributes.pop(CATEGORY_PAYLOAD_FIELD, None)
+            for field_name, uuid_column in uuid_columns.items():
+                if field_name in attributes:
+                    attributes[field_name] = uuid_column[i]
+            if field_plan.has_embedding:
+                attributes["embedding"] = record.vector or None
+
+            documents.append(cls.model_construct(**attributes))
+
+        return documents
+
+    @classmethod
+    def from_record(cls: Type[T], point: Record, partial: bool = False, collection_metadata: dict | None = None) -> T:
+        """`collection_metadata` is the one of the record's class, if already read (see `from_records()`)."""
+
+        record_class = cls._get_record_class(point)
+        if record_class is not cls:
+            return record_class.from_record(point, partial=partial)
+
         _id = UUID(point.id, version=4)
         payload = point.payload or {}
 
         attributes = {
             "id": _id,
+            **(collection_metadata if collection_metadata is not None else cls.get_collection_metadata()),
             **payload,
         }
+        attributes.pop(UPSERT_ID_PAYLOAD_FIELD, None)
+        if cls.get_unified_collection():
+            attributes.pop(CATEGORY_PAYLOAD_FIELD, None)
         if cls._has_class_attribute("embedding"):
             attributes["embedding"] = point.vector or None
 
+        if partial:
+            # Only a subset of the payload was fetched, so the document can't be validated.
+            return cls.model_construct(**attributes)
+
         return cls(**attributes)
 
-    def to_point(self: T, **kwargs) -> PointStruct:
+    def to_point(self: T, trusted: bool = False, **kwargs) -> PointStruct:
+        """
+        With `trusted`, the payload is serialized by pydantic-core in a single pass (which also turns the UUIDs into
+        strings) and the point isn't validated again, as it's built from an already validated document.
+        """
+
         exclude_unset = kwargs.pop("exclude_unset", False)
         by_alias = kwargs.pop("by_alias", True)
 
+        if trusted:
+            field_plan = _get_field_plan(self.__class__)
+            payload = self.__pydantic_serializer__.to_python(
+                self,
+                mode="json",
+                exclude_unset=exclude_unset,
+                by_alias=by_alias,
+                exclude=field_plan.point_fields | field_plan.collection_fields,
+                **kwargs,
+            )
+            if self.get_unified_collection():
+                payload[CATEGORY_PAYLOAD_FIELD] = self.get_category().value
+            vector = self.embedding if field_plan.has_embedding else {}
+            if isinstance(vector, np.ndarray):
+                vector = vector.tolist()
+
+            return PointStruct.model_construct(id=str(self.id), vector=vector, payload=payload)
+
         payload = self.model_dump(exclude_unset=exclude_unset, by_alias=by_alias, **kwargs)
+        for field_name in _get_field_plan(self.__class__).collection_fields:
+            payload.pop(field_name, None)
+        if self.get_unified_collection():
+            payload[CATEGORY_PAYLOAD_FIELD] = self.get_category().value
 
         _id = str(payload.pop("id"))
         vector = payload.pop("embedding", {})
@@ -79,34 +353,201 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
     @classmethod
     def bulk_insert(cls: Type[T], documents: list["VectorBaseDocument"]) -> bool:
         try:
+            if not cls.collection_exists():
+                cls.create_collection()
+
             cls._bulk_insert(documents)
-        except exceptions.UnexpectedResponse:
+        except RESPONSE_ERRORS:
             logger.info(
                 f"Collection '{cls.get_collection_name()}' does not exist. Trying to create the collection and reinsert the documents."
             )
 
+            cls._forget_collection()
             cls.create_collection()
 
             try:
                 cls._bulk_insert(documents)
-            except exceptions.UnexpectedResponse:
+            except RESPONSE_ERRORS:
                 logger.error(f"Failed to insert documents in '{cls.get_collection_name()}'.")
 
                 return False
 
+        return cls._on_bulk_inserted()
+
+    @classmethod
+    def _on_bulk_inserted(cls: Type[T]) -> bool:
+        # Bumped once per call (rather than per attempt), after all the documents were written.
+        try:
+            cls.bump_write_generation()
+        except RESPONSE_ERRORS:
+            logger.error(f"Failed to record the write to '{cls.get_collection_name()}'.")
+
+            return False
+
         return True
 
     @classmethod
     def _bulk_insert(cls: Type[T], documents: list["VectorBaseDocument"]) -> None:
+        cls._save_collection_metadata(documents)
         points = [doc.to_point() for doc in documents]
 
         connection.upsert(collection_name=cls.get_collection_name(), points=points)
 
+    @classmethod
+    def bulk_upsert(
+        cls: Type[T],
+        documents: Iterable["VectorBaseDocument"],
+        batch_size: int | None = None,
+        workers: int | None = None,
+        wait: bool = False,
+    ) -> bool:
+        """
+        Loads large amounts of documents: they are sent in large batches by parallel workers and, unless `wait` is
+        set, Qdrant acknowledges every batch before indexing it, so the uploads are pipelined with the indexing.
+        Failed batches are retried with backoff, and the upload is confirmed once all the points are searchable. Until
+        then, the points are stamped with the ID of the upload (in the `upsert_id` payload field) to tell them from the
+        points previously stored with the same IDs.
+
+        `documents` can be any iterable (e.g., a generator), as only a few batches are held in memory at once.
+        """
+
+        try:
+            num_documents = cls._bulk_upsert(documents, batch_size=batch_size, workers=workers, wait=wait)
+        except (*RESPONSE_ERRORS, exceptions.ResponseHandlingException, TimeoutError):
+            logger.exception(f"Failed to upsert documents in '{cls.get_collection_name()}'.")
+
+            return False
+
+        logger.info(f"Upserted {num_documents} documents in '{cls.get_collection_name()}'.")
+
+        return True
+
+    @classmethod
+    def _bulk_upsert(
+        cls: Type[T],
+        documents: Iterable["VectorBaseDocument"],
+        batch_size: int | None = None,
+        workers: int | None = None,
+        wait: bool = False,
+    ) -> int:
+        batch_size = batch_size or settings.QDRANT_UPSERT_BATCH_SIZE
+        workers = workers or settings.QDRANT_UPSERT_WORKERS
+        if settings.QDRANT_LOCAL_PATH:
+            # qdrant-client's local mode isn't thread-safe.
+            workers = 1
+        collection_name = cls.get_collection_name()
+
+        if not cls.collection_exists():
+            cls.create_collection()
+
+        retry_policy = cls._get_retry_policy()
+        # Only the pipelined uploads have to be confirmed, so only their points are stamped.
+        upsert_id = uuid.uuid4().hex if wait is False else None
+
+        def upload(batch: list["VectorBaseDocument"]) -> tuple[int, str]:
+            retry_policy.call(lambda: cls._save_collection_metadata(batch))
+            points = [doc.to_point(trusted=True) for doc in batch]
+            if upsert_id is not None:
+                for point in points:
+                    point.payload[UPSERT_ID_PAYLOAD_FIELD] = upsert_id
+            retry_policy.call(lambda: connection.upsert(collection_name=collection_name, points=points, wait=wait))
+
+            return len(points), points[-1].id
+
+        num_documents = 0
+        last_point_ids = []
+
+        def collect(done: set[Future]) -> None:
+            nonlocal num_documents
+
+            for future in done:
+                num_batch_documents, last_point_id = future.result()
+                num_documents += num_batch_documents
+                last_point_ids.append(last_point_id)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qdrant-upsert") as executor:
+            pending: set[Future] = set()
+            for batch in cls._iter_batches(documents, batch_size):
+                # Bound the batches in flight, so the input is consumed as fast as it's uploaded.
+                if len(pending) >= 2 * workers:
+                    done, pending = wait_for_futures(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+                pending.add(executor.submit(upload, batch))
+
+            collect(wait_for_futures(pending).done)
+
+        if upsert_id is not None and len(last_point_ids) > 0:
+            cls._confirm_upserted(last_point_ids, upsert_id, timeout=settings.QDRANT_UPSERT_CONFIRM_TIMEOUT)
+            # The stamp isn't needed anymore, so it doesn't stay in the payloads. Qdrant applies the updates in order,
+            # so it isn't waited for either.
+            upsert_filter = Filter(
+                must=[FieldCondition(key=UPSERT_ID_PAYLOAD_FIELD, match=MatchValue(value=upsert_id))]
+            )
+            retry_policy.call(
+                lambda: connection.delete_payload(
+                    collection_name=collection_name, keys=[UPSERT_ID_PAYLOAD_FIELD], points=upsert_filter, wait=False
+                )
+            )
+        if num_documents > 0:
+            retry_policy.call(cls.bump_write_generation)
+
+        return num_documents
+
+    @classmethod
+    def _confirm_upserted(cls: Type[T], point_ids: list[str], upsert_id: str, timeout: float) -> None:
+        """
+        Waits until the last point of every batch is stamped with `upsert_id`. Checking that the points exist isn't
+        enough, as they may already be stored (e.g., when re-ingesting the same documents). Every batch is applied by
+        Qdrant as a single update operation, so then all the upserted points are.
+        """
+
+        collection_name = cls.get_collection_name()
+        missing_point_ids = point_ids
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            records = connection.retrieve(
+                collection_name=collection_name,
+                ids=missing_point_ids,
+                with_payload=[UPSERT_ID_PAYLOAD_FIELD],
+                with_vectors=False,
+            )
+            found_point_ids = {
+                str(record.id) for record in records if (record.payload or {}).get(UPSERT_ID_PAYLOAD_FIELD) == upsert_id
+            }
+            missing_point_ids = [point_id for point_id in missing_point_ids if point_id not in found_point_ids]
+            if len(missing_point_ids) == 0:
+                return
+
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"{len(missing_point_ids)} batches upserted in '{collection_name}' weren't applied after {timeout}s."
+                )
+
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    @staticmethod
+    def _iter_batches(documents: Iterable[T], batch_size: int) -> Iterator[list[T]]:
+        iterator = iter(documents)
+        while batch := list(itertools.islice(iterator, batch_size)):
+            yield batch
+
+    @staticmethod
+    def _get_retry_policy() -> RetryPolicy:
+        return RetryPolicy(
+            max_retries=settings.QDRANT_MAX_RETRIES,
+            base_delay=settings.QDRANT_RETRY_BASE_DELAY,
+            max_delay=settings.QDRANT_RETRY_MAX_DELAY,
+            is_retryable=is_retryable_qdrant_error,
+        )
+
     @classmethod
     def bulk_find(cls: Type[T], limit: int = 10, **kwargs) -> tuple[list[T], UUID | None]:
         try:
             documents, next_offset = cls._bulk_find(limit=limit, **kwargs)
-        except exceptions.UnexpectedResponse:
+        except RESPONSE_ERRORS:
             logger.error(f"Failed to search documents in '{cls.get_collection_name()}'.")
 
             documents, next_offset = [], None
@@ -122,23 +563,182 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
 
         records, next_offset = connection.scroll(
             collection_name=collection_name,
+            scroll_filter=cls._scope_filter(kwargs.pop("scroll_filter", None)),
             limit=limit,
             with_payload=kwargs.pop("with_payload", True),
             with_vectors=kwargs.pop("with_vectors", False),
             offset=offset,
             **kwargs,
         )
-        documents = [cls.from_record(record) for record in records]
+
+        return cls._from_scroll_result(records, next_offset)
+
+    @classmethod
+    def _from_scroll_result(cls: Type[T], records: list[Record], next_offset: Any) -> tuple[list[T], UUID | None]:
+        documents = cls.from_records(records)
         if next_offset is not None:
             next_offset = UUID(next_offset, version=4)
 
         return documents, next_offset
 
+    @classmethod
+    def iter_all(
+        cls: Type[T],
+        page_size: int | None = None,
+        payload_fields: list[str] | None = None,
+        with_vectors: bool = False,
+        workers: int = 1,
+        scroll_filter: Filter | None = None,
+        trusted: bool = True,
+    ) -> Iterator[T]:
+        """
+        Lazily yields all the documents of the collection, read in large pages.
+
+        Args:
+            page_size: Points read per request. Defaults to `QDRANT_SCROLL_PAGE_SIZE`.
+            payload_fields: Only read these payload fields. The documents are then built without validation and only
+                the selected fields (and the defaults) are set.
+            with_vectors: Whether to read the embeddings too.
+            workers: If greater than 1, the ID space is split into as many ranges, scanned in parallel. The documents
+                are then not yielded in ID order.
+            scroll_filter: Optional filter on the payload.
+            trusted: Whether to build the documents without validating them (see `from_records()`).
+
+        Raises:
+            The Qdrant errors (e.g., if the collection doesn't exist), so a failed read isn't mistaken for the end of
+            the collection.
+        """
+
+        try:
+            yield from cls._iter_all(
+                page_size=page_size,
+                payload_fields=payload_fields,
+                with_vectors=with_vectors,
+                workers=workers,
+                scroll_filter=scroll_filter,
+                trusted=trusted,
+            )
+        except RESPONSE_ERRORS:
+            logger.error(f"Failed to iterate over the documents of '{cls.get_collection_name()}'.")
+
+            raise
+
+    @classmethod
+    def _iter_all(
+        cls: Type[T],
+        page_size: int | None = None,
+        payload_fields: list[str] | None = None,
+        with_vectors: bool = False,
+        workers: int = 1,
+        scroll_filter: Filter | None = None,
+        trusted: bool = True,
+    ) -> Iterator[T]:
+        scroll_pages = functools.partial(
+            cls._scroll_pages,
+            page_size=page_size or settings.QDRANT_SCROLL_PAGE_SIZE,
+            payload_fields=payload_fields,
+            with_vectors=with_vectors,
+            scroll_filter=scroll_filter,
+            trusted=trusted,
+        )
+
+        if workers <= 1:
+            for page in scroll_pages():
+                yield from page
+
+            return
+
+        # UUIDs are ordered as 128-bit integers, so the ID space is split into ranges of equal size.
+        bounds = [UUID(int=(i * 2**128) // workers) for i in range(workers)] + [None]
+        pages: queue.Queue = queue.Queue(maxsize=2 * workers)
+        stop = threading.Event()
+        done = object()
+
+        def put(item: Any) -> None:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+
+                    return
+                except queue.Full:
+                    continue
+
+        def scan(start_id: UUID, end_id: UUID | None) -> None:
+            try:
+                for page in scroll_pages(start_id=start_id, end_id=end_id):
+                    if stop.is_set():
+                        return
+
+                    put(page)
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="qdrant-scroll") as executor:
+            for start_id, end_id in itertools.pairwise(bounds):
+                executor.submit(scan, start_id, end_id)
+
+            try:
+                num_running_scans = workers
+                while num_running_scans > 0:
+                    item = pages.get()
+                    if item is done:
+                        num_running_scans -= 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield from item
+            finally:
+                # Also stops the scans when the caller doesn't consume the whole generator.
+                stop.set()
+
+    @classmethod
+    def _scroll_pages(
+        cls: Type[T],
+        page_size: int,
+        payload_fields: list[str] | None = None,
+        with_vectors: bool = False,
+        scroll_filter: Filter | None = None,
+        trusted: bool = True,
+        start_id: UUID | None = None,
+        end_id: UUID | None = None,
+    ) -> Iterator[list[T]]:
+        collection_name = cls.get_collection_name()
+        retry_policy = cls._get_retry_policy()
+        with_payload = payload_fields if payload_fields is not None else True
+        partial = payload_fields is not None
+        scroll_filter = cls._scope_filter(scroll_filter)
+
+        offset = str(start_id) if start_id else None
+        while True:
+            records, next_offset = retry_policy.call(
+                lambda offset=offset: connection.scroll(
+                    collection_name=collection_name,
+                    scroll_filter=scroll_filter,
+                    limit=page_size,
+                    offset=offset,
+                    with_payload=with_payload,
+                    with_vectors=with_vectors,
+                )
+            )
+            if end_id is not None:
+                records = [record for record in records if UUID(str(record.id)) < end_id]
+                if next_offset is not None and UUID(str(next_offset)) >= end_id:
+                    next_offset = None
+
+            yield cls.from_records(records, partial=partial, trusted=trusted)
+
+            if next_offset is None:
+                return
+
+            offset = next_offset
+
     @classmethod
     def search(cls: Type[T], query_vector: list, limit: int = 10, **kwargs) -> list[T]:
         try:
             documents = cls._search(query_vector=query_vector, limit=limit, **kwargs)
-        except exceptions.UnexpectedResponse:
+        except RESPONSE_ERRORS:
             logger.error(f"Failed to search documents in '{cls.get_collection_name()}'.")
 
             documents = []
@@ -151,27 +751,126 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
         records = connection.search(
             collection_name=collection_name,
             query_vector=query_vector,
+            query_filter=cls._scope_filter(kwargs.pop("query_filter", None)),
             limit=limit,
             with_payload=kwargs.pop("with_payload", True),
             with_vectors=kwargs.pop("with_vectors", False),
+            search_params=kwargs.pop("search_params", cls.get_search_params()),
             **kwargs,
         )
-        documents = [cls.from_record(record) for record in records]
+        documents = cls.from_records(records)
 
         return documents
 
+    @classmethod
+    def search_batch(
+        cls: Type[T],
+        query_vectors: list[list],
+        limit: int = 10,
+        query_filters: list[Filter | None] | None = None,
+        **kwargs,
+    ) -> list[list[T]]:
+        try:
+            documents = cls._search_batch(
+                query_vectors=query_vectors, limit=limit, query_filters=query_filters, **kwargs
+            )
+        except RESPONSE_ERRORS:
+            logger.error(f"Failed to search documents in '{cls.get_collection_name()}'.")
+
+            documents = [[] for _ in query_vectors]
+
+        return documents
+
+    @classmethod
+    def _search_batch(
+        cls: Type[T],
+        query_vectors: list[list],
+        limit: int = 10,
+        query_filters: list[Filter | None] | None = None,
+        **kwargs,
+    ) -> list[list[T]]:
+        if len(query_vectors) == 0:
+            return []
+
+        requests = cls._build_search_requests(query_vectors, limit=limit, query_filters=query_filters, **kwargs)
+        batch_records = connection.search_batch(collection_name=cls.get_collection_name(), requests=requests)
+
+        return cls._from_batch_records(batch_records)
+
+    @classmethod
+    def _from_batch_records(cls: Type[T], batch_records: list[list[Record]]) -> list[list[T]]:
+        """Builds the documents of all the queries of a batch at once, then splits them back by query."""
+
+        documents = iter(cls.from_records([record for records in batch_records for record in records]))
+
+        return [list(itertools.islice(documents, len(records))) for records in batch_records]
+
+    @classmethod
+    def _build_search_requests(
+        cls,
+        query_vectors: list[list],
+        limit: int = 10,
+        query_filters: list[Filter | None] | None = None,
+        **kwargs,
+    ) -> list[SearchRequest]:
+        if query_filters is None:
+            query_filters = [None] * len(query_vectors)
+        assert len(query_filters) == len(query_vectors), "Each query vector should have its own (optional) filter."
+
+        with_payload = kwargs.pop("with_payload", True)
+        with_vectors = kwargs.pop("with_vectors", False)
+        search_params = kwargs.pop("params", cls.get_search_params())
+
+        return [
+            SearchRequest(
+                vector=query_vector,
+                filter=cls._scope_filter(query_filter),
+                limit=limit,
+                with_payload=with_payload,
+                with_vector=with_vectors,
+                params=search_params,
+                **kwargs,
+            )
+            for query_vector, query_filter in zip(query_vectors, query_filters, strict=True)
+        ]
+
+    @classmethod
+    def count(cls: Type[T], exact: bool = True) -> int:
+        try:
+            return connection.count(
+                collection_name=cls.get_collection_name(), count_filter=cls._scope_filter(None), exact=exact
+            ).count
+        except RESPONSE_ERRORS:
+            logger.error(f"Failed to count documents in '{cls.get_collection_name()}'.")
+
+            return 0
+
+    @classmethod
+    def collection_exists(cls: Type[T]) -> bool:
+        collection_name = cls.get_collection_name()
+        if collection_name in _existing_collections:
+            return True
+
+        exists = connection.collection_exists(collection_name=collection_name)
+        if exists:
+            with _existing_collections_lock:
+                _existing_collections.add(collection_name)
+
+        return exists
+
+    @classmethod
+    def _forget_collection(cls: Type[T]) -> None:
+        with _existing_collections_lock:
+            _existing_collections.discard(cls.get_collection_name())
+
     @classmethod
     def get_or_create_collection(cls: Type[T]) -> CollectionInfo:
         collection_name = cls.get_collection_name()
 
         try:
             return connection.get_collection(collection_name=collection_name)
-        except exceptions.UnexpectedResponse:
-            use_vector_index = cls.get_use_vector_index()
-
-            collection_created = cls._create_collection(
-                collection_name=collection_name, use_vector_index=use_vector_index
-            )
+        except RESPONSE_ERRORS:
+            collection_created = cls.create_collection()
             if collection_created is False:
                 raise RuntimeError(f"Couldn't create collection {collection_name}") from None
 
@@ -179,19 +878,485 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
 
     @classmethod
     def create_collection(cls: Type[T]) -> bool:
+        """
+        Creates the first version of the collection, `<name>_v1`, behind the `<name>` alias that the documents are
+        read and written through. A re-indexing can then switch the alias to a new version without any downtime (see
+        `CollectionReindexer`).
+        """
+
         collection_name = cls.get_collection_name()
+        version_name = get_collection_version_name(collection_name, 1)
         use_vector_index = cls.get_use_vector_index()
 
-        return cls._create_collection(collection_name=collection_name, use_vector_index=use_vector_index)
+        collection_created = cls._create_collection(collection_name=version_name, use_vector_index=use_vector_index)
+        if collection_created:
+            connection.update_collection_aliases(change_aliases_operations=[cls._create_alias_operation(version_name)])
+
+            with _existing_collections_lock:
+                _existing_collections.add(collection_name)
+
+        return collection_created
 
     @classmethod
     def _create_collection(cls, collection_name: str, use_vector_index: bool = True) -> bool:
-        if use_vector_index is True:
-            vectors_config = VectorParams(size=EmbeddingModelSingleton().embedding_size, distance=Distance.COSINE)
-        else:
-            vectors_config = {}
+        collection_created = connection.create_collection(
+            collection_name=collection_name, **cls._get_collection_config(use_vector_index=use_vector_index)
+        )
+        if collection_created:
+            cls._create_payload_indexes(collection_name, cls.get_payload_indexes())
+
+            with _existing_collections_lock:
+                _existing_collections.add(collection_name)
 
-        return connection.create_collection(collection_name=collection_name, vectors_config=vectors_config)
+        return collection_created
+
+    @classmethod
+    def _create_alias_operation(cls: Type[T], collection_name: str) -> CreateAliasOperation:
+        return CreateAliasOperation(
+            create_alias=CreateAlias(collection_name=collection_name, alias_name=cls.get_collection_name())
+        )
+
+    @classmethod
+    def create_payload_indexes(cls: Type[T]) -> list[str]:
+        """
+        Creates the payload indexes declared in the Config that are missing from an existing collection.
+
+        Returns:
+            The fields that were indexed.
+        """
+
+        collection_name = cls.get_collection_name()
+        payload_schema = connection.get_collection(collection_name=collection_name).payload_schema
+        missing_payload_indexes = {
+            field_name: field_schema
+            for field_name, field_schema in cls.get_payload_indexes().items()
+            if field_name not in payload_schema
+        }
+        cls._create_payload_indexes(collection_name, missing_payload_indexes)
+
+        return list(missing_payload_indexes)
+
+    @classmethod
+    def _create_payload_indexes(cls, collection_name: str, payload_indexes: dict[str, PayloadSchemaType]) -> None:
+        for field_name, field_schema in payload_indexes.items():
+            connection.create_payload_index(
+                collection_name=collection_name, field_name=field_name, field_schema=field_schema, wait=True
+            )
+
+    @classmethod
+    def _get_collection_config(cls, use_vector_index: bool = True) -> dict[str, Any]:
+        """The parameters of the collection, shared by the sync and async ODMs."""
+
+        if use_vector_index is False:
+            return {"vectors_config": {}, "on_disk_payload": cls._get_config_attribute("on_disk_payload")}
+
+        vectors_config = VectorParams(
+            size=EmbeddingModelSingleton().embedding_size,
+            distance=Distance.COSINE,
+            on_disk=cls._get_config_attribute("on_disk"),
+            datatype=cls._get_config_attribute("vector_datatype"),
+        )
+
+        return {
+            "vectors_config": vectors_config,
+            "hnsw_config": cls._get_config_attribute("hnsw_config"),
+            "quantization_config": cls._get_config_attribute("quantization_config"),
+            "on_disk_payload": cls._get_config_attribute("on_disk_payload"),
+        }
+
+    @classmethod
+    async def abulk_insert(cls: Type[T], documents: list["VectorBaseDocument"]) -> bool:
+        try:
+            if not await cls.acollection_exists():
+                await cls.acreate_collection()
+
+            await cls._abulk_insert(documents)
+        except RESPONSE_ERRORS:
+            logger.info(
+                f"Collection '{cls.get_collection_name()}' does not exist. Trying to create the collection and reinsert the documents."
+            )
+
+            cls._forget_collection()
+            await cls.acreate_collection()
+
+            try:
+                await cls._abulk_insert(documents)
+            except RESPONSE_ERRORS:
+                logger.error(f"Failed to insert documents in '{cls.get_collection_name()}'.")
+
+                return False
+
+        return await cls._aon_bulk_inserted()
+
+    @classmethod
+    async def _aon_bulk_inserted(cls: Type[T]) -> bool:
+        try:
+            await cls.abump_write_generation()
+        except RESPONSE_ERRORS:
+            logger.error(f"Failed to record the write to '{cls.get_collection_name()}'.")
+
+            return False
+
+        return True
+
+    @classmethod
+    async def _abulk_insert(cls: Type[T], documents: list["VectorBaseDocument"]) -> None:
+        await cls._asave_collection_metadata(documents)
+        points = [doc.to_point() for doc in documents]
+
+        await aconnection.upsert(collection_name=cls.get_collection_name(), points=points)
+
+    @classmethod
+    async def abulk_find(cls: Type[T], limit: int = 10, **kwargs) -> tuple[list[T], UUID | None]:
+        try:
+            documents, next_offset = await cls._abulk_find(limit=limit, **kwargs)
+        except RESPONSE_ERRORS:
+            logger.error(f"Failed to search documents in '{cls.get_collection_name()}'.")
+
+            documents, next_offset = [], None
+
+        return documents, next_offset
+
+    @classmethod
+    async def _abulk_find(cls: Type[T], limit: int = 10, **kwargs) -> tuple[list[T], UUID | None]:
+        offset = kwargs.pop("offset", None)
+        offset = str(offset) if offset else None
+
+        await cls.aload_collection_metadata()
+        records, next_offset = await aconnection.scroll(
+            collection_name=cls.get_collection_name(),
+            scroll_filter=cls._scope_filter(kwargs.pop("scroll_filter", None)),
+            limit=limit,
+            with_payload=kwargs.pop("with_payload", True),
+            with_vectors=kwargs.pop("with_vectors", False),
+            offset=offset,
+            **kwargs,
+        )
+
+        return cls._from_scroll_result(records, next_offset)
+
+    @classmethod
+    async def asearch(cls: Type[T], query_vector: list, limit: int = 10, **kwargs) -> list[T]:
+        try:
+            await cls.aload_collection_metadata()
+            records = await aconnection.search(
+                collection_name=cls.get_collection_name(),
+                query_vector=query_vector,
+                query_filter=cls._scope_filter(kwargs.pop("query_filter", None)),
+                limit=limit,
+                with_payload=kwargs.pop("with_payload", True),
+                with_vectors=kwargs.pop("with_vectors", False),
+                search_params=kwargs.pop("search_params", cls.get_search_params()),
+                **kwargs,
+            )
+        except RESPONSE_ERRORS:
+            logger.error(f"Failed to search documents in '{cls.get_collection_name()}'.")
+
+            return []
+
+        return cls.from_records(records)
+
+    @classmethod
+    async def asearch_batch(
+        cls: Type[T],
+        query_vectors: list[list],
+        limit: int = 10,
+        query_filters: list[Filter | None] | None = None,
+        **kwargs,
+    ) -> list[list[T]]:
+        if len(query_vectors) == 0:
+            return []
+
+        requests = cls._build_search_requests(query_vectors, limit=limit, query_filters=query_filters, **kwargs)
+        try:
+            await cls.aload_collection_metadata()
+            batch_records = await aconnection.search_batch(collection_name=cls.get_collection_name(), requests=requests)
+        except RESPONSE_ERRORS:
+            logger.error(f"Failed to search documents in '{cls.get_collection_name()}'.")
+
+            return [[] for _ in query_vectors]
+
+        return cls._from_batch_records(batch_records)
+
+    @classmethod
+    async def acollection_exists(cls: Type[T]) -> bool:
+        collection_name = cls.get_collection_name()
+        if collection_name in _existing_collections:
+            return True
+
+        exists = await aconnection.collection_exists(collection_name=collection_name)
+        if exists:
+            with _existing_collections_lock:
+                _existing_collections.add(collection_name)
+
+        return exists
+
+    @classmethod
+    async def aget_or_create_collection(cls: Type[T]) -> CollectionInfo:
+        collection_name = cls.get_collection_name()
+
+        try:
+            return await aconnection.get_collection(collection_name=collection_name)
+        except RESPONSE_ERRORS:
+            collection_created = await cls.acreate_collection()
+            if collection_created is False:
+                raise RuntimeError(f"Couldn't create collection {collection_name}") from None
+
+            return await aconnection.get_collection(collection_name=collection_name)
+
+    @classmethod
+    async def acreate_collection(cls: Type[T]) -> bool:
+        collection_name = cls.get_collection_name()
+        version_name = get_collection_version_name(collection_name, 1)
+        use_vector_index = cls.get_use_vector_index()
+
+        collection_created = await aconnection.create_collection(
+            collection_name=version_name, **cls._get_collection_config(use_vector_index=use_vector_index)
+        )
+        if collection_created:
+            for field_name, field_schema in cls.get_payload_indexes().items():
+                await aconnection.create_payload_index(
+                    collection_name=version_name, field_name=field_name, field_schema=field_schema, wait=True
+                )
+            await aconnection.update_collection_aliases(
+                change_aliases_operations=[cls._create_alias_operation(version_name)]
+            )
+
+            with _existing_collections_lock:
+                _existing_collections.add(collection_name)
+
+        return collection_created
+
+    @classmethod
+    def get_collection_metadata(cls: Type[T]) -> dict:
+        """The values of the collection fields shared by all the documents of the collection, {} if not recorded."""
+
+        if not _get_field_plan(cls).collection_fields:
+            return {}
+
+        collection_key = cls._get_collection_metadata_key()
+        collection_metadata = _get_cached_collection_metadata(collection_key)
+        if collection_metadata is None:
+            collection_metadata = {}
+            if connection.collection_exists(collection_name=COLLECTIONS_METADATA_COLLECTION):
+                collection_name = _resolve_collection_alias(cls.get_collection_name())
+                records = connection.retrieve(
+                    collection_name=COLLECTIONS_METADATA_COLLECTION,
+                    ids=[cls._get_collection_metadata_id(collection_name)],
+                )
+                collection_metadata = records[0].payload["values"] if records else {}
+
+            _cache_collection_metadata(collection_key, collection_metadata)
+
+        return collection_metadata
+
+    @classmethod
+    async def aload_collection_metadata(cls: Type[T]) -> None:
+        """Caches the collection metadata, so the documents can be built without blocking the event loop."""
+
+        if cls._is_unified_collection_base():
+            for category_class in cls._get_category_classes():
+                await category_class.aload_collection_metadata()
+
+            return
+
+        collection_key = cls._get_collection_metadata_key()
+        if not _get_field_plan(cls).collection_fields or _get_cached_collection_metadata(collection_key) is not None:
+            return
+
+        collection_metadata = {}
+        if await aconnection.collection_exists(collection_name=COLLECTIONS_METADATA_COLLECTION):
+            collection_name = await _aresolve_collection_alias(cls.get_collection_name())
+            records = await aconnection.retrieve(
+                collection_name=COLLECTIONS_METADATA_COLLECTION, ids=[cls._get_collection_metadata_id(collection_name)]
+            )
+            collection_metadata = records[0].payload["values"] if records else {}
+
+        _cache_collection_metadata(collection_key, collection_metadata)
+        _loaded_collections_metadata.set({**_loaded_collections_metadata.get(), collection_key: collection_metadata})
+
+    @classmethod
+    def _save_collection_metadata(cls: Type[T], documents: list["VectorBaseDocument"]) -> None:
+        # The bulk upserts save it from their upload threads.
+        with _collections_metadata_lock:
+            collection_metadata = cls._get_new_collection_metadata(documents, cls.get_collection_metadata())
+            if collection_metadata is None:
+                return
+
+            if not connection.collection_exists(collection_name=COLLECTIONS_METADATA_COLLECTION):
+                connection.create_collection(collection_name=COLLECTIONS_METADATA_COLLECTION, vectors_config={})
+            collection_name = _resolve_collection_alias(cls.get_collection_name())
+            connection.upsert(
+                collection_name=COLLECTIONS_METADATA_COLLECTION,
+                points=[cls._to_collection_metadata_point(collection_metadata, collection_name)],
+            )
+            _cache_collection_metadata(cls._get_collection_metadata_key(), collection_metadata)
+
+    @classmethod
+    async def _asave_collection_metadata(cls: Type[T], documents: list["VectorBaseDocument"]) -> None:
+        await cls.aload_collection_metadata()
+        collection_metadata = cls._get_new_collection_metadata(documents, cls.get_collection_metadata())
+        if collection_metadata is None:
+            return
+
+        if not await aconnection.collection_exists(collection_name=COLLECTIONS_METADATA_COLLECTION):
+            await aconnection.create_collection(collection_name=COLLECTIONS_METADATA_COLLECTION, vectors_config={})
+        collection_name = await _aresolve_collection_alias(cls.get_collection_name())
+        await aconnection.upsert(
+            collection_name=COLLECTIONS_METADATA_COLLECTION,
+            points=[cls._to_collection_metadata_point(collection_metadata, collection_name)],
+        )
+        collection_key = cls._get_collection_metadata_key()
+        _cache_collection_metadata(collection_key, collection_metadata)
+        _loaded_collections_metadata.set({**_loaded_collections_metadata.get(), collection_key: collection_metadata})
+
+    @classmethod
+    def _get_new_collection_metadata(
+        cls: Type[T], documents: list["VectorBaseDocument"], recorded_metadata: dict
+    ) -> dict | None:
+        """
+        The collection metadata to record for the written documents, None if it's already recorded.
+
+        Raises:
+            ImproperlyConfigured: If the documents don't share the same collection fields, or differ from the ones
+                already in the collection (e.g., they were embedded by another model).
+        """
+
+        collection_fields = _get_field_plan(cls).collection_fields
+        if not collection_fields or len(documents) == 0:
+            return None
+
+        collection_metadata = documents[0].model_dump(mode="json", include=collection_fields)
+        for document in documents[1:]:
+            if document.model_dump(mode="json", include=collection_fields) != collection_metadata:
+                raise ImproperlyConfigured(
+                    f"All the documents of '{cls.get_collection_name()}' should share the same {sorted(collection_fields)}."
+                )
+
+        if collection_metadata == recorded_metadata:
+            return None
+
+        if recorded_metadata:
+            raise ImproperlyConfigured(
+                f"Documents with {collection_metadata} can't be written to '{cls.get_collection_name()}', "
+                f"which holds documents with {recorded_metadata}."
+            )
+
+        return collection_metadata
+
+    @classmethod
+    def forget_collection_metadata(cls: Type[T]) -> None:
+        """Drops the cached collection metadata, e.g., after the collection's alias was switched to a new version."""
+
+        collection_keys = {
+            document_class._get_collection_metadata_key() for document_class in [cls, *cls._get_category_classes()]
+        }
+        for collection_key in collection_keys:
+            _collections_metadata.pop(collection_key, None)
+        loaded_collections_metadata = _loaded_collections_metadata.get()
+        if collection_keys & loaded_collections_metadata.keys():
+            _loaded_collections_metadata.set(
+                {key: value for key, value in loaded_collections_metadata.items() if key not in collection_keys}
+            )
+
+    @classmethod
+    def _get_collection_metadata_key(cls: Type[T], collection_name: str | None = None) -> str:
+        collection_name = collection_name or cls.get_collection_name()
+        # The categories sharing a unified collection have their own metadata (e.g., their chunking params).
+        if cls.get_unified_collection() and cls._get_config_attribute("category"):
+            return f"{collection_name}/{cls.get_category()}"
+
+        return collection_name
+
+    @classmethod
+    def _get_collection_metadata_id(cls: Type[T], collection_name: str | None = None) -> str:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, cls._get_collection_metadata_key(collection_name)))
+
+    @classmethod
+    def _to_collection_metadata_point(
+        cls: Type[T], collection_metadata: dict, collection_name: str | None = None
+    ) -> PointStruct:
+        """
+        The record of the collection metadata. It's keyed by the actual collection, not by its alias, so each version
+        of a re-indexed collection has its own.
+        """
+
+        return PointStruct(
+            id=cls._get_collection_metadata_id(collection_name),
+            vector={},
+            payload={
+                "collection_name": cls._get_collection_metadata_key(collection_name),
+                "values": collection_metadata,
+            },
+        )
+
+    @classmethod
+    def get_resolved_collection_name(cls: Type[T]) -> str:
+        """The collection actually read and written, i.e., the live version of the collection if it's an alias."""
+
+        return _resolve_collection_alias(cls.get_collection_name())
+
+    @classmethod
+    def get_write_generation(cls: Type[T]) -> str | None:
+        """
+        The ID of the last write to the collection, None if never recorded. It changes with every bulk write and alias
+        switch, even when the number of points doesn't, so the caches built on the collection's content can tell
+        whether they are stale.
+        """
+
+        return VectorBaseDocument.get_write_generations([cls])[0]
+
+    @staticmethod
+    def get_write_generations(document_classes: Sequence[type["VectorBaseDocument"]]) -> list[str | None]:
+        """The write generations of several collections (see `get_write_generation()`), read in a single request."""
+
+        if not _collections_metadata_collection_exists():
+            return [None] * len(document_classes)
+
+        write_generation_ids = [document_class._get_write_generation_id() for document_class in document_classes]
+        records = connection.retrieve(collection_name=COLLECTIONS_METADATA_COLLECTION, ids=write_generation_ids)
+        write_generations = {str(record.id): record.payload["write_generation"] for record in records}
+
+        return [write_generations.get(write_generation_id) for write_generation_id in write_generation_ids]
+
+    @classmethod
+    def bump_write_generation(cls: Type[T]) -> str:
+        """Records a new write generation of the collection (see `get_write_generation()`) and returns it."""
+
+        write_generation = uuid.uuid4().hex
+        if not connection.collection_exists(collection_name=COLLECTIONS_METADATA_COLLECTION):
+            connection.create_collection(collection_name=COLLECTIONS_METADATA_COLLECTION, vectors_config={})
+        connection.upsert(
+            collection_name=COLLECTIONS_METADATA_COLLECTION,
+            points=[cls._to_write_generation_point(write_generation)],
+        )
+
+        return write_generation
+
+    @classmethod
+    async def abump_write_generation(cls: Type[T]) -> str:
+        write_generation = uuid.uuid4().hex
+        if not await aconnection.collection_exists(collection_name=COLLECTIONS_METADATA_COLLECTION):
+            await aconnection.create_collection(collection_name=COLLECTIONS_METADATA_COLLECTION, vectors_config={})
+        await aconnection.upsert(
+            collection_name=COLLECTIONS_METADATA_COLLECTION,
+            points=[cls._to_write_generation_point(write_generation)],
+        )
+
+        return write_generation
+
+    @classmethod
+    def _get_write_generation_id(cls: Type[T]) -> str:
+        # Keyed by the collection's name (or alias), as an alias switch is a write too.
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{cls.get_collection_name()}/write_generation"))
+
+    @classmethod
+    def _to_write_generation_point(cls: Type[T], write_generation: str) -> PointStruct:
+        return PointStruct(
+            id=cls._get_write_generation_id(),
+            vector={},
+            payload={"collection_name": cls.get_collection_name(), "write_generation": write_generation},
+        )
 
     @classmethod
     def get_category(cls: Type[T]) -> DataCategory:
@@ -205,6 +1370,10 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
 
     @classmethod
     def get_collection_name(cls: Type[T]) -> str:
+        unified_collection = cls.get_unified_collection()
+        if unified_collection:
+            return unified_collection
+
         if not hasattr(cls, "Config") or not hasattr(cls.Config, "name"):
             raise ImproperlyConfigured(
                 "The class should define a Config class with" "the 'name' property that reflects the collection's name."
@@ -212,6 +1381,54 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
 
         return cls.Config.name
 
+    @classmethod
+    def get_unified_collection(cls: Type[T]) -> str | None:
+        """
+        With `QDRANT_UNIFIED_COLLECTIONS`, the classes declaring the same `Config.unified_collection` share that
+        collection, their documents being told apart by the `category` payload field. None otherwise.
+        """
+
+        if not settings.QDRANT_UNIFIED_COLLECTIONS:
+            return None
+
+        return cls._get_config_attribute("unified_collection")
+
+    @classmethod
+    def _is_unified_collection_base(cls: Type[T]) -> bool:
+        """Whether the class reads the documents of all the categories of a unified collection."""
+
+        return bool(cls.get_unified_collection()) and cls._get_config_attribute("category") is None
+
+    @classmethod
+    def _scope_filter(cls: Type[T], query_filter: Filter | None) -> Filter | None:
+        """Restricts the filter to the category of the class when it shares a unified collection."""
+
+        if not cls.get_unified_collection() or cls._get_config_attribute("category") is None:
+            return query_filter
+
+        category_filter = FieldCondition(key=CATEGORY_PAYLOAD_FIELD, match=MatchValue(value=cls.get_category().value))
+        if query_filter is None:
+            return Filter(must=[category_filter])
+
+        return Filter(must=[category_filter, query_filter])
+
+    @classmethod
+    def _get_record_class(cls: Type[T], record: Record) -> type["VectorBaseDocument"]:
+        if not cls._is_unified_collection_base():
+            return cls
+
+        return cls.category_to_class(DataCategory((record.payload or {})[CATEGORY_PAYLOAD_FIELD]))
+
+    @classmethod
+    def _get_category_classes(cls: Type[T]) -> list[type["VectorBaseDocument"]]:
+        category_classes = []
+        for subclass in cls.__subclasses__():
+            if subclass._get_config_attribute("category") is not None:
+                category_classes.append(subclass)
+            category_classes.extend(subclass._get_category_classes())
+
+        return category_classes
+
     @classmethod
     def get_use_vector_index(cls: Type[T]) -> bool:
         if not hasattr(cls, "Config") or not hasattr(cls.Config, "use_vector_index"):
@@ -219,6 +1436,24 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
 
         return cls.Config.use_vector_index
 
+    @classmethod
+    def get_payload_indexes(cls: Type[T]) -> dict[str, PayloadSchemaType]:
+        payload_indexes = dict(cls._get_config_attribute("payload_indexes") or {})
+        if cls.get_unified_collection():
+            payload_indexes[CATEGORY_PAYLOAD_FIELD] = PayloadSchemaType.KEYWORD
+
+        return payload_indexes
+
+    @classmethod
+    def get_search_params(cls: Type[T]) -> SearchParams | None:
+        return cls._get_config_attribute("search_params")
+
+    @classmethod
+    def _get_config_attribute(cls: Type[T], name: str) -> Any:
+        """The optional Config attributes tuning the collection, None meaning Qdrant's default."""
+
+        return getattr(getattr(cls, "Config", None), name, None)
+
     @classmethod
     def group_by_class(
         cls: Type["VectorBaseDocument"], documents: list["VectorBaseDocument"]
@@ -257,6 +1492,14 @@ class VectorBaseDocument(BaseModel, Generic[T], ABC):
 
         raise ValueError(f"No subclass found for collection name: {collection_name}")
 
+    @classmethod
+    def category_to_class(cls: Type["VectorBaseDocument"], category: DataCategory) -> type["VectorBaseDocument"]:
+        for category_class in cls._get_category_classes():
+            if category_class.get_category() == category:
+                return category_class
+
+        raise ValueError(f"No subclass found for category: {category}")
+
     @classmethod
     def _has_class_attribute(cls: Type[T], attribute_name: str) -> bool:
         if attribute_name in cls.__annotations__:
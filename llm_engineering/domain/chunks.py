@@ -13,6 +13,7 @@ class Chunk(VectorBaseDocument, ABC):
     document_id: UUID4
     author_id: UUID4
     author_full_name: str
+    num_tokens: int | None = None
     metadata: dict = Field(default_factory=dict)
 
 
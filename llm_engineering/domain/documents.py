@@ -2,10 +2,20 @@ from abc import ABC
 from typing import Optional
 
 from pydantic import UUID4, Field
+from pymongo import ASCENDING, IndexModel
 
 from .base import NoSQLBaseDocument
 from .types import DataCategory
 
+# `get_or_create()` looks the users up by name, and the same user must not be created twice.
+USER_INDEXES = (IndexModel([("first_name", ASCENDING), ("last_name", ASCENDING)], name="full_name", unique=True),)
+# The feature engineering pipeline queries the documents by author.
+AUTHOR_ID_INDEX = IndexModel([("author_id", ASCENDING)], name="author_id")
+# The crawlers look the links up before crawling them, so a link is stored only once.
+UNIQUE_LINK_INDEX = IndexModel([("link", ASCENDING)], name="link", unique=True)
+# Posts may not have a link, so it isn't unique.
+LINK_INDEX = IndexModel([("link", ASCENDING)], name="link")
+
 
 class UserDocument(NoSQLBaseDocument):
     first_name: str
@@ -13,6 +23,7 @@ class UserDocument(NoSQLBaseDocument):
 
     class Settings:
         name = "users"
+        indexes = USER_INDEXES
 
     @property
     def full_name(self):
@@ -32,6 +43,7 @@ class RepositoryDocument(Document):
 
     class Settings:
         name = DataCategory.REPOSITORIES
+        indexes = (AUTHOR_ID_INDEX, UNIQUE_LINK_INDEX)
 
 
 class PostDocument(Document):
@@ -40,6 +52,7 @@ class PostDocument(Document):
 
     class Settings:
         name = DataCategory.POSTS
+        indexes = (AUTHOR_ID_INDEX, LINK_INDEX)
 
 
 class ArticleDocument(Document):
@@ -47,3 +60,4 @@ class ArticleDocument(Document):
 
     class Settings:
         name = DataCategory.ARTICLES
+        indexes = (AUTHOR_ID_INDEX, UNIQUE_LINK_INDEX)
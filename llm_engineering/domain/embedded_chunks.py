@@ -1,11 +1,40 @@
 from abc import ABC
 
 from pydantic import UUID4, Field
+from qdrant_client.models import (
+    PayloadSchemaType,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+)
 
+from llm_engineering.domain.exceptions import ImproperlyConfigured
 from llm_engineering.domain.types import DataCategory
+from llm_engineering.settings import settings
 
 from .base import VectorBaseDocument
 
+# Fields filtered on at retrieval time, indexed so Qdrant doesn't scan the payloads.
+CHUNK_PAYLOAD_INDEXES = {
+    "author_id": PayloadSchemaType.KEYWORD,
+    "platform": PayloadSchemaType.KEYWORD,
+    "document_id": PayloadSchemaType.KEYWORD,
+}
+# With QDRANT_CHUNKS_QUANTIZATION, the original float32 embeddings live on disk while their int8 quantization (4x
+# smaller) is kept in RAM and searched. The oversampled candidates are then rescored with the original embeddings to
+# recover the recall.
+CHUNK_QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+)
+CHUNK_SEARCH_PARAMS = SearchParams(quantization=QuantizationSearchParams(rescore=True, oversampling=2.0))
+# The embedding model and chunking params, shared by all the chunks of a collection, are recorded once per collection
+# instead of in every point's payload.
+CHUNK_COLLECTION_FIELDS = ("metadata",)
+# With QDRANT_UNIFIED_COLLECTIONS, all the embedded chunks share this collection (see `get_unified_collection()`).
+CHUNKS_UNIFIED_COLLECTION = "embedded_chunks"
+
 
 class EmbeddedChunk(VectorBaseDocument, ABC):
     content: str
@@ -14,44 +43,73 @@ class EmbeddedChunk(VectorBaseDocument, ABC):
     document_id: UUID4
     author_id: UUID4
     author_full_name: str
+    num_tokens: int | None = None
     metadata: dict = Field(default_factory=dict)
 
+    class Config:
+        unified_collection = CHUNKS_UNIFIED_COLLECTION
+        use_vector_index = True
+        payload_indexes = CHUNK_PAYLOAD_INDEXES
+        # Opt-in until the recall@k of the quantized layout is recorded (`poetry poe run-benchmark quantization`).
+        on_disk = True if settings.QDRANT_CHUNKS_QUANTIZATION else None
+        quantization_config = CHUNK_QUANTIZATION_CONFIG if settings.QDRANT_CHUNKS_QUANTIZATION else None
+        search_params = CHUNK_SEARCH_PARAMS if settings.QDRANT_CHUNKS_QUANTIZATION else None
+        collection_fields = CHUNK_COLLECTION_FIELDS
+
+    @classmethod
+    def validate_query_metadata(cls, query_metadata: dict) -> None:
+        """
+        Checks that the query was embedded like the chunks of the collection.
+
+        Raises:
+            ImproperlyConfigured: If the query and the collection disagree on the embedding model.
+        """
+
+        collection_metadata = cls.get_collection_metadata().get("metadata", {})
+        mismatches = {
+            key: (value, collection_metadata[key])
+            for key, value in query_metadata.items()
+            if key in collection_metadata and collection_metadata[key] != value
+        }
+        if mismatches:
+            raise ImproperlyConfigured(
+                f"The query can't be searched in '{cls.get_collection_name()}' (query vs. collection): {mismatches}."
+            )
+
     @classmethod
     def to_context(cls, chunks: list["EmbeddedChunk"]) -> str:
-        context = ""
-        for i, chunk in enumerate(chunks):
-            context += f"""
-            Chunk {i + 1}:
-            Type: {chunk.__class__.__name__}
-            Platform: {chunk.platform}
-            Author: {chunk.author_full_name}
-            Content: {chunk.content}\n
-            """
+        return "".join(chunk.to_context_section(position=i + 1) for i, chunk in enumerate(chunks))
 
-        return context
+    def to_context_section(self, position: int, content: str | None = None) -> str:
+        content = self.content if content is None else content
+
+        return f"""
+            Chunk {position}:
+            Type: {self.__class__.__name__}
+            Platform: {self.platform}
+            Author: {self.author_full_name}
+            Content: {content}\n
+            """
 
 
 class EmbeddedPostChunk(EmbeddedChunk):
-    class Config:
+    class Config(EmbeddedChunk.Config):
         name = "embedded_posts"
         category = DataCategory.POSTS
-        use_vector_index = True
 
 
 class EmbeddedArticleChunk(EmbeddedChunk):
     link: str
 
-    class Config:
+    class Config(EmbeddedChunk.Config):
         name = "embedded_articles"
         category = DataCategory.ARTICLES
-        use_vector_index = True
 
 
 class EmbeddedRepositoryChunk(EmbeddedChunk):
     name: str
     link: str
 
-    class Config:
+    class Config(EmbeddedChunk.Config):
         name = "embedded_repositories"
         category = DataCategory.REPOSITORIES
-        use_vector_index = True
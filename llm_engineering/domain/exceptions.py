@@ -4,3 +4,11 @@ class LLMTwinException(Exception):
 
 class ImproperlyConfigured(LLMTwinException):
     pass
+
+
+class ReindexingError(LLMTwinException):
+    pass
+
+
+class SnapshotError(LLMTwinException):
+    pass
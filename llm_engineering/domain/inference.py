@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Optional
 
 
 class DeploymentStrategy(ABC):
@@ -8,15 +9,38 @@ class DeploymentStrategy(ABC):
 
 
 class Inference(ABC):
-    """An abstract class for performing inference."""
+    """
+    An abstract class for performing inference.
 
-    def __init__(self):
+    Every call builds its own payload, so a single instance (and its connection pool) can be shared between threads.
+    """
+
+    def __init__(self, default_parameters: Optional[Dict[str, Any]] = None):
         self.model = None
+        self.default_parameters = dict(default_parameters) if default_parameters else {}
 
-    @abstractmethod
-    def set_payload(self, inputs, parameters=None):
-        pass
+    def build_payload(self, inputs: str, parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Builds a new payload for a single inference request, without mutating the instance.
+
+        Args:
+            inputs (str): The input text for the inference.
+            parameters (dict, optional): Parameters overriding the default ones. Defaults to None.
+
+        Returns:
+            dict: The payload of the request.
+        """
+
+        return {
+            "inputs": inputs,
+            "parameters": {**self.default_parameters, **(parameters or {})},
+        }
 
     @abstractmethod
-    def inference(self):
+    def inference(self, inputs: str, parameters: Optional[Dict[str, Any]] = None) -> list[Dict[str, Any]]:
         pass
+
+    def inference_stream(self, inputs: str, parameters: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Yields the generated text token by token. Backends that can't stream don't override it."""
+
+        raise NotImplementedError(f"{self.__class__.__name__} does not support streaming inference.")
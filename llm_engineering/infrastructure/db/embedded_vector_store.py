@@ -0,0 +1,737 @@
+import bisect
+import json
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+import httpx
+import numpy as np
+from loguru import logger
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.http.models import (
+    AliasDescription,
+    AliasOperations,
+    CollectionConfig,
+    CollectionDescription,
+    CollectionInfo,
+    CollectionParams,
+    CollectionStatus,
+    CollectionsAliasesResponse,
+    CollectionsResponse,
+    CountResult,
+    CreateAliasOperation,
+    DeleteAliasOperation,
+    Distance,
+    FieldCondition,
+    Filter,
+    HasIdCondition,
+    HnswConfig,
+    MatchAny,
+    MatchExcept,
+    MatchValue,
+    OptimizersConfig,
+    OptimizersStatusOneOf,
+    PayloadIndexInfo,
+    PayloadSchemaType,
+    PointStruct,
+    Record,
+    RenameAliasOperation,
+    ScoredPoint,
+    SearchParams,
+    SearchRequest,
+    UpdateResult,
+    UpdateStatus,
+    VectorParams,
+    WalConfig,
+)
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+PointId = int | str
+
+_INITIAL_CAPACITY = 1024
+
+
+def _not_found(collection_name: str) -> UnexpectedResponse:
+    return UnexpectedResponse(
+        status_code=404,
+        reason_phrase="Not Found",
+        content=f'{{"status": {{"error": "Collection `{collection_name}` doesn\'t exist!"}}}}'.encode(),
+        headers=httpx.Headers(),
+    )
+
+
+def _normalize_id(point_id: PointId | uuid.UUID) -> PointId:
+    return str(point_id) if isinstance(point_id, uuid.UUID) else point_id
+
+
+def _id_key(point_id: PointId) -> tuple[int, int]:
+    """Qdrant's order of the point ids: the integers first, then the UUIDs by value."""
+
+    if isinstance(point_id, int):
+        return (0, point_id)
+
+    return (1, uuid.UUID(point_id).int)
+
+
+def _get_value(payload: dict, key: str) -> Any:
+    value: Any = payload
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+
+    return value
+
+
+def _select_payload(payload: dict, with_payload: bool | Sequence[str]) -> dict | None:
+    if with_payload is True:
+        return payload
+    if with_payload is False:
+        return None
+
+    return {key: payload[key] for key in with_payload if key in payload}
+
+
+class _EmbeddedCollection:
+    """
+    One collection stored in its own directory:
+    - `config.json`: the vectors' parameters and the payload indexes.
+    - `vectors.f32`: the (normalized, for the cosine distance) vectors, a memory-mapped float32 matrix with one row per
+        point, grown by doubling.
+    - `points.jsonl`: an append-only log of the upserted ids and payloads, replayed on load. The row of a point is the
+        order of its first upsert.
+    - `hnsw.bin`: the optional HNSW index, saved when the store is closed.
+    """
+
+    def __init__(self, path: Path, use_hnsw: bool = False) -> None:
+        self.path = path
+        self._lock = threading.RLock()
+
+        config = json.loads((path / "config.json").read_text())
+        self.vector_size: int = config["vector_size"]
+        self.distance = Distance(config["distance"]) if config["distance"] else None
+        self.payload_indexes: dict[str, str] = config.get("payload_indexes", {})
+
+        self.ids: list[PointId] = []
+        self.payloads: list[dict] = []
+        self.rows: dict[PointId, int] = {}
+        self._num_log_lines = self._replay_log()
+
+        self._vectors: np.memmap | None = None
+        if self.vector_size > 0:
+            self._open_vectors(max(_INITIAL_CAPACITY, len(self.ids)))
+
+        self._sorted_keys: list[tuple[int, int]] | None = None
+        self._sorted_rows: np.ndarray | None = None
+        self._index_cache: dict[str, dict[Any, np.ndarray]] = {}
+
+        self._use_hnsw = use_hnsw and self.vector_size > 0 and hnswlib is not None
+        self._hnsw_index = None
+        self._hnsw_pending_rows: set[int] = set()
+        if self._use_hnsw:
+            self._load_hnsw_index(config.get("hnsw_version"))
+
+    @classmethod
+    def create(
+        cls, path: Path, vector_size: int, distance: Distance | None, use_hnsw: bool = False
+    ) -> "_EmbeddedCollection":
+        path.mkdir(parents=True)
+        (path / "config.json").write_text(
+            json.dumps({"vector_size": vector_size, "distance": distance.value if distance else None})
+        )
+        (path / "points.jsonl").touch()
+
+        return cls(path, use_hnsw=use_hnsw)
+
+    def _replay_log(self) -> int:
+        num_lines = 0
+        with (self.path / "points.jsonl").open() as f:
+            for line in f:
+                point = json.loads(line)
+                self._set_payload(point["id"], point["payload"])
+                num_lines += 1
+
+        return num_lines
+
+    def _set_payload(self, point_id: PointId, payload: dict) -> int:
+        row = self.rows.get(point_id)
+        if row is None:
+            row = len(self.ids)
+            self.rows[point_id] = row
+            self.ids.append(point_id)
+            self.payloads.append(payload)
+        else:
+            self.payloads[row] = payload
+
+        return row
+
+    def _open_vectors(self, capacity: int) -> None:
+        vectors_file = self.path / "vectors.f32"
+        required_size = capacity * self.vector_size * np.dtype(np.float32).itemsize
+        with vectors_file.open("ab") as f:
+            if f.tell() < required_size:
+                f.truncate(required_size)
+        size = vectors_file.stat().st_size // (self.vector_size * np.dtype(np.float32).itemsize)
+
+        self._vectors = np.memmap(vectors_file, dtype=np.float32, mode="r+", shape=(size, self.vector_size))
+
+    def _save_config(self, **extra) -> None:
+        config = {
+            "vector_size": self.vector_size,
+            "distance": self.distance.value if self.distance else None,
+            "payload_indexes": self.payload_indexes,
+            **extra,
+        }
+        (self.path / "config.json").write_text(json.dumps(config))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[: len(self.ids)]
+
+    def upsert(self, points: Iterable[PointStruct]) -> None:
+        with self._lock:
+            points = list(points)
+            if self._vectors is not None:
+                vectors = np.asarray([point.vector for point in points], dtype=np.float32).reshape(
+                    len(points), self.vector_size
+                )
+                if self.distance == Distance.COSINE:
+                    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+                    vectors /= np.where(norms > 0.0, norms, 1.0)
+
+            log_lines = []
+            rows = []
+            for point in points:
+                point_id = _normalize_id(point.id)
+                if point_id not in self.rows:
+                    self._sorted_keys = None
+                rows.append(self._set_payload(point_id, point.payload or {}))
+                log_lines.append(json.dumps({"id": point_id, "payload": point.payload or {}}))
+
+            if self._vectors is not None:
+                if len(self.ids) > self._vectors.shape[0]:
+                    self._vectors.flush()
+                    self._open_vectors(max(2 * self._vectors.shape[0], len(self.ids)))
+                self._vectors[rows] = vectors
+                self._vectors.flush()
+                self._hnsw_pending_rows.update(rows)
+
+            # The vectors are written first, so a crash never leaves a logged point without its vector.
+            with (self.path / "points.jsonl").open("a") as f:
+                f.write("\n".join(log_lines) + "\n")
+            self._num_log_lines += len(log_lines)
+            self._index_cache.clear()
+
+    def delete_payload(self, keys: Sequence[str], points: Sequence[PointId] | Filter) -> None:
+        with self._lock:
+            if isinstance(points, Filter):
+                rows = np.flatnonzero(self.filter_mask(points)).tolist()
+            else:
+                rows = [self.rows[point_id] for point_id in map(_normalize_id, points) if point_id in self.rows]
+
+            log_lines = []
+            for row in rows:
+                payload = self.payloads[row]
+                if any(key in payload for key in keys):
+                    self.payloads[row] = {key: value for key, value in payload.items() if key not in keys}
+                    log_lines.append(json.dumps({"id": self.ids[row], "payload": self.payloads[row]}))
+
+            if len(log_lines) > 0:
+                with (self.path / "points.jsonl").open("a") as f:
+                    f.write("\n".join(log_lines) + "\n")
+                self._num_log_lines += len(log_lines)
+                self._index_cache.clear()
+
+    def create_payload_index(self, field_name: str, field_schema: PayloadSchemaType | str | None) -> None:
+        with self._lock:
+            schema = field_schema.value if isinstance(field_schema, PayloadSchemaType) else field_schema
+            self.payload_indexes[field_name] = schema or PayloadSchemaType.KEYWORD.value
+            self._save_config()
+
+    def retrieve(self, ids: Sequence[PointId], with_payload, with_vectors: bool) -> list[Record]:
+        with self._lock:
+            point_ids = [_normalize_id(point_id) for point_id in ids]
+            rows = [self.rows[point_id] for point_id in point_ids if point_id in self.rows]
+
+            return [self._to_record(row, with_payload, with_vectors) for row in rows]
+
+    def scroll(
+        self, scroll_filter: Filter | None, limit: int, offset: PointId | None, with_payload, with_vectors: bool
+    ) -> tuple[list[Record], PointId | None]:
+        with self._lock:
+            sorted_keys, sorted_rows = self._get_sorted_rows()
+            start = bisect.bisect_left(sorted_keys, _id_key(offset)) if offset is not None else 0
+            rows = sorted_rows[start:]
+            if scroll_filter is not None:
+                rows = rows[self.filter_mask(scroll_filter)[rows]]
+
+            records = [self._to_record(row, with_payload, with_vectors) for row in rows[:limit]]
+            next_offset = self.ids[rows[limit]] if len(rows) > limit else None
+
+            return records, next_offset
+
+    def count(self, count_filter: Filter | None = None) -> int:
+        with self._lock:
+            if count_filter is None:
+                return len(self.ids)
+
+            return int(self.filter_mask(count_filter).sum())
+
+    def search(self, requests: Sequence[SearchRequest]) -> list[list[ScoredPoint]]:
+        """
+        Runs a batch of searches. Reading the vectors bounds the latency of an exact search, so the unfiltered exact
+        searches are scored together in a single pass (a matrix product) and the filtered ones only read the vectors
+        of their candidates.
+        """
+
+        with self._lock:
+            if len(self.ids) == 0:
+                return [[] for _ in requests]
+
+            queries = np.asarray([request.vector for request in requests], dtype=np.float32)
+            if self.distance == Distance.COSINE:
+                norms = np.linalg.norm(queries, axis=1, keepdims=True)
+                queries /= np.where(norms > 0.0, norms, 1.0)
+
+            uses_hnsw = [
+                self._use_hnsw and request.filter is None and not (request.params is not None and request.params.exact)
+                for request in requests
+            ]
+            scan_positions = [
+                position
+                for position, request in enumerate(requests)
+                if request.filter is None and not uses_hnsw[position]
+            ]
+            if scan_positions:
+                scan_scores = dict(zip(scan_positions, (self.vectors @ queries[scan_positions].T).T, strict=True))
+
+            results = []
+            for position, request in enumerate(requests):
+                offset = request.offset or 0
+                k = request.limit + offset
+                if uses_hnsw[position]:
+                    rows, scores = self._search_hnsw(queries[position], k, request.params)
+                elif request.filter is not None:
+                    candidates = np.flatnonzero(self.filter_mask(request.filter))
+                    rows, scores = self._top_k(self._vectors[candidates] @ queries[position], k, candidates)
+                else:
+                    rows, scores = self._top_k(scan_scores[position], k)
+
+                results.append(
+                    self._to_scored_points(
+                        rows[offset:],
+                        scores[offset:],
+                        with_payload=request.with_payload if request.with_payload is not None else False,
+                        with_vectors=bool(request.with_vector),
+                        score_threshold=request.score_threshold,
+                    )
+                )
+
+            return results
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int, candidates: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """The k best rows, sorted by decreasing score. The scores are those of the `candidates` rows, if given."""
+
+        k = min(k, len(scores))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        rows = candidates[top] if candidates is not None else top
+
+        return rows, scores[top]
+
+    def _to_scored_points(
+        self, rows: np.ndarray, scores: np.ndarray, with_payload, with_vectors: bool, score_threshold: float | None
+    ) -> list[ScoredPoint]:
+        scored_points = []
+        for row, score in zip(rows, scores, strict=True):
+            if score_threshold is not None and score < score_threshold:
+                break
+
+            record = self._to_record(int(row), with_payload, with_vectors)
+            scored_points.append(
+                ScoredPoint(id=record.id, version=0, score=float(score), payload=record.payload, vector=record.vector)
+            )
+
+        return scored_points
+
+    def _search_hnsw(
+        self, query: np.ndarray, k: int, search_params: SearchParams | None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        self._sync_hnsw_index()
+
+        k = min(k, len(self.ids))
+        ef = search_params.hnsw_ef if search_params is not None and search_params.hnsw_ef else 128
+        self._hnsw_index.set_ef(max(ef, k))
+        rows, distances = self._hnsw_index.knn_query(query, k=k)
+
+        # hnswlib's inner product "distance" is 1 - <a, b>.
+        return rows[0].astype(np.int64), 1.0 - distances[0]
+
+    def _load_hnsw_index(self, hnsw_version: int | None) -> None:
+        index_file = self.path / "hnsw.bin"
+        self._hnsw_index = hnswlib.Index(space="ip", dim=self.vector_size)
+        if index_file.exists() and hnsw_version == self._num_log_lines:
+            self._hnsw_index.load_index(str(index_file), max_elements=max(_INITIAL_CAPACITY, len(self.ids)))
+        else:
+            self._hnsw_index.init_index(max_elements=max(_INITIAL_CAPACITY, len(self.ids)), M=16, ef_construction=100)
+            self._hnsw_pending_rows = set(range(len(self.ids)))
+
+    def _sync_hnsw_index(self) -> None:
+        if not self._hnsw_pending_rows:
+            return
+
+        if len(self.ids) > self._hnsw_index.get_max_elements():
+            self._hnsw_index.resize_index(max(2 * self._hnsw_index.get_max_elements(), len(self.ids)))
+
+        rows = np.fromiter(self._hnsw_pending_rows, dtype=np.int64)
+        self._hnsw_index.add_items(self._vectors[rows], rows)
+        self._hnsw_pending_rows.clear()
+
+    def save(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+
+            if self._use_hnsw and self._hnsw_index is not None:
+                self._sync_hnsw_index()
+                self._hnsw_index.save_index(str(self.path / "hnsw.bin"))
+                self._save_config(hnsw_version=self._num_log_lines)
+
+    def filter_mask(self, query_filter: Filter) -> np.ndarray:
+        """The rows matching the filter, evaluated over the whole collection at once."""
+
+        num_points = len(self.ids)
+        mask = np.ones(num_points, dtype=bool)
+        for condition in query_filter.must or []:
+            mask &= self._condition_mask(condition)
+        for condition in query_filter.must_not or []:
+            mask &= ~self._condition_mask(condition)
+        if query_filter.should:
+            should_mask = np.zeros(num_points, dtype=bool)
+            for condition in query_filter.should:
+                should_mask |= self._condition_mask(condition)
+            mask &= should_mask
+
+        return mask
+
+    def _condition_mask(self, condition: Any) -> np.ndarray:
+        if isinstance(condition, Filter):
+            return self.filter_mask(condition)
+
+        mask = np.zeros(len(self.ids), dtype=bool)
+        if isinstance(condition, HasIdCondition):
+            point_ids = [_normalize_id(point_id) for point_id in condition.has_id]
+            mask[[self.rows[point_id] for point_id in point_ids if point_id in self.rows]] = True
+
+            return mask
+
+        if not isinstance(condition, FieldCondition):
+            raise NotImplementedError(f"Unsupported filter condition: {type(condition).__name__}")
+
+        if isinstance(condition.match, MatchValue | MatchAny) and condition.key in self.payload_indexes:
+            values = [condition.match.value] if isinstance(condition.match, MatchValue) else condition.match.any
+            index = self._get_keyword_index(condition.key)
+            for value in values:
+                mask[index.get(value, [])] = True
+
+            return mask
+
+        values = [_get_value(payload, condition.key) for payload in self.payloads]
+        if isinstance(condition.match, MatchValue):
+            mask[:] = [value == condition.match.value for value in values]
+        elif isinstance(condition.match, MatchAny):
+            accepted = set(condition.match.any)
+            mask[:] = [value in accepted for value in values]
+        elif isinstance(condition.match, MatchExcept):
+            rejected = set(condition.match.except_)
+            mask[:] = [value is not None and value not in rejected for value in values]
+        elif condition.range is not None:
+            bounds = condition.range
+            mask[:] = [
+                isinstance(value, int | float)
+                and (bounds.gt is None or value > bounds.gt)
+                and (bounds.gte is None or value >= bounds.gte)
+                and (bounds.lt is None or value < bounds.lt)
+                and (bounds.lte is None or value <= bounds.lte)
+                for value in values
+            ]
+        else:
+            raise NotImplementedError(f"Unsupported field condition on '{condition.key}'.")
+
+        return mask
+
+    def _get_keyword_index(self, field_name: str) -> dict[Any, np.ndarray]:
+        """The rows of each value of an indexed field, rebuilt after writes."""
+
+        index = self._index_cache.get(field_name)
+        if index is None:
+            rows_by_value: dict[Any, list[int]] = {}
+            for row, payload in enumerate(self.payloads):
+                value = _get_value(payload, field_name)
+                for item in value if isinstance(value, list) else [value]:
+                    if item is not None:
+                        rows_by_value.setdefault(item, []).append(row)
+
+            index = {value: np.asarray(rows, dtype=np.int64) for value, rows in rows_by_value.items()}
+            self._index_cache[field_name] = index
+
+        return index
+
+    def _get_sorted_rows(self) -> tuple[list[tuple[int, int]], np.ndarray]:
+        if self._sorted_keys is None:
+            keys = [_id_key(point_id) for point_id in self.ids]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self._sorted_keys = [keys[row] for row in order]
+            self._sorted_rows = np.asarray(order, dtype=np.int64)
+
+        return self._sorted_keys, self._sorted_rows
+
+    def _to_record(self, row: int, with_payload, with_vectors: bool) -> Record:
+        vector = self._vectors[row].tolist() if with_vectors and self._vectors is not None else None
+
+        return Record(id=self.ids[row], payload=_select_payload(self.payloads[row], with_payload), vector=vector)
+
+    def info(self) -> CollectionInfo:
+        if self.vector_size > 0:
+            vectors = VectorParams(size=self.vector_size, distance=self.distance)
+        else:
+            vectors = {}
+
+        return CollectionInfo(
+            status=CollectionStatus.GREEN,
+            optimizer_status=OptimizersStatusOneOf.OK,
+            indexed_vectors_count=self._hnsw_index.get_current_count() if self._use_hnsw else 0,
+            points_count=len(self.ids),
+            segments_count=1,
+            payload_schema={
+                field_name: PayloadIndexInfo(data_type=PayloadSchemaType(schema), points=len(self.ids))
+                for field_name, schema in self.payload_indexes.items()
+            },
+            config=CollectionConfig(
+                params=CollectionParams(vectors=vectors),
+                hnsw_config=HnswConfig(m=16, ef_construct=100, full_scan_threshold=10000),
+                optimizer_config=OptimizersConfig(
+                    deleted_threshold=0.2,
+                    vacuum_min_vector_number=1000,
+                    default_segment_number=0,
+                    indexing_threshold=20000,
+                    flush_interval_sec=5,
+                    max_optimization_threads=1,
+                ),
+                wal_config=WalConfig(wal_capacity_mb=32, wal_segments_ahead=0),
+            ),
+        )
+
+
+class EmbeddedVectorStore:
+    """
+    In-process vector store implementing the subset of `QdrantClient`'s API used by the ODM, for server-free
+    deployments, tests and read-only serving replicas.
+
+    The vectors are memory-mapped float32 matrices searched exactly with NumPy (or through an HNSW index if
+    `use_hnsw` is set and hnswlib is installed) and the payloads are kept in memory, backed by an append-only log.
+    The calls are serialized per collection, so the store can be shared by threads.
+    """
+
+    def __init__(self, path: str | Path, use_hnsw: bool = False) -> None:
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._use_hnsw = use_hnsw
+        self._lock = threading.Lock()
+        self._collections: dict[str, _EmbeddedCollection] = {}
+        aliases_file = self._path / "aliases.json"
+        self._aliases: dict[str, str] = json.loads(aliases_file.read_text()) if aliases_file.exists() else {}
+
+        if use_hnsw and hnswlib is None:
+            logger.warning("hnswlib not installed, falling back to exact search. Install with `pip install hnswlib`")
+
+    def _get(self, collection_name: str) -> _EmbeddedCollection:
+        with self._lock:
+            collection_name = self._aliases.get(collection_name, collection_name)
+            collection = self._collections.get(collection_name)
+            if collection is None:
+                if not (self._path / collection_name / "config.json").exists():
+                    raise _not_found(collection_name)
+
+                collection = _EmbeddedCollection(self._path / collection_name, use_hnsw=self._use_hnsw)
+                self._collections[collection_name] = collection
+
+            return collection
+
+    def get_collections(self) -> CollectionsResponse:
+        names = sorted(path.parent.name for path in self._path.glob("*/config.json"))
+
+        return CollectionsResponse(collections=[CollectionDescription(name=name) for name in names])
+
+    def collection_exists(self, collection_name: str, **kwargs) -> bool:
+        collection_name = self._aliases.get(collection_name, collection_name)
+
+        return (self._path / collection_name / "config.json").exists()
+
+    def get_collection(self, collection_name: str, **kwargs) -> CollectionInfo:
+        return self._get(collection_name).info()
+
+    def create_collection(self, collection_name: str, vectors_config: VectorParams | dict, **kwargs) -> bool:
+        """Creates a collection. The HNSW, quantization and on-disk options of the server don't apply and are ignored."""
+
+        with self._lock:
+            if self.collection_exists(collection_name):
+                raise ValueError(f"Collection {collection_name} already exists")
+
+            if isinstance(vectors_config, VectorParams):
+                if vectors_config.distance not in (Distance.COSINE, Distance.DOT):
+                    raise NotImplementedError(f"Unsupported distance: {vectors_config.distance}")
+
+                vector_size, distance = vectors_config.size, vectors_config.distance
+            else:
+                vector_size, distance = 0, None
+
+            self._collections[collection_name] = _EmbeddedCollection.create(
+                self._path / collection_name, vector_size=vector_size, distance=distance, use_hnsw=self._use_hnsw
+            )
+
+        return True
+
+    def delete_collection(self, collection_name: str, **kwargs) -> bool:
+        with self._lock:
+            self._collections.pop(collection_name, None)
+            self._aliases = {alias: name for alias, name in self._aliases.items() if name != collection_name}
+            self._save_aliases()
+            collection_path = self._path / collection_name
+            if not collection_path.exists():
+                return False
+
+            for file in collection_path.iterdir():
+                file.unlink()
+            collection_path.rmdir()
+
+        return True
+
+    def get_aliases(self, **kwargs) -> CollectionsAliasesResponse:
+        return CollectionsAliasesResponse(
+            aliases=[AliasDescription(alias_name=alias, collection_name=name) for alias, name in self._aliases.items()]
+        )
+
+    def update_collection_aliases(self, change_aliases_operations: Sequence[AliasOperations], **kwargs) -> bool:
+        """Applies the operations all at once, as Qdrant does."""
+
+        with self._lock:
+            aliases = dict(self._aliases)
+            for operation in change_aliases_operations:
+                if isinstance(operation, CreateAliasOperation):
+                    if not (self._path / operation.create_alias.collection_name / "config.json").exists():
+                        raise _not_found(operation.create_alias.collection_name)
+
+                    aliases[operation.create_alias.alias_name] = operation.create_alias.collection_name
+                elif isinstance(operation, DeleteAliasOperation):
+                    aliases.pop(operation.delete_alias.alias_name, None)
+                elif isinstance(operation, RenameAliasOperation):
+                    aliases[operation.rename_alias.new_alias_name] = aliases.pop(operation.rename_alias.old_alias_name)
+
+            self._aliases = aliases
+            self._save_aliases()
+
+        return True
+
+    def _save_aliases(self) -> None:
+        aliases_file = self._path / "aliases.json"
+        # Written to a temporary file first, so readers never see a partial file.
+        tmp_file = aliases_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(self._aliases))
+        tmp_file.replace(aliases_file)
+
+    def create_payload_index(
+        self, collection_name: str, field_name: str, field_schema: PayloadSchemaType | str | None = None, **kwargs
+    ) -> UpdateResult:
+        self._get(collection_name).create_payload_index(field_name, field_schema)
+
+        return UpdateResult(operation_id=0, status=UpdateStatus.COMPLETED)
+
+    def upsert(self, collection_name: str, points: Sequence[PointStruct], **kwargs) -> UpdateResult:
+        self._get(collection_name).upsert(points)
+
+        return UpdateResult(operation_id=0, status=UpdateStatus.COMPLETED)
+
+    def delete_payload(
+        self, collection_name: str, keys: Sequence[str], points: Sequence[PointId] | Filter, **kwargs
+    ) -> UpdateResult:
+        self._get(collection_name).delete_payload(keys, points)
+
+        return UpdateResult(operation_id=0, status=UpdateStatus.COMPLETED)
+
+    def retrieve(
+        self,
+        collection_name: str,
+        ids: Sequence[PointId],
+        with_payload: bool | Sequence[str] = True,
+        with_vectors: bool = False,
+        **kwargs,
+    ) -> list[Record]:
+        return self._get(collection_name).retrieve(ids, with_payload=with_payload, with_vectors=with_vectors)
+
+    def scroll(
+        self,
+        collection_name: str,
+        scroll_filter: Filter | None = None,
+        limit: int = 10,
+        offset: PointId | None = None,
+        with_payload: bool | Sequence[str] = True,
+        with_vectors: bool = False,
+        **kwargs,
+    ) -> tuple[list[Record], PointId | None]:
+        return self._get(collection_name).scroll(
+            scroll_filter, limit=limit, offset=offset, with_payload=with_payload, with_vectors=with_vectors
+        )
+
+    def count(self, collection_name: str, count_filter: Filter | None = None, **kwargs) -> CountResult:
+        return CountResult(count=self._get(collection_name).count(count_filter))
+
+    def search(
+        self,
+        collection_name: str,
+        query_vector: Sequence[float],
+        query_filter: Filter | None = None,
+        search_params: SearchParams | None = None,
+        limit: int = 10,
+        offset: int | None = None,
+        with_payload: bool | Sequence[str] = True,
+        with_vectors: bool = False,
+        score_threshold: float | None = None,
+        **kwargs,
+    ) -> list[ScoredPoint]:
+        request = SearchRequest(
+            vector=list(query_vector),
+            filter=query_filter,
+            params=search_params,
+            limit=limit,
+            offset=offset,
+            with_payload=with_payload,
+            with_vector=with_vectors,
+            score_threshold=score_threshold,
+        )
+
+        return self._get(collection_name).search([request])[0]
+
+    def search_batch(
+        self, collection_name: str, requests: Sequence[SearchRequest], **kwargs
+    ) -> list[list[ScoredPoint]]:
+        return self._get(collection_name).search(requests)
+
+    def close(self, **kwargs) -> None:
+        """Flushes the vectors and saves the HNSW indexes, which are otherwise rebuilt on the next start."""
+
+        with self._lock:
+            for collection in self._collections.values():
+                collection.save()
@@ -11,7 +11,8 @@ class MongoDatabaseConnector:
     def __new__(cls, *args, **kwargs) -> MongoClient:
         if cls._instance is None:
             try:
-                cls._instance = MongoClient(settings.DATABASE_HOST)
+                # Connected on first use, so the workers of the prefork server don't inherit its monitor threads.
+                cls._instance = MongoClient(settings.DATABASE_HOST, connect=False)
             except ConnectionFailure as e:
                 logger.error(f"Couldn't connect to the database: {e!s}")
 
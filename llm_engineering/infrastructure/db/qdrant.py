@@ -1,20 +1,89 @@
+import asyncio
+import os
+import threading
+from typing import Any
+
+import grpc
+import httpx
 from loguru import logger
-from qdrant_client import QdrantClient
-from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
 
+from llm_engineering.domain.exceptions import ImproperlyConfigured
 from llm_engineering.settings import settings
 
+from .embedded_vector_store import EmbeddedVectorStore
+
+# Errors returned by Qdrant: the REST transport raises `UnexpectedResponse` and the gRPC one `grpc.RpcError`.
+RESPONSE_ERRORS = (UnexpectedResponse, grpc.RpcError)
+
+GRPC_COMPRESSIONS = {"gzip": grpc.Compression.Gzip}
+RETRYABLE_GRPC_STATUS_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.ABORTED,
+}
+
+
+def get_client_options() -> dict[str, Any]:
+    """The transport options shared by the sync and async clients of a Qdrant server."""
+
+    options: dict[str, Any] = {
+        "prefer_grpc": settings.QDRANT_PREFER_GRPC,
+        "grpc_port": settings.QDRANT_GRPC_PORT,
+        "timeout": settings.QDRANT_TIMEOUT,
+    }
+
+    if settings.QDRANT_MAX_CONNECTIONS is not None or settings.QDRANT_MAX_KEEPALIVE_CONNECTIONS is not None:
+        # Without explicit limits, qdrant-client doesn't keep any idle connection to a localhost server.
+        options["limits"] = httpx.Limits(
+            max_connections=settings.QDRANT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.QDRANT_MAX_KEEPALIVE_CONNECTIONS,
+        )
+
+    if settings.QDRANT_PREFER_GRPC:
+        options["grpc_options"] = {
+            "grpc.keepalive_time_ms": settings.QDRANT_GRPC_KEEPALIVE_TIME_MS,
+            "grpc.keepalive_timeout_ms": settings.QDRANT_GRPC_KEEPALIVE_TIMEOUT_MS,
+            "grpc.keepalive_permit_without_calls": 1,
+            "grpc.http2.max_pings_without_data": 0,
+        }
+
+        if settings.QDRANT_GRPC_COMPRESSION is not None:
+            if settings.QDRANT_GRPC_COMPRESSION not in GRPC_COMPRESSIONS:
+                raise ImproperlyConfigured(f"QDRANT_GRPC_COMPRESSION should be one of {list(GRPC_COMPRESSIONS)}.")
+
+            options["grpc_compression"] = GRPC_COMPRESSIONS[settings.QDRANT_GRPC_COMPRESSION]
+
+    return options
+
 
 class QdrantDatabaseConnector:
-    _instance: QdrantClient | None = None
+    _instance: QdrantClient | EmbeddedVectorStore | None = None
 
-    def __new__(cls, *args, **kwargs) -> QdrantClient:
+    def __new__(cls, *args, **kwargs) -> QdrantClient | EmbeddedVectorStore:
         if cls._instance is None:
             try:
-                if settings.USE_QDRANT_CLOUD:
+                if settings.QDRANT_EMBEDDED_PATH:
+                    cls._instance = EmbeddedVectorStore(
+                        settings.QDRANT_EMBEDDED_PATH, use_hnsw=settings.QDRANT_EMBEDDED_USE_HNSW
+                    )
+
+                    uri = settings.QDRANT_EMBEDDED_PATH
+                elif settings.QDRANT_LOCAL_PATH:
+                    # qdrant-client's local mode, mostly useful for tests and load tests.
+                    if settings.QDRANT_LOCAL_PATH == ":memory:":
+                        cls._instance = QdrantClient(location=":memory:")
+                    else:
+                        cls._instance = QdrantClient(path=settings.QDRANT_LOCAL_PATH)
+
+                    uri = settings.QDRANT_LOCAL_PATH
+                elif settings.USE_QDRANT_CLOUD:
                     cls._instance = QdrantClient(
                         url=settings.QDRANT_CLOUD_URL,
                         api_key=settings.QDRANT_APIKEY,
+                        **get_client_options(),
                     )
 
                     uri = settings.QDRANT_CLOUD_URL
@@ -22,12 +91,13 @@ class QdrantDatabaseConnector:
                     cls._instance = QdrantClient(
                         host=settings.QDRANT_DATABASE_HOST,
                         port=settings.QDRANT_DATABASE_PORT,
+                        **get_client_options(),
                     )
 
                     uri = f"{settings.QDRANT_DATABASE_HOST}:{settings.QDRANT_DATABASE_PORT}"
 
                 logger.info(f"Connection to Qdrant DB with URI successful: {uri}")
-            except UnexpectedResponse:
+            except RESPONSE_ERRORS:
                 logger.exception(
                     "Couldn't connect to Qdrant.",
                     host=settings.QDRANT_DATABASE_HOST,
@@ -40,4 +110,109 @@ class QdrantDatabaseConnector:
         return cls._instance
 
 
-connection = QdrantDatabaseConnector()
+class ThreadedAsyncQdrantClient:
+    """
+    Exposes the methods of a sync client as coroutines run in the default thread pool.
+
+    qdrant-client's local mode and the embedded store keep the points inside the process, so the async code must go
+    through the same client as the sync one to see the same data. The local mode isn't thread-safe, so the calls are
+    serialized.
+    """
+
+    def __init__(self, client: QdrantClient | EmbeddedVectorStore) -> None:
+        self._client = client
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attribute(*args, **kwargs)
+
+        async def run(*args, **kwargs):
+            return await asyncio.to_thread(call, *args, **kwargs)
+
+        return run
+
+
+class AsyncQdrantDatabaseConnector:
+    _instance: AsyncQdrantClient | ThreadedAsyncQdrantClient | None = None
+
+    def __new__(cls, *args, **kwargs) -> AsyncQdrantClient | ThreadedAsyncQdrantClient:
+        if cls._instance is None:
+            if settings.QDRANT_EMBEDDED_PATH or settings.QDRANT_LOCAL_PATH:
+                cls._instance = ThreadedAsyncQdrantClient(QdrantDatabaseConnector())
+
+                uri = settings.QDRANT_EMBEDDED_PATH or settings.QDRANT_LOCAL_PATH
+            elif settings.USE_QDRANT_CLOUD:
+                cls._instance = AsyncQdrantClient(
+                    url=settings.QDRANT_CLOUD_URL,
+                    api_key=settings.QDRANT_APIKEY,
+                    **get_client_options(),
+                )
+
+                uri = settings.QDRANT_CLOUD_URL
+            else:
+                cls._instance = AsyncQdrantClient(
+                    host=settings.QDRANT_DATABASE_HOST,
+                    port=settings.QDRANT_DATABASE_PORT,
+                    **get_client_options(),
+                )
+
+                uri = f"{settings.QDRANT_DATABASE_HOST}:{settings.QDRANT_DATABASE_PORT}"
+
+            logger.info(f"Async client of Qdrant DB created with URI: {uri}")
+
+        return cls._instance
+
+
+class LazyQdrantClient:
+    """
+    Proxies the client of a connector, which is only created on its first use.
+
+    Importing the code base then doesn't open any connection, so the prefork server can import the app before forking
+    its workers: each worker creates its own gRPC channel and connection pool.
+    """
+
+    def __init__(self, connector: type[QdrantDatabaseConnector] | type[AsyncQdrantDatabaseConnector]) -> None:
+        self._connector = connector
+
+    def __getattr__(self, name: str):
+        return getattr(self._connector(), name)
+
+
+def _forget_remote_clients() -> None:
+    """
+    The gRPC channels and HTTP connections of a parent process don't survive a fork, so the children of a process
+    which already used Qdrant create their own clients. The in-process stores are kept, as they hold the points.
+    """
+
+    if not (settings.QDRANT_EMBEDDED_PATH or settings.QDRANT_LOCAL_PATH):
+        QdrantDatabaseConnector._instance = None
+        AsyncQdrantDatabaseConnector._instance = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_remote_clients)
+
+
+connection = LazyQdrantClient(QdrantDatabaseConnector)
+aconnection = LazyQdrantClient(AsyncQdrantDatabaseConnector)
+
+
+def is_retryable_qdrant_error(error: Exception) -> bool:
+    """Connection errors, timeouts, rate limits and server errors are transient, client errors are not."""
+
+    if isinstance(error, ResponseHandlingException):
+        return True
+
+    if isinstance(error, UnexpectedResponse):
+        return error.status_code in (408, 429) or error.status_code >= 500
+
+    if isinstance(error, grpc.RpcError) and hasattr(error, "code"):
+        return error.code() in RETRYABLE_GRPC_STATUS_CODES
+
+    return False
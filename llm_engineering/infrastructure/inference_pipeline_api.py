@@ -1,18 +1,45 @@
-import opik
-from fastapi import FastAPI, HTTPException
-from opik import opik_context
-from pydantic import BaseModel
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import cache, partial
+from itertools import repeat
+from typing import AsyncIterator, Callable, Iterator
+
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from loguru import logger
+from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
 from llm_engineering import settings
+from llm_engineering.application.preprocessing import EmbeddingDispatcher
+from llm_engineering.application.rag.answer_cache import AnswerCache
+from llm_engineering.application.rag.context_compression import ContextCompressor
+from llm_engineering.application.rag.context_packer import ContextPacker
 from llm_engineering.application.rag.retriever import ContextRetriever
 from llm_engineering.application.utils import misc
+from llm_engineering.application.utils.single_flight import SingleFlight, StreamSingleFlight
 from llm_engineering.domain.embedded_chunks import EmbeddedChunk
+from llm_engineering.domain.queries import EmbeddedQuery, Query
+from llm_engineering.infrastructure import metrics, tracing
 from llm_engineering.infrastructure.opik_utils import configure_opik
-from llm_engineering.model.inference import InferenceExecutor, LLMInferenceSagemakerEndpoint
+from llm_engineering.model.inference import InferenceExecutor, get_inference_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Run by every worker of the prefork server once forked, as opik's flush thread doesn't survive a fork.
+    configure_opik()
+
+    yield
+
 
-configure_opik()
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+answer_cache = AnswerCache()
+rag_flight: SingleFlight[str] = SingleFlight()
+rag_stream_flight = StreamSingleFlight()
 
 
 class QueryRequest(BaseModel):
@@ -23,44 +50,375 @@ class QueryResponse(BaseModel):
     answer: str
 
 
-@opik.track
+class BatchQueryRequest(BaseModel):
+    queries: list[str] = Field(min_length=1, max_length=settings.RAG_BATCH_MAX_QUERIES)
+
+
+class BatchQueryResponse(BaseModel):
+    answers: list[str]
+
+
+class SearchRequest(BaseModel):
+    query: str
+    k: int = Field(default=3, ge=3)
+    expand_to_n_queries: int = Field(default=3, gt=0)
+
+
+class BatchSearchRequest(BaseModel):
+    queries: list[str] = Field(min_length=1, max_length=settings.RAG_BATCH_MAX_QUERIES)
+    k: int = Field(default=3, ge=3)
+    expand_to_n_queries: int = Field(default=3, gt=0)
+
+
+class SearchedChunk(BaseModel):
+    id: str
+    category: str
+    content: str
+    platform: str
+    document_id: str
+    author_id: str
+    author_full_name: str
+    name: str | None = None
+    link: str | None = None
+
+    @classmethod
+    def from_chunk(cls, chunk: EmbeddedChunk) -> "SearchedChunk":
+        return cls(category=chunk.get_category(), **chunk.model_dump(exclude={"embedding", "metadata"}))
+
+
+class SearchResponse(BaseModel):
+    documents: list[SearchedChunk]
+
+
+class BatchSearchResponse(BaseModel):
+    results: list[list[SearchedChunk]]
+
+
+class EmbedRequest(BaseModel):
+    texts: list[str] = Field(min_length=1, max_length=settings.RAG_BATCH_MAX_QUERIES)
+
+
+class EmbedResponse(BaseModel):
+    model_id: str
+    embedding_size: int
+    embeddings: list[list[float]]
+
+
+@tracing.track
 def call_llm_service(query: str, context: str | None) -> str:
-    llm = LLMInferenceSagemakerEndpoint(
-        endpoint_name=settings.SAGEMAKER_ENDPOINT_INFERENCE, inference_component_name=None
-    )
-    answer = InferenceExecutor(llm, query, context).execute()
+    llm = get_inference_client()
+    with metrics.measure_stage("generation"):
+        answer = InferenceExecutor(llm, query, context).execute()
 
     return answer
 
 
-@opik.track
-def rag(query: str) -> str:
+def call_llm_service_stream(query: str, context: str | None) -> Iterator[str]:
+    llm = get_inference_client()
+    # Only opening the stream is measured, which is the latency until the generation starts.
+    with metrics.measure_stage("generation_stream_open"):
+        return InferenceExecutor(llm, query, context).execute_stream()
+
+
+@cache
+def _compute_num_prompt_template_tokens() -> int:
+    return misc.compute_num_tokens(InferenceExecutor.DEFAULT_PROMPT.format(query="", context=""))
+
+
+def compute_context_token_budget(query: str) -> int:
+    """
+    The context gets whatever is left from the LLM's input window after the prompt and the query. The prompt template
+    is tokenized once, so only the query is tokenized per request (the tokens merged across the query's boundaries
+    may be off by one).
+    """
+
+    num_prompt_tokens = _compute_num_prompt_template_tokens() + misc.compute_num_tokens(query)
+
+    return max(settings.MAX_INPUT_LENGTH - num_prompt_tokens, 0)
+
+
+def build_context(query: str, documents: list[EmbeddedChunk]) -> str:
+    with metrics.measure_stage("context_building"):
+        if settings.RAG_CONTEXT_COMPRESSION:
+            documents = ContextCompressor().generate(Query.from_str(query), documents)
+
+        return ContextPacker().pack(documents, max_tokens=compute_context_token_budget(query))
+
+
+@tracing.track
+def retrieve_documents(query: str) -> list[EmbeddedChunk]:
     retriever = ContextRetriever(mock=False)
-    documents = retriever.search(query, k=3)
-    context = EmbeddedChunk.to_context(documents)
 
-    answer = call_llm_service(query, context)
+    return retriever.search(query, k=3)
+
+
+@tracing.track
+def retrieve_context(query: str) -> str:
+    documents = retrieve_documents(query)
+    context = build_context(query, documents)
+
+    return context
 
-    opik_context.update_current_trace(
+
+def generate_answer(query: str, documents: list[EmbeddedChunk], context: str, use_cache: bool = True) -> str:
+    """
+    Calls the LLM service unless the same query was already answered from the same chunks. When the cache is
+    bypassed, the fresh answer still replaces the cached one.
+    """
+
+    if not settings.RAG_ANSWER_CACHE_ENABLED:
+        return call_llm_service(query, context)
+
+    cache_key = AnswerCache.compute_key(
+        query,
+        documents,
+        prompt=InferenceExecutor.DEFAULT_PROMPT,
+        parameters=InferenceExecutor.generation_parameters(),
+    )
+    answer = answer_cache.get(cache_key) if use_cache else None
+    if use_cache:
+        metrics.record_cache_lookup("answer", hit=answer is not None)
+    if answer is None:
+        answer = call_llm_service(query, context)
+        answer_cache.set(cache_key, answer)
+    else:
+        logger.info("Answer served from the cache.")
+
+    return answer
+
+
+@tracing.track
+def rag(query: str, use_cache: bool = True) -> str:
+    documents = retrieve_documents(query)
+    context = build_context(query, documents)
+
+    answer = generate_answer(query, documents, context, use_cache=use_cache)
+
+    tracing.update_current_trace(
         tags=["rag"],
         metadata={
             "model_id": settings.HF_MODEL_ID,
             "embedding_model_id": settings.TEXT_EMBEDDING_MODEL_ID,
             "temperature": settings.TEMPERATURE_INFERENCE,
-            "query_tokens": misc.compute_num_tokens(query),
-            "context_tokens": misc.compute_num_tokens(context),
-            "answer_tokens": misc.compute_num_tokens(answer),
         },
     )
+    # Counting the tokens is slow for long contexts, so it's done off the request path.
+    tracing.log_trace_scores_async(
+        lambda: dict(
+            zip(
+                ("query_tokens", "context_tokens", "answer_tokens"),
+                misc.compute_num_tokens_batch([query, context, answer]),
+                strict=True,
+            )
+        )
+    )
 
     return answer
 
 
+def open_rag_stream(query: str) -> Iterator[str]:
+    context = retrieve_context(query)
+
+    return call_llm_service_stream(query, context)
+
+
+def compute_flight_key(route: str, query: str, **params) -> tuple:
+    """Identical requests share the route, the whitespace and case normalized query and the parameters."""
+
+    normalized_query = " ".join(query.split()).casefold()
+
+    return (route, normalized_query, tuple(sorted(params.items())))
+
+
+def coalesce(route: str, query: str, fn: Callable[[], str], **params) -> str:
+    if not settings.RAG_REQUEST_COALESCING:
+        return fn()
+
+    return rag_flight.do(compute_flight_key(route, query, **params), fn)
+
+
+def coalesce_stream(route: str, query: str, open_stream: Callable[[], Iterator[str]], **params) -> Iterator[str]:
+    if not settings.RAG_REQUEST_COALESCING:
+        return open_stream()
+
+    return rag_stream_flight.subscribe(compute_flight_key(route, query, **params), open_stream)
+
+
+@tracing.track
+def rag_batch(queries: list[str], use_cache: bool = True) -> list[str]:
+    retriever = ContextRetriever(mock=False)
+    documents_batch = retriever.search_batch(queries, k=3)
+    contexts = [build_context(query, documents) for query, documents in zip(queries, documents_batch, strict=True)]
+
+    # TGI batches the concurrent requests on the GPU, so we keep several generations in flight.
+    with ThreadPoolExecutor(max_workers=settings.RAG_BATCH_GENERATION_WORKERS) as executor:
+        answers = list(
+            executor.map(
+                tracing.propagate_context(generate_answer), queries, documents_batch, contexts, repeat(use_cache)
+            )
+        )
+
+    tracing.update_current_trace(
+        tags=["rag", "batch"],
+        metadata={
+            "model_id": settings.HF_MODEL_ID,
+            "embedding_model_id": settings.TEXT_EMBEDDING_MODEL_ID,
+            "temperature": settings.TEMPERATURE_INFERENCE,
+            "num_queries": len(queries),
+        },
+    )
+
+    return answers
+
+
+@tracing.track
+async def search(query: str, k: int = 3, expand_to_n_queries: int = 3) -> list[EmbeddedChunk]:
+    retriever = ContextRetriever(mock=False)
+
+    return await retriever.asearch(query, k=k, expand_to_n_queries=expand_to_n_queries)
+
+
+@tracing.track
+async def search_batch(queries: list[str], k: int = 3, expand_to_n_queries: int = 3) -> list[list[EmbeddedChunk]]:
+    retriever = ContextRetriever(mock=False)
+
+    return await retriever.asearch_batch(queries, k=k, expand_to_n_queries=expand_to_n_queries)
+
+
+def embed(texts: list[str]) -> list[EmbeddedQuery]:
+    queries = [Query.from_str(text) for text in texts]
+
+    return EmbeddingDispatcher.dispatch(queries)
+
+
+def use_answer_cache(cache_control: str | None) -> bool:
+    """Clients bypass the answer cache with the 'Cache-Control: no-cache' (or 'no-store') header."""
+
+    if cache_control is None:
+        return True
+
+    directives = {directive.strip().lower() for directive in cache_control.split(",")}
+
+    return not directives & {"no-cache", "no-store"}
+
+
+@app.middleware("http")
+async def measure_requests(request: Request, call_next):
+    # Unknown paths share a single label value, so scanners can't blow up the number of time series.
+    path = request.url.path if request.url.path in known_paths else "other"
+    start_time = time.perf_counter()
+    status = "500"
+    with metrics.http_requests_in_flight.track_in_progress(route=path):
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+
+            return response
+        finally:
+            metrics.http_request_latency_seconds.observe(time.perf_counter() - start_time, route=path, status=status)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/rag", response_model=QueryResponse)
-async def rag_endpoint(request: QueryRequest):
+async def rag_endpoint(request: QueryRequest, cache_control: str | None = Header(default=None)):
     try:
-        answer = rag(query=request.query)
+        use_cache = use_answer_cache(cache_control)
+        answer = await run_in_threadpool(
+            coalesce, "/rag", request.query, partial(rag, request.query, use_cache), use_cache=use_cache
+        )
 
         return {"answer": answer}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@app.post("/rag/batch", response_model=BatchQueryResponse)
+async def rag_batch_endpoint(request: BatchQueryRequest, cache_control: str | None = Header(default=None)):
+    try:
+        answers = await run_in_threadpool(rag_batch, request.queries, use_answer_cache(cache_control))
+
+        return {"answers": answers}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@app.post("/search", response_model=SearchResponse)
+async def search_endpoint(request: SearchRequest):
+    try:
+        documents = await search(request.query, request.k, request.expand_to_n_queries)
+
+        return {"documents": [SearchedChunk.from_chunk(document) for document in documents]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@app.post("/search/batch", response_model=BatchSearchResponse)
+async def search_batch_endpoint(request: BatchSearchRequest):
+    try:
+        documents_batch = await search_batch(request.queries, request.k, request.expand_to_n_queries)
+
+        return {
+            "results": [[SearchedChunk.from_chunk(document) for document in documents] for documents in documents_batch]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@app.post("/embed", response_model=EmbedResponse)
+async def embed_endpoint(request: EmbedRequest):
+    try:
+        embedded_queries = await run_in_threadpool(embed, request.texts)
+
+        return {
+            "model_id": settings.TEXT_EMBEDDING_MODEL_ID,
+            "embedding_size": len(embedded_queries[0].embedding),
+            "embeddings": [embedded_query.embedding for embedded_query in embedded_queries],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@app.post("/rag/stream")
+async def rag_stream_endpoint(request: QueryRequest, http_request: Request):
+    try:
+        tokens = await run_in_threadpool(
+            coalesce_stream, "/rag/stream", request.query, partial(open_rag_stream, request.query)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    return StreamingResponse(_to_server_sent_events(tokens, http_request), media_type="text/event-stream")
+
+
+async def _to_server_sent_events(tokens: Iterator[str], http_request: Request) -> AsyncIterator[str]:
+    """
+    Forwards the generated tokens as Server-Sent Events. The upstream stream is always closed on exit, so a client
+    disconnect (or a cancelled response) also cancels the generation on the LLM endpoint.
+    """
+
+    try:
+        async for token in iterate_in_threadpool(tokens):
+            if await http_request.is_disconnected():
+                logger.info("Client disconnected. Cancelling the streaming generation.")
+
+                break
+
+            yield f"event: token\ndata: {json.dumps({'token': token})}\n\n"
+        else:
+            yield "event: end\ndata: {}\n\n"
+    except Exception as e:
+        logger.exception("Streaming inference failed.")
+
+        yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    finally:
+        close = getattr(tokens, "close", None)
+        if close is not None:
+            close()
+
+
+# Defined after all the routes are registered.
+known_paths = {route.path for route in app.routes}
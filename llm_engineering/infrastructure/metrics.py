@@ -0,0 +1,401 @@
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from loguru import logger
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric:
+    """
+    Base class of the in-process metrics, exposed in the Prometheus text format.
+
+    Every metric is identified by its name and a fixed set of label names. The values of every label combination are
+    stored behind a single lock, so updating a metric costs a dictionary lookup and a few additions.
+    """
+
+    type: str = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict[str, str]) -> tuple[str, ...]:
+        assert labels.keys() == set(self.labelnames), f"{self.name} expects the labels {self.labelnames}."
+
+        return tuple(str(labels[labelname]) for labelname in self.labelnames)
+
+    def _format_labels(self, label_values: tuple[str, ...], **extra_labels: str) -> str:
+        labels = {**dict(zip(self.labelnames, label_values, strict=True)), **extra_labels}
+        if len(labels) == 0:
+            return ""
+
+        formatted_labels = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items())
+
+        return f"{{{formatted_labels}}}"
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}", *self._render_samples()]
+
+    def _render_samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def snapshot(self) -> list:
+        """The values of every label combination, serializable to JSON."""
+
+        raise NotImplementedError
+
+    def merge(self, snapshot: list) -> None:
+        """Adds the values of a snapshot (e.g., taken by another process) to the metric."""
+
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        raise NotImplementedError
+
+    def copy_empty(self) -> "Metric":
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        label_values = self._label_values(labels)
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0.0)
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+
+        return [f"{self.name}{self._format_labels(label_values)} {value}" for label_values, value in values]
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(label_values), value] for label_values, value in self._values.items()]
+
+    def merge(self, snapshot: list) -> None:
+        with self._lock:
+            for label_values, value in snapshot:
+                label_values = tuple(label_values)
+                self._values[label_values] = self._values.get(label_values, 0.0) + value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def copy_empty(self) -> "Counter":
+        return type(self)(self.name, self.documentation, self.labelnames)
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        label_values = self._label_values(labels)
+        with self._lock:
+            self._values[label_values] = value
+
+    @contextmanager
+    def track_in_progress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    """
+    A cumulative histogram with fixed buckets. The quantiles (e.g., p50, p95, p99) are estimated by linear
+    interpolation within the buckets, as Prometheus' `histogram_quantile()` does.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        label_values = self._label_values(labels)
+        bucket_index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(label_values)
+            if counts is None:
+                # The last bucket is the implicit +Inf one.
+                counts = self._counts[label_values] = [0] * (len(self.buckets) + 1)
+                self._sums[label_values] = 0.0
+            counts[bucket_index] += 1
+            self._sums[label_values] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            return sum(self._counts.get(self._label_values(labels), []))
+
+    def quantile(self, quantile: float, **labels: str) -> float | None:
+        with self._lock:
+            counts = list(self._counts.get(self._label_values(labels), []))
+
+        total = sum(counts)
+        if total == 0:
+            return None
+
+        rank = quantile * total
+        cumulative_count = 0
+        for bucket_index, count in enumerate(counts):
+            if cumulative_count + count >= rank and count > 0:
+                if bucket_index == len(self.buckets):
+                    return self.buckets[-1]
+
+                lower_bound = self.buckets[bucket_index - 1] if bucket_index > 0 else 0.0
+                upper_bound = self.buckets[bucket_index]
+
+                return lower_bound + (upper_bound - lower_bound) * (rank - cumulative_count) / count
+            cumulative_count += count
+
+        return self.buckets[-1]
+
+    def _render_samples(self) -> list[str]:
+        with self._lock:
+            counts = {label_values: list(bucket_counts) for label_values, bucket_counts in self._counts.items()}
+            sums = dict(self._sums)
+
+        samples = []
+        for label_values, bucket_counts in counts.items():
+            cumulative_count = 0
+            for upper_bound, count in zip((*self.buckets, math.inf), bucket_counts, strict=True):
+                cumulative_count += count
+                le = "+Inf" if upper_bound == math.inf else repr(upper_bound)
+                samples.append(f"{self.name}_bucket{self._format_labels(label_values, le=le)} {cumulative_count}")
+            samples.append(f"{self.name}_sum{self._format_labels(label_values)} {sums[label_values]}")
+            samples.append(f"{self.name}_count{self._format_labels(label_values)} {cumulative_count}")
+
+        return samples
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [
+                [list(label_values), list(counts), self._sums[label_values]]
+                for label_values, counts in self._counts.items()
+            ]
+
+    def merge(self, snapshot: list) -> None:
+        with self._lock:
+            for label_values, counts, sum_ in snapshot:
+                label_values = tuple(label_values)
+                merged_counts = self._counts.setdefault(label_values, [0] * (len(self.buckets) + 1))
+                for bucket_index, count in enumerate(counts):
+                    merged_counts[bucket_index] += count
+                self._sums[label_values] = self._sums.get(label_values, 0.0) + sum_
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+    def copy_empty(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, self.labelnames, buckets=self.buckets)
+
+
+class MetricsRegistry:
+    """
+    The metrics of the process. Under the prefork server, every worker only counts its own requests, so each of them
+    calls `enable_multiprocess()` once forked: its metrics are then periodically written to `<directory>/<pid>.json`
+    and all the files are merged when rendering, whatever the worker serving the scrape. The files of the dead
+    workers are kept (without their gauges, see `mark_process_dead()`), so the counters never go backwards.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+        self._multiprocess_dir: Path | None = None
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            assert metric.name not in self._metrics, f"The metric {metric.name} is already registered."
+
+            self._metrics[metric.name] = metric
+
+        return metric
+
+    def enable_multiprocess(self, directory: Path, flush_interval_seconds: float | None = None) -> None:
+        """
+        Shares the metrics of this process through `directory`. The values inherited from the parent process are
+        dropped, as they are not this process' own. With `flush_interval_seconds`, a thread writes them that often
+        (they are also written on every render), otherwise call `flush()`.
+        """
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+        self._multiprocess_dir = Path(directory)
+        self.flush()
+
+        if flush_interval_seconds is not None:
+            threading.Thread(
+                target=self._flush_periodically, args=(flush_interval_seconds,), name="metrics-flush", daemon=True
+            ).start()
+
+    def flush(self) -> None:
+        if self._multiprocess_dir is None:
+            return
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        snapshot = {metric.name: {"type": metric.type, "samples": metric.snapshot()} for metric in metrics}
+
+        # Written to a temporary file first, so the other workers never read a partial file.
+        path = self._multiprocess_dir / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(snapshot))
+        tmp_path.replace(path)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        if self._multiprocess_dir is not None:
+            self.flush()
+            metrics = self._merge_processes(metrics)
+
+        return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+    def _merge_processes(self, metrics: list[Metric]) -> list[Metric]:
+        merged_metrics = {metric.name: metric.copy_empty() for metric in metrics}
+        for path in sorted(self._multiprocess_dir.glob("*.json")):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                logger.exception(f"Couldn't read the metrics of '{path}'.")
+
+                continue
+
+            for name, metric_snapshot in snapshot.items():
+                if name in merged_metrics:
+                    merged_metrics[name].merge(metric_snapshot["samples"])
+
+        return list(merged_metrics.values())
+
+    def _flush_periodically(self, interval_seconds: float) -> None:
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Couldn't write the metrics of the process.")
+
+
+def mark_process_dead(directory: Path, pid: int) -> None:
+    """
+    Drops the gauges of a dead process from its metrics file, as nothing is in flight in it anymore. Its counters and
+    histograms are kept, so the totals don't go backwards when a worker is restarted.
+    """
+
+    path = Path(directory) / f"{pid}.json"
+    try:
+        snapshot = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return
+
+    snapshot = {name: metric for name, metric in snapshot.items() if metric["type"] != Gauge.type}
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(snapshot))
+    tmp_path.replace(path)
+
+
+registry = MetricsRegistry()
+
+stage_latency_seconds: Histogram = registry.register(
+    Histogram("rag_stage_latency_seconds", "Latency of the RAG stages.", labelnames=("stage",))
+)
+stage_in_flight: Gauge = registry.register(
+    Gauge("rag_stage_in_flight", "Number of RAG stages currently running.", labelnames=("stage",))
+)
+stage_candidates_total: Counter = registry.register(
+    Counter("rag_stage_candidates_total", "Number of candidates produced by the RAG stages.", labelnames=("stage",))
+)
+cache_requests_total: Counter = registry.register(
+    Counter("rag_cache_requests_total", "Number of cache lookups.", labelnames=("cache", "result"))
+)
+http_request_latency_seconds: Histogram = registry.register(
+    Histogram("http_request_latency_seconds", "Latency of the HTTP requests.", labelnames=("route", "status"))
+)
+http_requests_in_flight: Gauge = registry.register(
+    Gauge("http_requests_in_flight", "Number of HTTP requests currently processed.", labelnames=("route",))
+)
+
+
+@contextmanager
+def measure_stage(stage: str) -> Iterator[None]:
+    """Records the latency and the in-flight count of a RAG stage."""
+
+    with stage_in_flight.track_in_progress(stage=stage), stage_latency_seconds.time(stage=stage):
+        yield
+
+
+def record_cache_lookup(cache: str, hit: bool, count: int = 1) -> None:
+    cache_requests_total.inc(count, cache=cache, result="hit" if hit else "miss")
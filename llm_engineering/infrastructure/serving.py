@@ -0,0 +1,281 @@
+import asyncio
+import gc
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+import uvicorn
+from loguru import logger
+
+from llm_engineering.infrastructure import metrics
+from llm_engineering.settings import settings
+
+
+def preload_models() -> None:
+    """
+    Loads the models used by the RAG service, so forked workers share their weights copy-on-write.
+
+    Only the weights are loaded. No forward pass is run in the parent process, as the OpenMP thread pools used by
+    PyTorch are not fork-safe. Afterwards, all the objects are moved to the permanent GC generation, so the garbage
+    collector of the workers doesn't write to (and copy) the pages holding them.
+    """
+
+    from llm_engineering.application.networks import CrossEncoderModelSingleton, EmbeddingModelSingleton
+    from llm_engineering.application.utils import misc
+
+    logger.info("Preloading the embedding, cross-encoder and tokenizer models.")
+
+    EmbeddingModelSingleton()
+    CrossEncoderModelSingleton()
+    misc.get_tokenizer(settings.HF_MODEL_ID)
+
+    gc.collect()
+    gc.freeze()
+
+
+def warm_up_models() -> None:
+    from llm_engineering.application.networks import CrossEncoderModelSingleton, EmbeddingModelSingleton
+
+    EmbeddingModelSingleton()("warm up")
+    CrossEncoderModelSingleton()([("warm up", "warm up")])
+
+
+def read_memory_usage(pid: int) -> dict[str, int]:
+    """
+    Returns the RSS, PSS (shared pages are split between the processes sharing them) and USS (private pages) of a
+    process, in bytes. Only supported on Linux.
+    """
+
+    memory_usage = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        name, value = line.split(":", 1)
+        memory_usage[name] = int(value.split()[0]) * 1024
+
+    return {
+        "rss": memory_usage["Rss"],
+        "pss": memory_usage["Pss"],
+        "uss": memory_usage["Private_Clean"] + memory_usage["Private_Dirty"],
+    }
+
+
+class PreforkServer:
+    """
+    Serves an ASGI app from N forked uvicorn workers sharing a single listening socket.
+
+    The app and the models must be loaded before calling `run()`, so the workers inherit them copy-on-write instead
+    of loading their own copy. Only the model weights are shared: the Qdrant clients are created on first use and
+    opik is configured by the app's lifespan, so every worker opens its own connections and starts its own threads.
+    The parent process only supervises the workers: it restarts the ones that die and stops all of them on SIGINT or
+    SIGTERM. Send SIGUSR1 to the parent to log the memory usage of every worker. Workers dying within
+    `min_worker_uptime` seconds of their start (e.g., failing to load) are restarted with an exponential backoff, from
+    `restart_delay` up to `max_restart_delay` seconds, so a crash loop doesn't fork them over and over.
+
+    The workers share their metrics through `metrics_dir` (a temporary directory by default), so whichever worker
+    serves `/metrics` exposes the totals of all of them.
+    """
+
+    def __init__(
+        self,
+        app,
+        host: str = settings.ML_SERVICE_HOST,
+        port: int = settings.ML_SERVICE_PORT,
+        workers: int = settings.ML_SERVICE_WORKERS,
+        threads_per_worker: int = settings.ML_SERVICE_THREADS_PER_WORKER,
+        torch_threads_per_worker: int | None = settings.ML_SERVICE_TORCH_THREADS_PER_WORKER,
+        graceful_timeout: float = 30.0,
+        metrics_dir: str | None = settings.ML_SERVICE_METRICS_DIR,
+        min_worker_uptime: float = 10.0,
+        restart_delay: float = 1.0,
+        max_restart_delay: float = 60.0,
+    ) -> None:
+        assert workers > 0, "At least one worker is required."
+
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.torch_threads_per_worker = torch_threads_per_worker or max((os.cpu_count() or 1) // workers, 1)
+        self.graceful_timeout = graceful_timeout
+        self.metrics_dir = metrics_dir
+        self.min_worker_uptime = min_worker_uptime
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+
+        # The start time of every worker, by PID.
+        self._worker_pids: dict[int, float] = {}
+        self._num_consecutive_crashes = 0
+        self._next_spawn_time = float("-inf")
+        self._metrics_dir: Path | None = None
+        self._should_exit = False
+        self._should_log_memory_usage = False
+
+    def run(self) -> None:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+
+        self._metrics_dir = self._prepare_metrics_dir()
+
+        logger.info(
+            f"Serving on http://{self.host}:{self.port} with {self.workers} workers, "
+            f"{self.threads_per_worker} threads and {self.torch_threads_per_worker} torch threads per worker."
+        )
+
+        signal.signal(signal.SIGINT, self._handle_exit)
+        signal.signal(signal.SIGTERM, self._handle_exit)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._handle_log_memory_usage)
+
+        try:
+            while not self._should_exit:
+                self._reap_workers()
+                while (
+                    len(self._worker_pids) < self.workers
+                    and not self._should_exit
+                    and time.monotonic() >= self._next_spawn_time
+                ):
+                    self._spawn_worker(sock)
+
+                if self._should_log_memory_usage:
+                    self._should_log_memory_usage = False
+                    self.log_memory_usage()
+
+                time.sleep(0.5)
+        finally:
+            self._stop_workers()
+            sock.close()
+            if self.metrics_dir is None:
+                shutil.rmtree(self._metrics_dir, ignore_errors=True)
+
+    def log_memory_usage(self) -> None:
+        processes = {"parent": os.getpid(), **{f"worker {pid}": pid for pid in sorted(self._worker_pids)}}
+        for name, pid in processes.items():
+            try:
+                memory_usage = read_memory_usage(pid)
+            except (OSError, KeyError):
+                logger.warning(f"Couldn't read the memory usage of the {name} process.")
+
+                continue
+
+            formatted_memory_usage = ", ".join(
+                f"{key.upper()}={value / 2**20:.0f}MiB" for key, value in memory_usage.items()
+            )
+            logger.info(f"Memory usage of the {name} process: {formatted_memory_usage}")
+
+    def _prepare_metrics_dir(self) -> Path:
+        if self.metrics_dir is None:
+            return Path(tempfile.mkdtemp(prefix="ml-service-metrics-"))
+
+        # The metrics of a previous run would be added to the ones of this run.
+        metrics_dir = Path(self.metrics_dir)
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        for path in metrics_dir.glob("*.json"):
+            path.unlink()
+
+        return metrics_dir
+
+    def _spawn_worker(self, sock: socket.socket) -> None:
+        pid = os.fork()
+        if pid != 0:
+            self._worker_pids[pid] = time.monotonic()
+
+            return
+
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+            self._run_worker(sock)
+        except BaseException:
+            logger.exception("The worker failed.")
+
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _run_worker(self, sock: socket.socket) -> None:
+        metrics.registry.enable_multiprocess(
+            self._metrics_dir, flush_interval_seconds=settings.ML_SERVICE_METRICS_FLUSH_SECONDS
+        )
+
+        try:
+            import torch
+
+            torch.set_num_threads(self.torch_threads_per_worker)
+        except ImportError:
+            pass
+
+        warm_up_models()
+
+        config = uvicorn.Config(self.app, log_config=None, timeout_graceful_shutdown=int(self.graceful_timeout))
+        server = uvicorn.Server(config)
+
+        async def serve() -> None:
+            import anyio.to_thread
+
+            # The blocking parts of the requests (retrieval, reranking, LLM calls) run in this thread pool.
+            anyio.to_thread.current_default_thread_limiter().total_tokens = self.threads_per_worker
+
+            await server.serve(sockets=[sock])
+
+        asyncio.run(serve())
+
+    def _reap_workers(self) -> None:
+        while self._worker_pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._worker_pids.clear()
+
+                return
+
+            if pid == 0:
+                return
+
+            start_time = self._worker_pids.pop(pid, None)
+            metrics.mark_process_dead(self._metrics_dir, pid)
+            if self._should_exit:
+                continue
+
+            now = time.monotonic()
+            if start_time is not None and now - start_time < self.min_worker_uptime:
+                self._num_consecutive_crashes += 1
+                delay = min(self.restart_delay * 2 ** (self._num_consecutive_crashes - 1), self.max_restart_delay)
+                self._next_spawn_time = max(self._next_spawn_time, now + delay)
+
+                logger.warning(
+                    f"Worker {pid} exited with status {status} {now - start_time:.1f}s after its start. "
+                    f"Restarting it in {delay:.1f}s."
+                )
+            else:
+                self._num_consecutive_crashes = 0
+
+                logger.warning(f"Worker {pid} exited with status {status}. Restarting it.")
+
+    def _stop_workers(self) -> None:
+        for pid in self._worker_pids:
+            os.kill(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while self._worker_pids and time.monotonic() < deadline:
+            self._reap_workers()
+            time.sleep(0.1)
+
+        for pid in self._worker_pids:
+            logger.warning(f"Worker {pid} didn't stop in time. Killing it.")
+
+            os.kill(pid, signal.SIGKILL)
+
+    def _handle_exit(self, signum, frame) -> None:
+        self._should_exit = True
+
+    def _handle_log_memory_usage(self, signum, frame) -> None:
+        self._should_log_memory_usage = True
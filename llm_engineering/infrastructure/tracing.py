@@ -0,0 +1,265 @@
+import contextvars
+import functools
+import inspect
+import os
+import queue
+import random
+import threading
+from typing import Any, Callable, TypeVar
+
+import opik
+from loguru import logger
+from opik import opik_context
+from opik.api_objects import opik_client
+from pydantic import BaseModel
+
+from llm_engineering.settings import settings
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# The sampling decision of the current trace. None means that we are not inside a trace yet.
+_is_sampled: contextvars.ContextVar[bool | None] = contextvars.ContextVar("is_sampled", default=None)
+
+
+def is_sampled() -> bool:
+    return settings.TRACING_MODE != "off" and _is_sampled.get() is True
+
+
+def track(name: str | Callable | None = None, capture_input: bool = True, capture_output: bool = True):
+    """
+    A low-overhead replacement of `opik.track`.
+
+    - Head-based sampling: the outermost tracked call decides whether the whole trace is sampled, with a probability
+      of `TRACING_SAMPLE_RATE`. The nested calls of an unsampled trace run the bare function.
+    - Payload caps: inputs and outputs are truncated (see `truncate_payload`) before being handed to Opik.
+    - No-op mode: with `TRACING_MODE=off`, the function is returned undecorated.
+
+    The spans are sent to Opik by its background workers, so nothing is flushed on the request path. It can be used
+    as `@track` or `@track(name=...)`, on regular and async (non-generator) functions.
+    """
+
+    if callable(name):
+        return track()(name)
+
+    def decorator(fn: F) -> F:
+        if settings.TRACING_MODE == "off":
+            return fn
+
+        signature = inspect.signature(fn)
+
+        if inspect.iscoroutinefunction(fn):
+            return _track_async(fn, signature, name, capture_input, capture_output)
+
+        @functools.wraps(fn)
+        def traced_fn(*args, **kwargs):
+            if capture_input:
+                opik_context.update_current_span(input=_capture_arguments(signature, args, kwargs))
+
+            output = fn(*args, **kwargs)
+
+            if capture_output:
+                opik_context.update_current_span(output={"output": truncate_payload(output)})
+
+            return output
+
+        tracked_fn = opik.track(name=name or fn.__name__, capture_input=False, capture_output=False)(traced_fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            sampled = _is_sampled.get()
+            if sampled is False:
+                return fn(*args, **kwargs)
+            if sampled is True:
+                return tracked_fn(*args, **kwargs)
+
+            sampled = random.random() < settings.TRACING_SAMPLE_RATE
+            token = _is_sampled.set(sampled)
+            try:
+                return tracked_fn(*args, **kwargs) if sampled else fn(*args, **kwargs)
+            finally:
+                _is_sampled.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def _track_async(fn: F, signature: inspect.Signature, name: str | None, capture_input: bool, capture_output: bool) -> F:
+    @functools.wraps(fn)
+    async def traced_fn(*args, **kwargs):
+        if capture_input:
+            opik_context.update_current_span(input=_capture_arguments(signature, args, kwargs))
+
+        output = await fn(*args, **kwargs)
+
+        if capture_output:
+            opik_context.update_current_span(output={"output": truncate_payload(output)})
+
+        return output
+
+    tracked_fn = opik.track(name=name or fn.__name__, capture_input=False, capture_output=False)(traced_fn)
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        sampled = _is_sampled.get()
+        if sampled is False:
+            return await fn(*args, **kwargs)
+        if sampled is True:
+            return await tracked_fn(*args, **kwargs)
+
+        sampled = random.random() < settings.TRACING_SAMPLE_RATE
+        token = _is_sampled.set(sampled)
+        try:
+            return await (tracked_fn(*args, **kwargs) if sampled else fn(*args, **kwargs))
+        finally:
+            _is_sampled.reset(token)
+
+    return wrapper
+
+
+def propagate_context(fn: F) -> F:
+    """
+    Runs `fn` in a copy of the caller's context, so the calls made from a thread pool join the caller's trace and
+    sampling decision instead of starting new ones.
+    """
+
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def update_current_trace(**kwargs) -> None:
+    if is_sampled():
+        opik_context.update_current_trace(**kwargs)
+
+
+def log_trace_scores_async(compute_scores: Callable[[], dict[str, float]]) -> None:
+    """
+    Computes the numerical scores of the current trace (e.g., the number of tokens) in a background thread and
+    attaches them to the trace. Nothing is computed for unsampled traces.
+    """
+
+    if not is_sampled():
+        return
+
+    trace_data = opik_context.get_current_trace_data()
+    if trace_data is None:
+        return
+
+    trace_scores_queue.submit(trace_data.id, compute_scores)
+
+
+def truncate_payload(
+    value: Any,
+    max_length: int | None = None,
+    max_items: int | None = None,
+    max_depth: int = 4,
+) -> Any:
+    """
+    Shrinks a payload before tracing it: strings are cut at `max_length` characters and sequences at `max_items`
+    items, while nested objects deeper than `max_depth` are replaced by their type name. Pydantic models are
+    converted field by field, so long fields such as embeddings are truncated before being serialized.
+    """
+
+    max_length = max_length if max_length is not None else settings.TRACING_MAX_PAYLOAD_LENGTH
+    max_items = max_items if max_items is not None else settings.TRACING_MAX_PAYLOAD_ITEMS
+
+    def truncate(value: Any, depth: int) -> Any:
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+
+        if isinstance(value, str):
+            if len(value) <= max_length:
+                return value
+
+            return f"{value[:max_length]}... ({len(value)} characters)"
+
+        if depth >= max_depth:
+            return f"<{type(value).__name__}>"
+
+        if isinstance(value, BaseModel):
+            return {key: truncate(item, depth + 1) for key, item in value}
+
+        if isinstance(value, dict):
+            truncated = {str(key): truncate(item, depth + 1) for key, item in list(value.items())[:max_items]}
+            if len(value) > max_items:
+                truncated["..."] = f"{len(value)} items"
+
+            return truncated
+
+        if isinstance(value, (list, tuple, set)):
+            items = list(value)
+            truncated = [truncate(item, depth + 1) for item in items[:max_items]]
+            if len(items) > max_items:
+                truncated.append(f"... ({len(items)} items)")
+
+            return truncated
+
+        return truncate(str(value), depth)
+
+    return truncate(value, 0)
+
+
+def _capture_arguments(signature: inspect.Signature, args: tuple, kwargs: dict) -> dict[str, Any]:
+    try:
+        arguments = signature.bind_partial(*args, **kwargs).arguments
+    except TypeError:
+        arguments = {"args": args, "kwargs": kwargs}
+
+    return {name: truncate_payload(value) for name, value in arguments.items() if name not in ("self", "cls")}
+
+
+class TraceScoresQueue:
+    """
+    A bounded queue drained by a background thread, which computes the scores of the traces and logs them to Opik.
+
+    When the queue is full, the scores are dropped instead of slowing down the requests. The thread is started
+    lazily in every process, so it also works in forked workers.
+    """
+
+    def __init__(self, max_size: int = settings.TRACING_QUEUE_MAX_SIZE) -> None:
+        self._queue: queue.Queue[tuple[str, Callable[[], dict[str, float]]]] = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._worker_pid: int | None = None
+
+    def submit(self, trace_id: str, compute_scores: Callable[[], dict[str, float]]) -> None:
+        self._ensure_worker()
+
+        try:
+            self._queue.put_nowait((trace_id, compute_scores))
+        except queue.Full:
+            logger.warning("The trace scores queue is full. Dropping the scores of the trace.")
+
+    def join(self) -> None:
+        """Waits until all the submitted scores are logged."""
+
+        self._queue.join()
+
+    def _ensure_worker(self) -> None:
+        if self._worker_pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._worker_pid != os.getpid():
+                threading.Thread(target=self._run, name="trace-scores", daemon=True).start()
+                self._worker_pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            trace_id, compute_scores = self._queue.get()
+            try:
+                scores = compute_scores()
+                opik_client.get_client_cached().log_traces_feedback_scores(
+                    [{"id": trace_id, "name": name, "value": value} for name, value in scores.items()]
+                )
+            except Exception:
+                logger.exception("Couldn't log the scores of the trace.")
+            finally:
+                self._queue.task_done()
+
+
+trace_scores_queue = TraceScoresQueue()
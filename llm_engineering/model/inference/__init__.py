@@ -1,4 +1,14 @@
+from .factory import InferenceClientFactory, get_inference_client
 from .inference import LLMInferenceSagemakerEndpoint
 from .run import InferenceExecutor
+from .streaming import TokenStream
+from .tgi import LLMInferenceTGIEndpoint
 
-__all__ = ["LLMInferenceSagemakerEndpoint", "InferenceExecutor"]
+__all__ = [
+    "InferenceClientFactory",
+    "get_inference_client",
+    "LLMInferenceSagemakerEndpoint",
+    "LLMInferenceTGIEndpoint",
+    "InferenceExecutor",
+    "TokenStream",
+]
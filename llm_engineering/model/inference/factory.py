@@ -0,0 +1,34 @@
+from functools import lru_cache
+
+from llm_engineering.domain.inference import Inference
+from llm_engineering.settings import settings
+
+from .resilience import Hedger
+
+
+class InferenceClientFactory:
+    @staticmethod
+    def create(backend: str) -> Inference:
+        hedger = (
+            Hedger(percentile=settings.LLM_INFERENCE_HEDGING_PERCENTILE) if settings.LLM_INFERENCE_HEDGING else None
+        )
+
+        if backend == "sagemaker":
+            from .inference import LLMInferenceSagemakerEndpoint
+
+            return LLMInferenceSagemakerEndpoint(
+                endpoint_name=settings.SAGEMAKER_ENDPOINT_INFERENCE, inference_component_name=None, hedger=hedger
+            )
+        elif backend == "tgi":
+            from .tgi import LLMInferenceTGIEndpoint
+
+            return LLMInferenceTGIEndpoint(urls=settings.TGI_ENDPOINT_URLS, hedger=hedger)
+        else:
+            raise ValueError(f"Unsupported inference backend: {backend}")
+
+
+@lru_cache(maxsize=None)
+def get_inference_client(backend: str | None = None) -> Inference:
+    """Returns the process-wide inference client, so all the requests share its connection pool."""
+
+    return InferenceClientFactory.create(backend or settings.LLM_INFERENCE_BACKEND)
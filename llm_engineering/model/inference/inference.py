@@ -1,10 +1,13 @@
 import json
+import threading
 from typing import Any, Dict, Optional
 
 from loguru import logger
 
 try:
     import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
 except ModuleNotFoundError:
     logger.warning("Couldn't load AWS or SageMaker imports. Run 'poetry install --with aws' to support AWS.")
 
@@ -12,86 +15,158 @@ except ModuleNotFoundError:
 from llm_engineering.domain.inference import Inference
 from llm_engineering.settings import settings
 
+from .resilience import Hedger, RetryPolicy
+from .streaming import TokenStream
+
+# Creating clients from the default boto3 session is not thread-safe.
+_boto3_client_lock = threading.Lock()
+
+
+def is_retryable_sagemaker_error(error: Exception) -> bool:
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return True
+
+    if isinstance(error, ClientError):
+        error_code = error.response.get("Error", {}).get("Code", "")
+        status_code = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+
+        return "Throttling" in error_code or status_code == 429 or status_code >= 500
+
+    return False
+
 
 class LLMInferenceSagemakerEndpoint(Inference):
     """
     Class for performing inference using a SageMaker endpoint for LLM schemas.
+
+    The payload is built per call, so one instance (and its pooled connections) can be shared between threads.
     """
 
     def __init__(
         self,
         endpoint_name: str,
-        default_payload: Optional[Dict[str, Any]] = None,
+        default_parameters: Optional[Dict[str, Any]] = None,
         inference_component_name: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedger: Optional[Hedger] = None,
     ) -> None:
-        super().__init__()
-
-        self.client = boto3.client(
-            "sagemaker-runtime",
-            region_name=settings.AWS_REGION,
-            aws_access_key_id=settings.AWS_ACCESS_KEY,
-            aws_secret_access_key=settings.AWS_SECRET_KEY,
-        )
+        super().__init__(default_parameters=default_parameters or self._default_parameters())
+
+        with _boto3_client_lock:
+            self.client = boto3.client(
+                "sagemaker-runtime",
+                region_name=settings.AWS_REGION,
+                aws_access_key_id=settings.AWS_ACCESS_KEY,
+                aws_secret_access_key=settings.AWS_SECRET_KEY,
+                config=Config(
+                    max_pool_connections=settings.LLM_INFERENCE_MAX_CONNECTIONS,
+                    connect_timeout=settings.LLM_INFERENCE_CONNECT_TIMEOUT,
+                    read_timeout=settings.LLM_INFERENCE_READ_TIMEOUT,
+                    tcp_keepalive=True,
+                    # Retries are handled by the retry policy, so they are bounded and jittered in a single place.
+                    retries={"total_max_attempts": 1, "mode": "standard"},
+                ),
+            )
         self.endpoint_name = endpoint_name
-        self.payload = default_payload if default_payload else self._default_payload()
         self.inference_component_name = inference_component_name
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_retries=settings.LLM_INFERENCE_MAX_RETRIES,
+            base_delay=settings.LLM_INFERENCE_RETRY_BASE_DELAY,
+            max_delay=settings.LLM_INFERENCE_RETRY_MAX_DELAY,
+            is_retryable=is_retryable_sagemaker_error,
+        )
+        self.hedger = hedger
 
-    def _default_payload(self) -> Dict[str, Any]:
+    @staticmethod
+    def _default_parameters() -> Dict[str, Any]:
         """
-        Generates the default payload for the inference request.
+        Generates the default parameters of the inference requests.
 
         Returns:
-            dict: The default payload.
+            dict: The default parameters.
         """
 
         return {
-            "inputs": "How is the weather?",
-            "parameters": {
-                "max_new_tokens": settings.MAX_NEW_TOKENS_INFERENCE,
-                "top_p": settings.TOP_P_INFERENCE,
-                "temperature": settings.TEMPERATURE_INFERENCE,
-                "return_full_text": False,
-            },
+            "max_new_tokens": settings.MAX_NEW_TOKENS_INFERENCE,
+            "top_p": settings.TOP_P_INFERENCE,
+            "temperature": settings.TEMPERATURE_INFERENCE,
+            "return_full_text": False,
         }
 
-    def set_payload(self, inputs: str, parameters: Optional[Dict[str, Any]] = None) -> None:
+    def inference(self, inputs: str, parameters: Optional[Dict[str, Any]] = None) -> list[Dict[str, Any]]:
         """
-        Sets the payload for the inference request.
+        Performs the inference request using the SageMaker endpoint.
 
         Args:
             inputs (str): The input text for the inference.
-            parameters (dict, optional): Additional parameters for the inference. Defaults to None.
+            parameters (dict, optional): Parameters overriding the default ones. Defaults to None.
+
+        Returns:
+            list[dict]: The response from the inference request.
+        Raises:
+            Exception: If an error occurs during the inference request.
         """
 
-        self.payload["inputs"] = inputs
-        if parameters:
-            self.payload["parameters"].update(parameters)
+        payload = self.build_payload(inputs, parameters)
+
+        # SageMaker routes the requests to the instances itself, so the hedged request is sent like the primary one.
+        def invoke(_attempt: int = 0) -> list[Dict[str, Any]]:
+            return self.retry_policy.call(lambda: self._invoke(payload))
+
+        try:
+            logger.info("Inference request sent.")
+            if self.hedger is not None:
+                return self.hedger.call(invoke)
 
-    def inference(self) -> Dict[str, Any]:
+            return invoke()
+        except Exception:
+            logger.exception("SageMaker inference failed.")
+
+            raise
+
+    def _invoke(self, payload: Dict[str, Any]) -> list[Dict[str, Any]]:
+        response = self.client.invoke_endpoint(**self._invoke_args(payload))
+        response_body = response["Body"].read().decode("utf8")
+
+        return json.loads(response_body)
+
+    def inference_stream(self, inputs: str, parameters: Optional[Dict[str, Any]] = None) -> TokenStream:
         """
-        Performs the inference request using the SageMaker endpoint.
+        Performs a streaming inference request using the SageMaker endpoint's response stream API. Only opening the
+        stream is retried, as tokens that were already forwarded can't be taken back.
+
+        Args:
+            inputs (str): The input text for the inference.
+            parameters (dict, optional): Parameters overriding the default ones. Defaults to None.
 
         Returns:
-            dict: The response from the inference request.
+            TokenStream: An iterator over the generated tokens. Close it to cancel the generation.
         Raises:
-            Exception: If an error occurs during the inference request.
+            Exception: If an error occurs while opening the stream.
         """
 
+        payload = {**self.build_payload(inputs, parameters), "stream": True}
+
         try:
-            logger.info("Inference request sent.")
-            invoke_args = {
-                "EndpointName": self.endpoint_name,
-                "ContentType": "application/json",
-                "Body": json.dumps(self.payload),
-            }
-            if self.inference_component_name not in ["None", None]:
-                invoke_args["InferenceComponentName"] = self.inference_component_name
-            response = self.client.invoke_endpoint(**invoke_args)
-            response_body = response["Body"].read().decode("utf8")
-
-            return json.loads(response_body)
+            logger.info("Streaming inference request sent.")
+            response = self.retry_policy.call(
+                lambda: self.client.invoke_endpoint_with_response_stream(**self._invoke_args(payload))
+            )
+
+            return TokenStream.from_sagemaker_event_stream(response["Body"])
 
         except Exception:
-            logger.exception("SageMaker inference failed.")
+            logger.exception("SageMaker streaming inference failed.")
 
             raise
+
+    def _invoke_args(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        invoke_args = {
+            "EndpointName": self.endpoint_name,
+            "ContentType": "application/json",
+            "Body": json.dumps(payload),
+        }
+        if self.inference_component_name not in ["None", None]:
+            invoke_args["InferenceComponentName"] = self.inference_component_name
+
+        return invoke_args
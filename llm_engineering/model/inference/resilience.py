@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, TypeVar
+
+import numpy as np
+from loguru import logger
+
+V = TypeVar("V")
+
+
+class RetryPolicy:
+    """
+    Bounded retries with exponential backoff and full jitter.
+
+    Only the errors accepted by `is_retryable` are retried. The others, and the last failed attempt, are raised.
+    """
+
+    def __init__(
+        self,
+        max_retries: int,
+        base_delay: float,
+        max_delay: float,
+        is_retryable: Callable[[Exception], bool],
+    ) -> None:
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._is_retryable = is_retryable
+
+    def call(self, fn: Callable[[], V]) -> V:
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+                logger.warning(f"Request failed with {e!r}. Retrying in {delay:.2f}s (attempt {attempt + 1}).")
+
+                time.sleep(delay)
+                attempt += 1
+
+
+class LatencyTracker:
+    """A thread-safe rolling window of the latest request latencies (in seconds)."""
+
+    def __init__(self, window_size: int = 1000) -> None:
+        self._latencies: deque[float] = deque(maxlen=window_size)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+
+    def percentile(self, percentile: float, min_samples: int = 1) -> float | None:
+        with self._lock:
+            if len(self._latencies) < min_samples:
+                return None
+
+            latencies = np.fromiter(self._latencies, dtype=np.float64)
+
+        return float(np.percentile(latencies, percentile))
+
+
+class Hedger:
+    """
+    Request hedging: if a request is slower than the given latency percentile, a second (hedged) request is sent
+    and the first response wins.
+
+    `fn` receives the index of the attempt (0 for the primary request, 1 for the hedged one), so the hedged request
+    can be routed to another replica. Until `min_samples` latencies are recorded, no request is hedged. The slower
+    request is not interrupted, its result is ignored.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        latency_tracker: LatencyTracker | None = None,
+        min_samples: int = 20,
+        max_workers: int = 32,
+    ) -> None:
+        self._percentile = percentile
+        self._latency_tracker = latency_tracker or LatencyTracker()
+        self._min_samples = min_samples
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference-hedging")
+
+    def call(self, fn: Callable[[int], V]) -> V:
+        hedging_delay = self._latency_tracker.percentile(self._percentile, min_samples=self._min_samples)
+        if hedging_delay is None:
+            return self._timed(fn, 0)
+
+        futures: list[Future[V]] = [self._executor.submit(self._timed, fn, 0)]
+        done, _ = wait(futures, timeout=hedging_delay)
+        if not done:
+            logger.info(f"Inference request slower than p{self._percentile:g} ({hedging_delay:.2f}s). Hedging it.")
+
+            futures.append(self._executor.submit(self._timed, fn, 1))
+
+        pending = set(futures)
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+
+                error = future.exception()
+
+        raise error
+
+    def _timed(self, fn: Callable[[int], V], attempt: int) -> V:
+        start_time = time.perf_counter()
+        result = fn(attempt)
+        self._latency_tracker.record(time.perf_counter() - start_time)
+
+        return result
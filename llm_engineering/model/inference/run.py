@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+from typing import Iterator
+
 from llm_engineering.domain.inference import Inference
 from llm_engineering.settings import settings
 
 
 class InferenceExecutor:
+    DEFAULT_PROMPT = """
+You are a content creator. Write what the user asked you to while using the provided context as the primary source of information for the content.
+User query: {query}
+Context: {context}
+            """
+
     def __init__(
         self,
         llm: Inference,
@@ -16,24 +24,25 @@ class InferenceExecutor:
         self.query = query
         self.context = context if context else ""
 
-        if prompt is None:
-            self.prompt = """
-You are a content creator. Write what the user asked you to while using the provided context as the primary source of information for the content.
-User query: {query}
-Context: {context}
-            """
-        else:
-            self.prompt = prompt
+        self.prompt = prompt if prompt is not None else self.DEFAULT_PROMPT
 
     def execute(self) -> str:
-        self.llm.set_payload(
-            inputs=self.prompt.format(query=self.query, context=self.context),
-            parameters={
-                "max_new_tokens": settings.MAX_NEW_TOKENS_INFERENCE,
-                "repetition_penalty": 1.1,
-                "temperature": settings.TEMPERATURE_INFERENCE,
-            },
-        )
-        answer = self.llm.inference()[0]["generated_text"]
+        answer = self.llm.inference(inputs=self._format_prompt(), parameters=self.generation_parameters())[0][
+            "generated_text"
+        ]
 
         return answer
+
+    def execute_stream(self) -> Iterator[str]:
+        return self.llm.inference_stream(inputs=self._format_prompt(), parameters=self.generation_parameters())
+
+    @staticmethod
+    def generation_parameters() -> dict:
+        return {
+            "max_new_tokens": settings.MAX_NEW_TOKENS_INFERENCE,
+            "repetition_penalty": 1.1,
+            "temperature": settings.TEMPERATURE_INFERENCE,
+        }
+
+    def _format_prompt(self) -> str:
+        return self.prompt.format(query=self.query, context=self.context)
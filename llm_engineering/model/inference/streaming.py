@@ -0,0 +1,86 @@
+import json
+from typing import Any, Callable, Iterable, Iterator
+
+
+class TokenStream:
+    """
+    Iterates over the tokens of a streamed TGI response.
+
+    TGI sends Server-Sent Events lines (e.g., 'data:{"token": {"text": "..."}}') split across arbitrary chunks of
+    bytes, so the bytes are buffered until a full line is available. Calling `close()` closes the underlying HTTP
+    connection, which makes TGI stop the generation on the server side. It is safe to call it from another thread.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], close: Callable[[], None] | None = None) -> None:
+        self._chunks = iter(chunks)
+        self._close = close
+        self._buffer = b""
+        self._closed = False
+
+    @classmethod
+    def from_sagemaker_event_stream(cls, event_stream: Any) -> "TokenStream":
+        """Wraps the botocore EventStream returned by `invoke_endpoint_with_response_stream`."""
+
+        def iter_payload_parts() -> Iterator[bytes]:
+            for event in event_stream:
+                if "PayloadPart" in event:
+                    yield event["PayloadPart"]["Bytes"]
+                elif "ModelStreamError" in event or "InternalStreamFailure" in event:
+                    raise RuntimeError(f"SageMaker streaming inference failed: {event}")
+
+        return cls(iter_payload_parts(), close=getattr(event_stream, "close", None))
+
+    def __iter__(self) -> "TokenStream":
+        return self
+
+    def __next__(self) -> str:
+        while True:
+            line = self._next_line()
+            if not line.startswith(b"data:"):
+                continue
+
+            data = json.loads(line[len(b"data:") :])
+            if "error" in data:
+                raise RuntimeError(f"Streaming inference failed: {data['error']}")
+
+            token = data.get("token") or {}
+            if token.get("special", False):
+                continue
+
+            text = token.get("text")
+            if text:
+                return text
+
+    def _next_line(self) -> bytes:
+        while b"\n" not in self._buffer:
+            if self._closed:
+                raise StopIteration
+
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                if self._buffer.strip():
+                    line, self._buffer = self._buffer.strip(), b""
+
+                    return line
+
+                raise
+            except Exception:
+                if self._closed:
+                    raise StopIteration from None
+
+                raise
+
+            self._buffer += chunk
+
+        line, self._buffer = self._buffer.split(b"\n", 1)
+
+        return line.strip()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        if self._close is not None:
+            self._close()
@@ -0,0 +1,241 @@
+import threading
+import time
+from typing import Any, Collection, Dict, Optional
+
+import httpx
+from loguru import logger
+
+from llm_engineering.domain.inference import Inference
+from llm_engineering.settings import settings
+
+from .resilience import Hedger, RetryPolicy
+from .streaming import TokenStream
+
+
+def is_retryable_http_error(error: Exception) -> bool:
+    if isinstance(error, httpx.TransportError):
+        return True
+
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+
+        return status_code == 429 or status_code >= 500
+
+    return False
+
+
+class _Replica:
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.latency: float | None = None
+        self.num_in_flight = 0
+        self.num_consecutive_failures = 0
+
+
+class ReplicaRouter:
+    """
+    Latency-aware routing across the replicas of an endpoint.
+
+    Every replica is scored by its exponentially weighted moving average latency multiplied by its number of
+    in-flight requests plus one, so a fast but busy replica doesn't take all the traffic. Replicas without any
+    recorded latency are tried first, while every consecutive failure adds `failure_penalty` seconds to the score of
+    a replica until it answers again.
+    """
+
+    def __init__(self, urls: list[str], smoothing: float = 0.2, failure_penalty: float = 10.0) -> None:
+        assert len(urls) > 0, "At least one replica URL is required."
+
+        self._replicas = [_Replica(url.rstrip("/")) for url in urls]
+        self._smoothing = smoothing
+        self._failure_penalty = failure_penalty
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self) -> list[str]:
+        return [replica.url for replica in self._replicas]
+
+    def acquire(self, exclude: Collection[str] = ()) -> str:
+        """Picks the best replica, other than the `exclude` ones unless there are no others."""
+
+        with self._lock:
+            candidates = [replica for replica in self._replicas if replica.url not in exclude] or self._replicas
+            replica = min(candidates, key=self._score)
+            replica.num_in_flight += 1
+
+        return replica.url
+
+    def release(self, url: str, latency: Optional[float] = None, failed: bool = False) -> None:
+        with self._lock:
+            replica = next(replica for replica in self._replicas if replica.url == url)
+            replica.num_in_flight -= 1
+
+            if failed:
+                replica.num_consecutive_failures += 1
+            else:
+                replica.num_consecutive_failures = 0
+
+            if latency is not None:
+                if replica.latency is None:
+                    replica.latency = latency
+                else:
+                    replica.latency = self._smoothing * latency + (1 - self._smoothing) * replica.latency
+
+    def _score(self, replica: _Replica) -> tuple[float, int]:
+        latency = replica.latency if replica.latency is not None else 0.0
+        score = latency * (replica.num_in_flight + 1) + self._failure_penalty * replica.num_consecutive_failures
+
+        return score, replica.num_in_flight
+
+
+class LLMInferenceTGIEndpoint(Inference):
+    """
+    Class for performing inference against one or more Hugging Face TGI (Text Generation Inference) compatible
+    HTTP servers, such as self-hosted replicas or Inference Endpoints.
+
+    All the requests share a pooled HTTP client, so one instance should be shared by the whole process. Failed
+    requests are retried on the best replica that didn't fail, and hedged requests are sent to a different replica
+    than the slow one.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        default_parameters: Optional[Dict[str, Any]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedger: Optional[Hedger] = None,
+        client: Optional[httpx.Client] = None,
+    ) -> None:
+        super().__init__(default_parameters=default_parameters or self._default_parameters())
+
+        self.router = ReplicaRouter(urls)
+        self.client = client or httpx.Client(
+            timeout=httpx.Timeout(settings.LLM_INFERENCE_READ_TIMEOUT, connect=settings.LLM_INFERENCE_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_INFERENCE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_INFERENCE_MAX_CONNECTIONS,
+            ),
+        )
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_retries=settings.LLM_INFERENCE_MAX_RETRIES,
+            base_delay=settings.LLM_INFERENCE_RETRY_BASE_DELAY,
+            max_delay=settings.LLM_INFERENCE_RETRY_MAX_DELAY,
+            is_retryable=is_retryable_http_error,
+        )
+        self.hedger = hedger
+
+    @staticmethod
+    def _default_parameters() -> Dict[str, Any]:
+        return {
+            "max_new_tokens": settings.MAX_NEW_TOKENS_INFERENCE,
+            "top_p": settings.TOP_P_INFERENCE,
+            "temperature": settings.TEMPERATURE_INFERENCE,
+            "return_full_text": False,
+        }
+
+    def inference(self, inputs: str, parameters: Optional[Dict[str, Any]] = None) -> list[Dict[str, Any]]:
+        """
+        Performs the inference request on the best replica.
+
+        Args:
+            inputs (str): The input text for the inference.
+            parameters (dict, optional): Parameters overriding the default ones. Defaults to None.
+
+        Returns:
+            list[dict]: The response from the inference request, in the same format as the SageMaker endpoint.
+        Raises:
+            Exception: If an error occurs during the inference request.
+        """
+
+        payload = self.build_payload(inputs, parameters)
+        # The replicas tried by the primary request and by the hedged one, in order.
+        urls_by_attempt: tuple[list[str], list[str]] = ([], [])
+
+        def invoke(attempt: int = 0) -> list[Dict[str, Any]]:
+            urls = urls_by_attempt[attempt]
+
+            def generate() -> list[Dict[str, Any]]:
+                # A retry avoids the replica that just failed, and the hedged request the one of the primary request.
+                exclude = set(urls[-1:])
+                if attempt > 0:
+                    exclude.update(urls_by_attempt[0][-1:])
+
+                return self._generate(payload, exclude, urls)
+
+            return self.retry_policy.call(generate)
+
+        try:
+            if self.hedger is not None:
+                return self.hedger.call(invoke)
+
+            return invoke()
+        except Exception:
+            logger.exception("TGI inference failed.")
+
+            raise
+
+    def _generate(
+        self, payload: Dict[str, Any], exclude: Collection[str], used_urls: list[str]
+    ) -> list[Dict[str, Any]]:
+        url = self.router.acquire(exclude=exclude)
+        used_urls.append(url)
+
+        start_time = time.perf_counter()
+        try:
+            response = self.client.post(f"{url}/generate", json=payload)
+            response.raise_for_status()
+        except Exception:
+            self.router.release(url, failed=True)
+
+            raise
+        self.router.release(url, latency=time.perf_counter() - start_time)
+
+        output = response.json()
+
+        return output if isinstance(output, list) else [output]
+
+    def inference_stream(self, inputs: str, parameters: Optional[Dict[str, Any]] = None) -> TokenStream:
+        """
+        Performs a streaming inference request on the best replica. Only opening the stream is retried, as tokens that
+        were already forwarded can't be taken back.
+
+        Args:
+            inputs (str): The input text for the inference.
+            parameters (dict, optional): Parameters overriding the default ones. Defaults to None.
+
+        Returns:
+            TokenStream: An iterator over the generated tokens. Close it to cancel the generation.
+        Raises:
+            Exception: If an error occurs while opening the stream.
+        """
+
+        payload = self.build_payload(inputs, parameters)
+
+        try:
+            return self.retry_policy.call(lambda: self._open_stream(payload))
+        except Exception:
+            logger.exception("TGI streaming inference failed.")
+
+            raise
+
+    def _open_stream(self, payload: Dict[str, Any]) -> TokenStream:
+        url = self.router.acquire()
+
+        start_time = time.perf_counter()
+        response = None
+        try:
+            request = self.client.build_request("POST", f"{url}/generate_stream", json=payload)
+            response = self.client.send(request, stream=True)
+            response.raise_for_status()
+        except Exception:
+            if response is not None:
+                response.close()
+            self.router.release(url, failed=True)
+
+            raise
+        # The time to the first byte is the latency that matters for routing streams.
+        self.router.release(url, latency=time.perf_counter() - start_time)
+
+        return TokenStream(response.iter_bytes(), close=response.close)
+
+    def close(self) -> None:
+        self.client.close()
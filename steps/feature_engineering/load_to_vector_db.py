@@ -2,7 +2,6 @@ from loguru import logger
 from typing_extensions import Annotated
 from zenml import step
 
-from llm_engineering.application import utils
 from llm_engineering.domain.base import VectorBaseDocument
 
 
@@ -15,12 +14,9 @@ def load_to_vector_db(
     grouped_documents = VectorBaseDocument.group_by_class(documents)
     for document_class, documents in grouped_documents.items():
         logger.info(f"Loading documents into {document_class.get_collection_name()}")
-        for documents_batch in utils.misc.batch(documents, size=4):
-            try:
-                document_class.bulk_insert(documents_batch)
-            except Exception:
-                logger.error(f"Failed to insert documents into {document_class.get_collection_name()}")
+        if not document_class.bulk_upsert(documents):
+            logger.error(f"Failed to insert documents into {document_class.get_collection_name()}")
 
-                return False
+            return False
 
     return True
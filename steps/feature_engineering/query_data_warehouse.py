@@ -57,15 +57,15 @@ def fetch_all_data(user: UserDocument) -> dict[str, list[NoSQLBaseDocument]]:
 
 
 def __fetch_articles(user_id) -> list[NoSQLBaseDocument]:
-    return ArticleDocument.bulk_find(author_id=user_id)
+    return list(ArticleDocument.iter_find(author_id=user_id, trusted=True))
 
 
 def __fetch_posts(user_id) -> list[NoSQLBaseDocument]:
-    return PostDocument.bulk_find(author_id=user_id)
+    return list(PostDocument.iter_find(author_id=user_id, trusted=True))
 
 
 def __fetch_repositories(user_id) -> list[NoSQLBaseDocument]:
-    return RepositoryDocument.bulk_find(author_id=user_id)
+    return list(RepositoryDocument.iter_find(author_id=user_id, trusted=True))
 
 
 def _get_metadata(documents: list[Document]) -> dict:
@@ -0,0 +1,103 @@
+import uuid
+
+import pytest
+from qdrant_client import QdrantClient
+
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.application.preprocessing import reindexing
+from llm_engineering.application.preprocessing.reindexing import CollectionReindexer
+from llm_engineering.application.rag.answer_cache import AnswerCache
+from llm_engineering.domain.base import vector
+from llm_engineering.domain.embedded_chunks import EmbeddedArticleChunk
+
+
+@pytest.fixture
+def client(monkeypatch) -> QdrantClient:
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(vector, "connection", client)
+    monkeypatch.setattr(reindexing, "connection", client)
+    monkeypatch.setattr(vector, "_existing_collections", set())
+    monkeypatch.setattr(vector, "_collections_metadata", {})
+
+    return client
+
+
+@pytest.fixture
+def chunks(client) -> list[EmbeddedArticleChunk]:
+    embedding_size = EmbeddingModelSingleton().embedding_size
+    chunks = [
+        EmbeddedArticleChunk(
+            content=f"chunk {i}",
+            embedding=[float(i + 1)] + [0.0] * (embedding_size - 1),
+            platform="medium",
+            document_id=uuid.uuid4(),
+            author_id=uuid.uuid4(),
+            author_full_name="Paul Iusztin",
+            link="https://example.com",
+        )
+        for i in range(5)
+    ]
+    assert EmbeddedArticleChunk.bulk_upsert(chunks)
+
+    return chunks
+
+
+@pytest.fixture
+def cache(chunks) -> AnswerCache:
+    cache = AnswerCache(invalidation_check_interval=0, collections=(EmbeddedArticleChunk,))
+    assert cache.get("key") is None
+    cache.set("key", "answer")
+    assert cache.get("key") == "answer"
+
+    return cache
+
+
+def test_cache_is_invalidated_when_points_are_overwritten(chunks, cache) -> None:
+    edited_chunks = [chunk.model_copy(update={"content": f"edited {chunk.content}"}) for chunk in chunks]
+    assert EmbeddedArticleChunk.bulk_upsert(edited_chunks)
+
+    assert EmbeddedArticleChunk.count() == len(chunks)
+    assert cache.get("key") is None
+
+
+def test_cache_is_invalidated_when_the_alias_is_switched(chunks, cache) -> None:
+    CollectionReindexer(EmbeddedArticleChunk, max_points_per_second=1e6).run()
+
+    assert cache.get("key") is None
+
+
+def test_cache_is_kept_while_the_collections_dont_change(chunks, cache) -> None:
+    assert EmbeddedArticleChunk.search(query_vector=chunks[0].embedding, limit=3)
+
+    assert cache.get("key") == "answer"
+
+
+def test_invalidation_check_reads_every_collection_in_a_single_request(chunks, cache, client, monkeypatch) -> None:
+    requests = []
+    for method_name in ("collection_exists", "get_aliases", "retrieve", "count"):
+        method = getattr(client, method_name)
+        monkeypatch.setattr(
+            client,
+            method_name,
+            lambda *args, method_name=method_name, method=method, **kwargs: (
+                requests.append(method_name) or method(*args, **kwargs)
+            ),
+        )
+
+    assert cache.get("key") == "answer"
+    assert requests == ["retrieve"]
+
+
+def test_bulk_writes_bump_the_write_generation_once(chunks, monkeypatch) -> None:
+    write_generations = []
+    bump_write_generation = EmbeddedArticleChunk.bump_write_generation
+    monkeypatch.setattr(
+        EmbeddedArticleChunk,
+        "bump_write_generation",
+        classmethod(lambda cls: write_generations.append(bump_write_generation())),
+    )
+
+    assert EmbeddedArticleChunk.bulk_upsert(chunks, batch_size=2)
+    assert EmbeddedArticleChunk.bulk_insert(chunks)
+
+    assert len(write_generations) == 2
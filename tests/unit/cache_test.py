@@ -0,0 +1,27 @@
+import time
+
+from llm_engineering.application.utils.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used_entries() -> None:
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries() -> None:
+    cache = TTLCache(max_size=10, ttl=0.01)
+    cache.set("a", 1)
+
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,141 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from llm_engineering.application.rag import context_compression
+from llm_engineering.application.rag.context_compression import ContextCompressor, SentenceEmbeddingCache
+from llm_engineering.domain.embedded_chunks import EmbeddedArticleChunk, EmbeddedPostChunk
+from llm_engineering.domain.queries import Query
+from llm_engineering.settings import settings
+
+QUERY = "How does Qdrant work?"
+
+
+class FakeEmbeddingModel:
+    """Embeds the sentences mentioning Qdrant close to the query, and every other sentence orthogonal to it."""
+
+    def __init__(self, embeddings: dict[str, list[float]]) -> None:
+        self._embeddings = embeddings
+        self.embedded_texts: list[str] = []
+
+    def __call__(self, input_text: list[str], to_list: bool = True) -> np.ndarray:
+        self.embedded_texts.extend(input_text)
+
+        return np.array([self._embeddings.get(text, [0.0, 1.0]) for text in input_text], dtype=np.float32)
+
+
+@pytest.fixture
+def embedding_model(monkeypatch) -> FakeEmbeddingModel:
+    embedding_model = FakeEmbeddingModel(
+        {
+            QUERY: [1.0, 0.0],
+            "Qdrant stores vectors.": [0.8, 0.6],
+            "Qdrant scales well.": [1.0, 0.0],
+        }
+    )
+    monkeypatch.setattr(context_compression, "EmbeddingModelSingleton", lambda: embedding_model)
+    monkeypatch.setattr(context_compression, "sentence_embedding_cache", SentenceEmbeddingCache())
+    # Keep the compressions out of Opik, whose background workers have nowhere to send the spans.
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 0.0)
+
+    return embedding_model
+
+
+@pytest.fixture
+def tokenized_texts(monkeypatch) -> list[str]:
+    tokenized_texts = []
+
+    def compute_num_tokens_batch(texts: list[str]) -> list[int]:
+        tokenized_texts.extend(texts)
+
+        return [len(text.split()) for text in texts]
+
+    monkeypatch.setattr(context_compression.utils.misc, "compute_num_tokens_batch", compute_num_tokens_batch)
+
+    return tokenized_texts
+
+
+def _article_chunk(content: str) -> EmbeddedArticleChunk:
+    return EmbeddedArticleChunk(
+        content=content,
+        embedding=None,
+        platform="medium",
+        document_id=uuid.uuid4(),
+        author_id=uuid.uuid4(),
+        author_full_name="Paul Iusztin",
+        link="https://example.com",
+    )
+
+
+def _post_chunk(content: str) -> EmbeddedPostChunk:
+    return EmbeddedPostChunk(
+        content=content,
+        embedding=None,
+        platform="linkedin",
+        document_id=uuid.uuid4(),
+        author_id=uuid.uuid4(),
+        author_full_name="Maxime Labonne",
+    )
+
+
+def test_compression_keeps_the_most_relevant_sentences_within_the_ratio(embedding_model, tokenized_texts) -> None:
+    article = _article_chunk("Qdrant stores vectors. Weather is nice.")
+    post = _post_chunk("Cats sleep often. Qdrant scales well.")
+
+    compressed_chunks = ContextCompressor().generate(Query.from_str(QUERY), [article, post], ratio=0.5)
+
+    assert [chunk.content for chunk in compressed_chunks] == ["Qdrant stores vectors.", "Qdrant scales well."]
+    assert sum(chunk.num_tokens for chunk in compressed_chunks) == 6
+
+
+def test_compression_respects_the_max_tokens(embedding_model, tokenized_texts) -> None:
+    article = _article_chunk("Qdrant stores vectors. Weather is nice.")
+    post = _post_chunk("Cats sleep often. Qdrant scales well.")
+
+    compressed_chunks = ContextCompressor().generate(Query.from_str(QUERY), [article, post], ratio=1, max_tokens=3)
+
+    assert [chunk.content for chunk in compressed_chunks] == ["Qdrant scales well."]
+    assert compressed_chunks[0].num_tokens == 3
+
+
+def test_compression_keeps_the_sentences_in_their_original_order(embedding_model, tokenized_texts) -> None:
+    chunk = _article_chunk("Cats sleep often. Qdrant stores vectors. Weather is nice. Qdrant scales well.")
+
+    compressed_chunks = ContextCompressor().generate(Query.from_str(QUERY), [chunk], ratio=0.5)
+
+    assert [chunk.content for chunk in compressed_chunks] == ["Qdrant stores vectors. Qdrant scales well."]
+
+
+def test_compressed_sentences_are_attributed_to_their_source_chunks(embedding_model, tokenized_texts) -> None:
+    article = _article_chunk("Qdrant stores vectors. Weather is nice.")
+    post = _post_chunk("Cats sleep often. Qdrant scales well.")
+
+    article_copy, post_copy = ContextCompressor().generate(Query.from_str(QUERY), [article, post], ratio=0.5)
+
+    assert isinstance(article_copy, EmbeddedArticleChunk)
+    assert (article_copy.id, article_copy.author_full_name, article_copy.link) == (
+        article.id,
+        article.author_full_name,
+        article.link,
+    )
+    assert isinstance(post_copy, EmbeddedPostChunk)
+    assert (post_copy.id, post_copy.platform, post_copy.author_full_name) == (
+        post.id,
+        post.platform,
+        post.author_full_name,
+    )
+    assert article.content == "Qdrant stores vectors. Weather is nice."
+
+
+def test_cached_sentences_are_not_embedded_or_tokenized_again(embedding_model, tokenized_texts) -> None:
+    chunks = [_article_chunk("Qdrant stores vectors. Weather is nice."), _post_chunk("Qdrant scales well.")]
+
+    first_compressed_chunks = ContextCompressor().generate(Query.from_str(QUERY), chunks, ratio=0.5)
+    num_embedded_texts, num_tokenized_texts = len(embedding_model.embedded_texts), len(tokenized_texts)
+    second_compressed_chunks = ContextCompressor().generate(Query.from_str(QUERY), chunks, ratio=0.5)
+
+    assert num_embedded_texts == 4
+    assert len(embedding_model.embedded_texts) == num_embedded_texts
+    assert len(tokenized_texts) == num_tokenized_texts
+    assert [chunk.content for chunk in second_compressed_chunks] == [chunk.content for chunk in first_compressed_chunks]
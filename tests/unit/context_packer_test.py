@@ -0,0 +1,87 @@
+import uuid
+
+from llm_engineering.application.rag import context_packer
+from llm_engineering.application.rag.context_packer import ContextPacker
+from llm_engineering.domain.embedded_chunks import EmbeddedPostChunk
+
+
+def _chunk(content: str, document_id: uuid.UUID | None = None, num_tokens: int | None = None) -> EmbeddedPostChunk:
+    return EmbeddedPostChunk(
+        content=content,
+        embedding=None,
+        platform="linkedin",
+        document_id=document_id or uuid.uuid4(),
+        author_id=uuid.uuid4(),
+        author_full_name="Paul Iusztin",
+        num_tokens=num_tokens,
+    )
+
+
+def test_pack_skips_chunks_exceeding_the_budget(monkeypatch) -> None:
+    monkeypatch.setattr(ContextPacker, "_compute_num_tokens", lambda self, chunk, content, position: chunk.num_tokens)
+    chunks = [_chunk("best chunk", num_tokens=50), _chunk("long chunk", num_tokens=80), _chunk("short", num_tokens=30)]
+
+    context = ContextPacker().pack(chunks, max_tokens=100)
+
+    assert "best chunk" in context
+    assert "long chunk" not in context
+    assert "short" in context
+    assert "Chunk 2:" in context
+    assert "Chunk 3:" not in context
+
+
+def test_pack_trims_text_overlapping_with_chunks_of_the_same_document(monkeypatch) -> None:
+    monkeypatch.setattr(ContextPacker, "_compute_num_tokens", lambda self, chunk, content, position: len(content))
+    document_id = uuid.uuid4()
+    overlap = "this sentence is shared by both chunks."
+    chunks = [
+        _chunk(f"The first chunk starts here and {overlap}", document_id=document_id),
+        _chunk(f"{overlap} The second chunk continues here.", document_id=document_id),
+        _chunk("The first chunk starts here", document_id=document_id),
+    ]
+
+    context = ContextPacker().pack(chunks, max_tokens=1000)
+
+    assert context.count(overlap) == 1
+    assert "Content: The second chunk continues here." in context
+    assert "Chunk 3:" not in context
+
+
+def test_chunk_headers_are_tokenized_once(monkeypatch) -> None:
+    tokenized_texts = []
+
+    def compute_num_tokens(text: str) -> int:
+        tokenized_texts.append(text)
+
+        return len(text)
+
+    monkeypatch.setattr(context_packer.utils.misc, "compute_num_tokens", compute_num_tokens)
+    context_packer._compute_num_header_tokens.cache_clear()
+    chunks = [_chunk("first", num_tokens=1), _chunk("second", num_tokens=1)]
+
+    ContextPacker().pack(chunks, max_tokens=1000)
+    ContextPacker().pack([_chunk("third", num_tokens=1), _chunk("fourth", num_tokens=1)], max_tokens=1000)
+
+    # Only the headers of the two positions are tokenized, and the contents use the precomputed counts.
+    assert len(tokenized_texts) == 2
+
+
+def test_prompt_template_is_tokenized_once(monkeypatch) -> None:
+    from llm_engineering.infrastructure import inference_pipeline_api
+
+    tokenized_texts = []
+
+    def compute_num_tokens(text: str) -> int:
+        tokenized_texts.append(text)
+
+        return len(text.split())
+
+    monkeypatch.setattr(inference_pipeline_api.misc, "compute_num_tokens", compute_num_tokens)
+    monkeypatch.setattr(inference_pipeline_api.settings, "MAX_INPUT_LENGTH", 1000)
+    inference_pipeline_api._compute_num_prompt_template_tokens.cache_clear()
+
+    budgets = [inference_pipeline_api.compute_context_token_budget(query) for query in ["a b", "a b c d"]]
+
+    assert tokenized_texts[1:] == ["a b", "a b c d"]
+    assert budgets[0] - budgets[1] == 2
+    inference_pipeline_api._compute_num_prompt_template_tokens.cache_clear()
@@ -0,0 +1,154 @@
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    FieldCondition,
+    Filter,
+    MatchValue,
+    PointStruct,
+    SearchRequest,
+    VectorParams,
+)
+
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.domain.base import vector
+from llm_engineering.domain.embedded_chunks import EmbeddedArticleChunk
+from llm_engineering.infrastructure.db.embedded_vector_store import EmbeddedVectorStore
+
+
+def generate_points(num_points: int, embedding_size: int, num_authors: int = 5) -> list[PointStruct]:
+    rng = np.random.default_rng(42)
+    author_ids = [str(uuid.uuid4()) for _ in range(num_authors)]
+
+    return [
+        PointStruct(
+            id=str(uuid.uuid4()),
+            vector=rng.normal(size=embedding_size).tolist(),
+            payload={"author_id": author_ids[i % num_authors], "position": i},
+        )
+        for i in range(num_points)
+    ]
+
+
+def test_search_and_scroll_match_qdrant(tmp_path) -> None:
+    points = generate_points(300, embedding_size=16)
+    query_filter = Filter(
+        must=[FieldCondition(key="author_id", match=MatchValue(value=points[0].payload["author_id"]))]
+    )
+    queries = np.random.default_rng(0).normal(size=(5, 16)).tolist()
+
+    results = []
+    for client in (QdrantClient(location=":memory:"), EmbeddedVectorStore(tmp_path)):
+        client.create_collection("chunks", vectors_config=VectorParams(size=16, distance=Distance.COSINE))
+        client.create_payload_index("chunks", field_name="author_id", field_schema="keyword")
+        client.upsert("chunks", points=points[:200])
+        client.upsert("chunks", points=points[150:])
+
+        first_page, next_offset = client.scroll("chunks", limit=100, with_payload=["position"])
+        second_page, _ = client.scroll("chunks", limit=100, offset=next_offset, scroll_filter=query_filter)
+        searches = client.search_batch(
+            "chunks", requests=[SearchRequest(vector=query, filter=query_filter, limit=5) for query in queries]
+        )
+        results.append(
+            (
+                [(record.id, record.payload) for record in first_page + second_page],
+                [[(point.id, round(point.score, 4)) for point in search] for search in searches],
+                client.count("chunks").count,
+            )
+        )
+
+    assert results[0] == results[1]
+
+
+def test_odm_round_trip_persists_across_restarts(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(vector, "_existing_collections", set())
+    monkeypatch.setattr(vector, "_collections_metadata", {})
+    monkeypatch.setattr(vector, "connection", EmbeddedVectorStore(tmp_path))
+    embedding_size = EmbeddingModelSingleton().embedding_size
+    chunks = [
+        EmbeddedArticleChunk(
+            content=f"chunk {i}",
+            embedding=np.random.default_rng(i).normal(size=embedding_size).tolist(),
+            platform="medium",
+            document_id=uuid.uuid4(),
+            author_id=uuid.uuid4(),
+            author_full_name="Paul Iusztin",
+            link="https://example.com",
+        )
+        for i in range(50)
+    ]
+
+    assert EmbeddedArticleChunk.bulk_upsert(iter(chunks), batch_size=16, workers=2)
+
+    store = EmbeddedVectorStore(tmp_path)
+    monkeypatch.setattr(vector, "connection", store)
+    documents = list(EmbeddedArticleChunk.iter_all(page_size=7, workers=3))
+    records, _ = store.scroll(collection_name=EmbeddedArticleChunk.get_collection_name(), limit=len(chunks))
+    results = EmbeddedArticleChunk.search(query_vector=chunks[3].embedding, limit=1)
+
+    assert sorted(document.id for document in documents) == sorted(chunk.id for chunk in chunks)
+    assert results[0].id == chunks[3].id
+    assert all(vector.UPSERT_ID_PAYLOAD_FIELD not in record.payload for record in records)
+    assert EmbeddedArticleChunk.get_or_create_collection().payload_schema.keys() == {
+        "author_id",
+        "platform",
+        "document_id",
+    }
+
+
+def test_aliases_are_switched_atomically_and_persisted(tmp_path) -> None:
+    store = EmbeddedVectorStore(tmp_path)
+    for collection_name, points in (("chunks_v1", generate_points(3, 8)), ("chunks_v2", generate_points(5, 8))):
+        store.create_collection(collection_name, vectors_config=VectorParams(size=8, distance=Distance.COSINE))
+        store.upsert(collection_name, points=points)
+    store.update_collection_aliases(
+        [CreateAliasOperation(create_alias=CreateAlias(collection_name="chunks_v1", alias_name="chunks"))]
+    )
+    assert store.count("chunks").count == 3
+
+    store.update_collection_aliases(
+        [
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name="chunks")),
+            CreateAliasOperation(create_alias=CreateAlias(collection_name="chunks_v2", alias_name="chunks")),
+        ]
+    )
+    restarted_store = EmbeddedVectorStore(tmp_path)
+
+    assert restarted_store.collection_exists("chunks")
+    assert restarted_store.count("chunks").count == 5
+    assert [alias.collection_name for alias in restarted_store.get_aliases().aliases] == ["chunks_v2"]
+
+    restarted_store.delete_collection("chunks_v2")
+    assert restarted_store.get_aliases().aliases == []
+
+
+def test_missing_collections_raise_like_qdrant(tmp_path) -> None:
+    with pytest.raises(UnexpectedResponse) as error:
+        EmbeddedVectorStore(tmp_path).get_collection("missing")
+
+    assert error.value.status_code == 404
+
+
+def test_hnsw_search_finds_the_exact_neighbours(tmp_path) -> None:
+    pytest.importorskip("hnswlib")
+
+    points = generate_points(500, embedding_size=16)
+    store = EmbeddedVectorStore(tmp_path, use_hnsw=True)
+    store.create_collection("chunks", vectors_config=VectorParams(size=16, distance=Distance.COSINE))
+    store.upsert("chunks", points=points)
+    store.close()
+
+    store = EmbeddedVectorStore(tmp_path, use_hnsw=True)
+    results = store.search("chunks", query_vector=points[42].vector, limit=3)
+
+    assert store.get_collection("chunks").indexed_vectors_count == 500
+    assert results[0].id == points[42].id
+    assert results[0].score == pytest.approx(1.0, abs=1e-5)
@@ -0,0 +1,103 @@
+import os
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from llm_engineering.infrastructure import inference_pipeline_api
+from llm_engineering.infrastructure.metrics import Counter, Gauge, Histogram, MetricsRegistry, mark_process_dead
+
+
+def test_histogram_quantiles_are_interpolated_within_buckets() -> None:
+    histogram = Histogram("latency_seconds", "Latency.", labelnames=("stage",), buckets=(0.1, 0.2, 0.5, 1.0))
+    for _ in range(90):
+        histogram.observe(0.15, stage="rerank")
+    for _ in range(10):
+        histogram.observe(0.8, stage="rerank")
+
+    assert histogram.count(stage="rerank") == 100
+    assert 0.1 < histogram.quantile(0.5, stage="rerank") <= 0.2
+    assert 0.5 < histogram.quantile(0.99, stage="rerank") <= 1.0
+    assert histogram.quantile(0.5, stage="generation") is None
+
+
+def test_registry_renders_the_prometheus_text_format() -> None:
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("cache_requests_total", "Cache lookups.", labelnames=("result",)))
+    gauge = registry.register(Gauge("in_flight", "In-flight requests."))
+    histogram = registry.register(Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)))
+
+    counter.inc(result="hit")
+    counter.inc(2, result="miss")
+    with gauge.track_in_progress():
+        assert gauge.get() == 1
+    histogram.observe(0.5)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE cache_requests_total counter" in lines
+    assert 'cache_requests_total{result="hit"} 1.0' in lines
+    assert 'cache_requests_total{result="miss"} 2.0' in lines
+    assert "in_flight 0.0" in lines
+    assert 'latency_seconds_bucket{le="0.1"} 0' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 1' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in lines
+    assert "latency_seconds_count 1" in lines
+
+
+def test_metrics_endpoint_exposes_the_request_latencies(monkeypatch) -> None:
+    monkeypatch.setattr(inference_pipeline_api, "embed", lambda texts: [SimpleNamespace(embedding=[0.1, 0.2])])
+
+    client = TestClient(inference_pipeline_api.app)
+    assert client.post("/embed", json={"texts": ["What is RAG?"]}).status_code == 200
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_latency_seconds_count{route="/embed",status="200"}' in response.text
+
+
+def test_metrics_are_aggregated_across_forked_workers(tmp_path) -> None:
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("requests_total", "Requests.", labelnames=("route",)))
+    gauge = registry.register(Gauge("in_flight", "In-flight requests."))
+    histogram = registry.register(Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)))
+    # Counted before the fork, so it must not be inherited by the workers.
+    counter.inc(100, route="/rag")
+
+    worker_pids = []
+    for num_requests in (3, 5):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                registry.enable_multiprocess(tmp_path)
+                for _ in range(num_requests):
+                    counter.inc(route="/rag")
+                    histogram.observe(0.5)
+                gauge.inc()
+                registry.flush()
+                exit_code = 0
+            finally:
+                os._exit(exit_code)
+        worker_pids.append(pid)
+
+    for pid in worker_pids:
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+
+    # Scraped from a third worker, which didn't serve any request.
+    registry.enable_multiprocess(tmp_path)
+    lines = registry.render().splitlines()
+
+    assert 'requests_total{route="/rag"} 8.0' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 8' in lines
+    assert "latency_seconds_count 8" in lines
+    assert "in_flight 2.0" in lines
+
+    # A dead worker's counters are kept, so the totals don't go backwards when it's restarted, but not its gauges.
+    mark_process_dead(tmp_path, worker_pids[0])
+    lines = registry.render().splitlines()
+
+    assert 'requests_total{route="/rag"} 8.0' in lines
+    assert "in_flight 1.0" in lines
@@ -0,0 +1,74 @@
+import pytest
+from pymongo import errors
+
+from llm_engineering.domain.base import nosql
+from llm_engineering.domain.documents import ArticleDocument, PostDocument, UserDocument
+from llm_engineering.settings import settings
+
+
+class FakeCollection:
+    def __init__(self, error: Exception | None = None) -> None:
+        self.created_indexes: list[list[dict]] = []
+        self._error = error
+
+    def create_indexes(self, indexes: list) -> list[str]:
+        if self._error is not None:
+            raise self._error
+
+        self.created_indexes.append([index.document for index in indexes])
+
+        return [index.document["name"] for index in indexes]
+
+    def find_one(self, filter_options: dict) -> dict | None:
+        return None
+
+
+@pytest.fixture
+def collections(monkeypatch) -> dict[str, FakeCollection]:
+    collections = {
+        UserDocument.get_collection_name(): FakeCollection(),
+        ArticleDocument.get_collection_name(): FakeCollection(),
+        PostDocument.get_collection_name(): FakeCollection(),
+    }
+    monkeypatch.setattr(nosql, "_database", collections)
+    monkeypatch.setattr(nosql, "_indexed_collections", set())
+
+    return collections
+
+
+def test_declared_indexes(collections) -> None:
+    assert UserDocument.ensure_indexes() == ["full_name"]
+    assert ArticleDocument.ensure_indexes() == ["author_id", "link"]
+
+    (user_indexes,) = collections[UserDocument.get_collection_name()].created_indexes
+    assert user_indexes == [{"key": {"first_name": 1, "last_name": 1}, "name": "full_name", "unique": True}]
+    (article_indexes,) = collections[ArticleDocument.get_collection_name()].created_indexes
+    assert article_indexes[1] == {"key": {"link": 1}, "name": "link", "unique": True}
+
+
+def test_indexes_are_ensured_once_on_first_use(collections) -> None:
+    ArticleDocument.find(link="https://example.com")
+    ArticleDocument.find(link="https://example.com")
+    UserDocument.find(first_name="Paul", last_name="Iusztin")
+
+    assert len(collections[ArticleDocument.get_collection_name()].created_indexes) == 1
+    assert len(collections[UserDocument.get_collection_name()].created_indexes) == 1
+    assert collections[PostDocument.get_collection_name()].created_indexes == []
+
+
+def test_indexes_are_not_ensured_when_disabled(collections, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "DATABASE_ENSURE_INDEXES", False)
+
+    ArticleDocument.find(link="https://example.com")
+
+    assert collections[ArticleDocument.get_collection_name()].created_indexes == []
+
+
+def test_conflicting_indexes_are_logged(collections) -> None:
+    collections[ArticleDocument.get_collection_name()] = FakeCollection(
+        error=errors.OperationFailure("Index already exists with different options", code=85)
+    )
+
+    assert ArticleDocument.ensure_indexes() == []
+    # The lookups still work, without the index.
+    assert ArticleDocument.find(link="https://example.com") is None
@@ -0,0 +1,105 @@
+import uuid
+
+import pytest
+
+from llm_engineering.domain.base import nosql
+from llm_engineering.domain.documents import ArticleDocument
+
+
+class FakeCursor:
+    def __init__(self, documents: list[dict], batch_size: int) -> None:
+        self._documents = documents
+        self.batch_size = batch_size
+        self.num_fetched = 0
+        self.closed = False
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.closed = True
+
+    def __iter__(self):
+        for document in self._documents:
+            # Documents are fetched from the server one batch at a time.
+            if self.num_fetched % self.batch_size == 0:
+                self.num_fetched += min(self.batch_size, len(self._documents) - self.num_fetched)
+            yield dict(document)
+
+
+class FakeCollection:
+    def __init__(self, documents: list[dict]) -> None:
+        self._documents = documents
+        self.cursors: list[FakeCursor] = []
+        self.projections: list[list[str] | None] = []
+
+    def find(self, filter_options: dict, projection: list[str] | None = None, batch_size: int = 0) -> FakeCursor:
+        documents = [
+            document
+            for document in self._documents
+            if all(document.get(key) == value for key, value in filter_options.items())
+        ]
+        if projection is not None:
+            documents = [{key: document[key] for key in projection if key in document} for document in documents]
+        self.projections.append(projection)
+        # As in pymongo, a batch size of 0 means the server's default.
+        self.cursors.append(FakeCursor(documents, batch_size or 101))
+
+        return self.cursors[-1]
+
+    def create_indexes(self, indexes: list) -> list[str]:
+        return [index.document["name"] for index in indexes]
+
+
+@pytest.fixture
+def collection(monkeypatch) -> FakeCollection:
+    author_ids = [uuid.uuid4(), uuid.uuid4()]
+    documents = [
+        ArticleDocument(
+            content={"Title": f"article {i}", "Content": "text " * 10},
+            platform="medium",
+            author_id=author_ids[i % 2],
+            author_full_name="Paul Iusztin",
+            link=f"https://example.com/{i}",
+        ).to_mongo()
+        for i in range(10)
+    ]
+    collection = FakeCollection(documents)
+    monkeypatch.setattr(nosql, "_database", {ArticleDocument.get_collection_name(): collection})
+    monkeypatch.setattr(nosql, "_indexed_collections", set())
+
+    return collection
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_iter_find_yields_the_same_documents_as_bulk_find(collection, trusted) -> None:
+    author_id = collection._documents[0]["author_id"]
+
+    documents = list(ArticleDocument.iter_find(batch_size=2, trusted=trusted, author_id=author_id))
+
+    assert len(documents) == 5
+    assert collection.cursors[0].batch_size == 2
+    assert all(isinstance(document.author_id, uuid.UUID) for document in documents)
+    assert [document.model_dump() for document in documents] == [
+        document.model_dump() for document in ArticleDocument.bulk_find(author_id=author_id)
+    ]
+
+
+def test_iter_find_is_lazy(collection) -> None:
+    documents = ArticleDocument.iter_find(batch_size=3)
+
+    next(documents)
+    assert collection.cursors[0].num_fetched == 3
+
+    documents.close()
+    assert collection.cursors[0].closed
+
+
+def test_iter_find_projection(collection) -> None:
+    documents = list(ArticleDocument.iter_find(projection=["id", "link"]))
+
+    assert collection.projections == [["_id", "link"]]
+    assert len(documents) == 10
+    assert isinstance(documents[0].id, uuid.UUID)
+    assert documents[0].link == "https://example.com/0"
+    assert "content" not in documents[0].model_fields_set
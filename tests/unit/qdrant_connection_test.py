@@ -0,0 +1,55 @@
+import grpc
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from llm_engineering.domain.exceptions import ImproperlyConfigured
+from llm_engineering.infrastructure.db.qdrant import get_client_options, is_retryable_qdrant_error
+from llm_engineering.settings import settings
+
+
+class FakeRpcError(grpc.RpcError):
+    def __init__(self, code: grpc.StatusCode) -> None:
+        self._code = code
+
+    def code(self) -> grpc.StatusCode:
+        return self._code
+
+
+@pytest.mark.parametrize(
+    ("error", "retryable"),
+    [
+        (FakeRpcError(grpc.StatusCode.UNAVAILABLE), True),
+        (FakeRpcError(grpc.StatusCode.DEADLINE_EXCEEDED), True),
+        (FakeRpcError(grpc.StatusCode.NOT_FOUND), False),
+        (FakeRpcError(grpc.StatusCode.INVALID_ARGUMENT), False),
+        (UnexpectedResponse(503, "Service Unavailable", b"", None), True),
+        (UnexpectedResponse(400, "Bad Request", b"", None), False),
+    ],
+)
+def test_transient_errors_of_both_transports_are_retryable(error: Exception, retryable: bool) -> None:
+    assert is_retryable_qdrant_error(error) is retryable
+
+
+def test_grpc_client_options(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "QDRANT_PREFER_GRPC", True)
+    monkeypatch.setattr(settings, "QDRANT_GRPC_COMPRESSION", "gzip")
+    monkeypatch.setattr(settings, "QDRANT_MAX_CONNECTIONS", 16)
+    monkeypatch.setattr(settings, "QDRANT_MAX_KEEPALIVE_CONNECTIONS", 8)
+
+    options = get_client_options()
+    client = QdrantClient(host="localhost", port=6333, **options)
+
+    assert options["grpc_compression"] == grpc.Compression.Gzip
+    assert options["grpc_options"]["grpc.keepalive_time_ms"] == settings.QDRANT_GRPC_KEEPALIVE_TIME_MS
+    assert options["limits"].max_keepalive_connections == 8
+    assert client._client._prefer_grpc
+    client.close()
+
+
+def test_unknown_grpc_compression_is_rejected(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "QDRANT_PREFER_GRPC", True)
+    monkeypatch.setattr(settings, "QDRANT_GRPC_COMPRESSION", "brotli")
+
+    with pytest.raises(ImproperlyConfigured):
+        get_client_options()
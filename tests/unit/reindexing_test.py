@@ -0,0 +1,153 @@
+import uuid
+
+import pytest
+from qdrant_client import QdrantClient
+
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.application.preprocessing import reindexing
+from llm_engineering.application.preprocessing.reindexing import CollectionReindexer
+from llm_engineering.domain.base import vector
+from llm_engineering.domain.embedded_chunks import EmbeddedArticleChunk
+from llm_engineering.domain.exceptions import ReindexingError
+
+OLD_METADATA = {"embedding_model_id": "old-model", "embedding_size": 8, "chunk_size": 500}
+
+
+@pytest.fixture
+def client(monkeypatch) -> QdrantClient:
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(vector, "connection", client)
+    monkeypatch.setattr(reindexing, "connection", client)
+    monkeypatch.setattr(vector, "_existing_collections", set())
+    monkeypatch.setattr(vector, "_collections_metadata", {})
+
+    return client
+
+
+def generate_chunks(num_chunks: int) -> list[EmbeddedArticleChunk]:
+    embedding_size = EmbeddingModelSingleton().embedding_size
+
+    return [
+        EmbeddedArticleChunk(
+            content=f"chunk {i}",
+            embedding=[float(i + 1)] + [0.0] * (embedding_size - 1),
+            platform="medium",
+            document_id=uuid.uuid4(),
+            author_id=uuid.uuid4(),
+            author_full_name="Paul Iusztin",
+            link="https://example.com",
+            metadata=OLD_METADATA,
+        )
+        for i in range(num_chunks)
+    ]
+
+
+@pytest.fixture
+def chunks(client) -> list[EmbeddedArticleChunk]:
+    chunks = generate_chunks(20)
+    assert EmbeddedArticleChunk.bulk_insert(chunks)
+
+    return chunks
+
+
+@pytest.fixture
+def legacy_chunks(client) -> list[EmbeddedArticleChunk]:
+    """Chunks of a collection created before the collections were put behind an alias."""
+
+    EmbeddedArticleChunk._create_collection(collection_name="embedded_articles")
+    chunks = generate_chunks(20)
+    assert EmbeddedArticleChunk.bulk_insert(chunks)
+
+    return chunks
+
+
+def get_aliases(client: QdrantClient) -> dict[str, str]:
+    return {alias.alias_name: alias.collection_name for alias in client.get_aliases().aliases}
+
+
+def test_reindexing_switches_the_alias_to_the_new_version(client, chunks) -> None:
+    reindexer = CollectionReindexer(EmbeddedArticleChunk, batch_size=8, max_points_per_second=1e6)
+
+    assert get_aliases(client) == {"embedded_articles": "embedded_articles_v1"}
+
+    assert reindexer.run() == "embedded_articles_v2"
+
+    assert get_aliases(client) == {"embedded_articles": "embedded_articles_v2"}
+    assert EmbeddedArticleChunk.count() == len(chunks)
+    assert EmbeddedArticleChunk.get_collection_metadata()["metadata"] == {
+        **OLD_METADATA,
+        "embedding_model_id": EmbeddingModelSingleton().model_id,
+        "embedding_size": EmbeddingModelSingleton().embedding_size,
+        "max_input_length": EmbeddingModelSingleton().max_input_length,
+    }
+
+    documents = list(EmbeddedArticleChunk.iter_all())
+    assert {document.id for document in documents} == {chunk.id for chunk in chunks}
+    assert {document.content for document in documents} == {chunk.content for chunk in chunks}
+
+
+def test_old_versions_are_garbage_collected(client, chunks) -> None:
+    reindexer = CollectionReindexer(EmbeddedArticleChunk, max_points_per_second=1e6, keep_versions=1)
+
+    reindexer.run()
+    assert list(reindexer.get_versions().values()) == ["embedded_articles_v1", "embedded_articles_v2"]
+
+    reindexer.run()
+    assert list(reindexer.get_versions().values()) == ["embedded_articles_v2", "embedded_articles_v3"]
+    assert get_aliases(client) == {"embedded_articles": "embedded_articles_v3"}
+    assert EmbeddedArticleChunk.count() == len(chunks)
+
+
+def test_failed_verification_keeps_the_live_collection(client, chunks) -> None:
+    reindexer = CollectionReindexer(EmbeddedArticleChunk, max_points_per_second=1e6, min_recall=1.1)
+
+    with pytest.raises(ReindexingError):
+        reindexer.run()
+
+    assert reindexer.get_versions() == {1: "embedded_articles_v1"}
+    assert reindexer.get_live_collection() == "embedded_articles_v1"
+    assert EmbeddedArticleChunk.get_collection_metadata()["metadata"] == OLD_METADATA
+
+
+def test_reindexing_is_throttled(client, chunks, monkeypatch) -> None:
+    delays = []
+    monkeypatch.setattr(reindexing.time, "sleep", delays.append)
+
+    CollectionReindexer(EmbeddedArticleChunk, batch_size=10, max_points_per_second=10).build()
+
+    assert len(delays) == 2
+    assert delays[-1] == pytest.approx(2.0, abs=0.5)
+
+
+def test_legacy_collection_is_only_replaced_by_the_cutover(client, legacy_chunks) -> None:
+    reindexer = CollectionReindexer(EmbeddedArticleChunk, max_points_per_second=1e6)
+    assert reindexer.is_legacy()
+
+    # The new version is built and verified, but the legacy collection keeps serving.
+    assert reindexer.run() == "embedded_articles_v1"
+    assert get_aliases(client) == {}
+    assert client.count(collection_name="embedded_articles").count == len(legacy_chunks)
+    with pytest.raises(ReindexingError):
+        reindexer.switch("embedded_articles_v1")
+
+    assert reindexer.cutover() == "embedded_articles_v1"
+
+    assert not reindexer.is_legacy()
+    assert get_aliases(client) == {"embedded_articles": "embedded_articles_v1"}
+    assert EmbeddedArticleChunk.count() == len(legacy_chunks)
+    assert EmbeddedArticleChunk.get_collection_metadata()["metadata"]["embedding_model_id"] == (
+        EmbeddingModelSingleton().model_id
+    )
+
+
+def test_cutover_verifies_the_version_again(client, legacy_chunks) -> None:
+    reindexer = CollectionReindexer(EmbeddedArticleChunk, max_points_per_second=1e6)
+    reindexer.run()
+    # Written to the legacy collection after its re-indexing.
+    assert EmbeddedArticleChunk.bulk_insert(generate_chunks(1))
+
+    with pytest.raises(ReindexingError):
+        reindexer.cutover()
+
+    assert reindexer.is_legacy()
+    assert client.count(collection_name="embedded_articles").count == len(legacy_chunks) + 1
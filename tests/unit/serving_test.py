@@ -0,0 +1,109 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+from fastapi.testclient import TestClient
+
+from llm_engineering.infrastructure import inference_pipeline_api
+from llm_engineering.infrastructure.serving import PreforkServer
+
+NO_CONNECTION_BEFORE_FORK_SCRIPT = """
+import threading
+
+import grpc
+import opik
+
+channels = []
+grpc.insecure_channel = lambda *args, **kwargs: channels.append(args)
+grpc.secure_channel = lambda *args, **kwargs: channels.append(args)
+opik_configurations = []
+opik.configure = lambda *args, **kwargs: opik_configurations.append(kwargs)
+
+from llm_engineering.infrastructure import inference_pipeline_api
+from llm_engineering.infrastructure.serving import PreforkServer
+from llm_engineering.infrastructure.db.qdrant import AsyncQdrantDatabaseConnector, QdrantDatabaseConnector
+from llm_engineering.infrastructure.serving import preload_models
+
+preload_models()
+
+assert QdrantDatabaseConnector._instance is None
+assert AsyncQdrantDatabaseConnector._instance is None
+assert channels == []
+assert opik_configurations == []
+assert threading.active_count() == 1, threading.enumerate()
+"""
+
+NEW_CLIENT_AFTER_FORK_SCRIPT = """
+import os
+
+from llm_engineering.infrastructure.db.qdrant import QdrantDatabaseConnector, connection
+
+parent_client = QdrantDatabaseConnector()
+assert connection.init_options is parent_client.init_options
+
+pid = os.fork()
+if pid == 0:
+    os._exit(0 if QdrantDatabaseConnector._instance is None and QdrantDatabaseConnector() is not parent_client else 1)
+
+_, status = os.waitpid(pid, 0)
+assert os.waitstatus_to_exitcode(status) == 0
+assert QdrantDatabaseConnector() is parent_client
+"""
+
+
+def run_script(script: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ, QDRANT_PREFER_GRPC="true", COMET_API_KEY="key", COMET_PROJECT="project")
+    env.pop("QDRANT_LOCAL_PATH", None)
+    env.pop("QDRANT_EMBEDDED_PATH", None)
+
+    return subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(script)], env=env, capture_output=True, text=True, timeout=120
+    )
+
+
+def test_no_connection_is_opened_before_fork() -> None:
+    result = run_script(NO_CONNECTION_BEFORE_FORK_SCRIPT)
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_forked_workers_create_their_own_qdrant_client() -> None:
+    result = run_script(NEW_CLIENT_AFTER_FORK_SCRIPT)
+
+    assert result.returncode == 0, result.stderr
+
+
+def test_opik_is_configured_by_the_lifespan(monkeypatch) -> None:
+    configurations = []
+    monkeypatch.setattr(inference_pipeline_api, "configure_opik", lambda: configurations.append(os.getpid()))
+
+    with TestClient(inference_pipeline_api.app):
+        assert configurations == [os.getpid()]
+
+
+def exit_worker(server: PreforkServer, uptime: float = 0.0) -> float:
+    """Forks a worker exiting right away, as if it started `uptime` seconds ago, and returns its restart delay."""
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(1)
+
+    server._worker_pids[pid] = time.monotonic() - uptime
+    while server._worker_pids:
+        server._reap_workers()
+
+    return server._next_spawn_time - time.monotonic()
+
+
+def test_workers_crashing_at_startup_are_restarted_with_backoff(tmp_path) -> None:
+    server = PreforkServer(app=None, workers=1, restart_delay=1.0, max_restart_delay=3.0)
+    server._metrics_dir = tmp_path
+
+    assert [round(exit_worker(server)) for _ in range(4)] == [1, 2, 3, 3]
+
+    # A worker dying after running for a while doesn't count as a crash, so the backoff starts over.
+    exit_worker(server, uptime=server.min_worker_uptime)
+    server._next_spawn_time = float("-inf")
+    assert round(exit_worker(server)) == 1
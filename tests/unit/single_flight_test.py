@@ -0,0 +1,80 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from llm_engineering.application.utils.single_flight import SingleFlight, StreamSingleFlight
+
+
+class FakeTokenStream:
+    def __init__(self, tokens: list[str], delay: float = 0.01) -> None:
+        self._tokens = iter(tokens)
+        self._delay = delay
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.closed:
+            raise StopIteration
+
+        time.sleep(self._delay)
+
+        return next(self._tokens)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_single_flight_runs_concurrent_identical_calls_once() -> None:
+    single_flight = SingleFlight()
+    num_calls = 0
+    lock = threading.Lock()
+
+    def compute() -> str:
+        nonlocal num_calls
+        with lock:
+            num_calls += 1
+        time.sleep(0.1)
+
+        return "answer"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: single_flight.do("key", compute), range(8)))
+
+    assert results == ["answer"] * 8
+    assert num_calls == 1
+
+
+def test_stream_single_flight_fans_out_every_token_to_late_subscribers() -> None:
+    single_flight = StreamSingleFlight()
+    tokens = [f"t{i}" for i in range(10)]
+    opened_streams = []
+
+    def open_stream() -> FakeTokenStream:
+        stream = FakeTokenStream(tokens)
+        opened_streams.append(stream)
+
+        return stream
+
+    def consume(delay: float) -> list[str]:
+        time.sleep(delay)
+
+        return list(single_flight.subscribe("key", open_stream))
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = list(executor.map(consume, [0, 0.03, 0.06]))
+
+    assert results == [tokens] * 3
+    assert len(opened_streams) == 1
+
+
+def test_stream_single_flight_cancels_upstream_when_all_subscribers_leave() -> None:
+    single_flight = StreamSingleFlight()
+    upstream = FakeTokenStream([f"t{i}" for i in range(100)])
+
+    subscription = single_flight.subscribe("key", lambda: upstream)
+    assert next(subscription) == "t0"
+    subscription.close()
+
+    assert upstream.closed is True
@@ -0,0 +1,65 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from llm_engineering.infrastructure import inference_pipeline_api
+from llm_engineering.model.inference import TokenStream
+
+
+class FakeEventStream:
+    """Mimics the botocore EventStream returned by `invoke_endpoint_with_response_stream`."""
+
+    def __init__(self, tokens: list[str], part_size: int = 7) -> None:
+        body = b"".join(
+            b"data:" + json.dumps({"token": {"text": token, "special": False}}).encode() + b"\n\n" for token in tokens
+        )
+        self._parts = [body[i : i + part_size] for i in range(0, len(body), part_size)]
+        self.closed = False
+
+    def __iter__(self):
+        for part in self._parts:
+            if self.closed:
+                return
+
+            yield {"PayloadPart": {"Bytes": part}}
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_token_stream_reassembles_split_payload_parts() -> None:
+    tokens = ["Hello", " world", "!", " {json}"]
+
+    assert list(TokenStream.from_sagemaker_event_stream(FakeEventStream(tokens))) == tokens
+
+
+def test_token_stream_close_stops_upstream() -> None:
+    event_stream = FakeEventStream(["a", "b", "c"])
+    stream = TokenStream.from_sagemaker_event_stream(event_stream)
+
+    assert next(stream) == "a"
+    stream.close()
+
+    assert event_stream.closed is True
+    assert list(stream) == []
+
+
+def test_rag_stream_endpoint_emits_server_sent_events(monkeypatch) -> None:
+    event_stream = FakeEventStream(["RAG", " is", " great"])
+    monkeypatch.setattr(inference_pipeline_api, "retrieve_context", lambda query: "context")
+    monkeypatch.setattr(
+        inference_pipeline_api,
+        "call_llm_service_stream",
+        lambda query, context: TokenStream.from_sagemaker_event_stream(event_stream),
+    )
+
+    client = TestClient(inference_pipeline_api.app)
+    response = client.post("/rag/stream", json={"query": "What is RAG?"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    data = [json.loads(line[len("data: ") :]) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert [event["token"] for event in data if "token" in event] == ["RAG", " is", " great"]
+    assert "event: end" in response.text
+    assert event_stream.closed is True
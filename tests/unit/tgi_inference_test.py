@@ -0,0 +1,141 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from llm_engineering.model.inference import InferenceExecutor, LLMInferenceTGIEndpoint
+from llm_engineering.model.inference.resilience import Hedger, LatencyTracker, RetryPolicy
+from llm_engineering.model.inference.tgi import is_retryable_http_error
+from tools.fake_tgi_server import FakeTGIServer
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(**kwargs) -> FakeTGIServer:
+        server = FakeTGIServer(**kwargs).start()
+        started.append(server)
+
+        return server
+
+    yield start
+
+    for server in started:
+        server.stop()
+
+
+def fast_retry_policy(max_retries: int = 2) -> RetryPolicy:
+    return RetryPolicy(max_retries=max_retries, base_delay=0.0, max_delay=0.0, is_retryable=is_retryable_http_error)
+
+
+def test_inference_builds_an_immutable_payload_per_call(servers) -> None:
+    server = servers(num_tokens=3)
+    llm = LLMInferenceTGIEndpoint(urls=[server.url], default_parameters={"max_new_tokens": 10, "temperature": 0.1})
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        answers = list(executor.map(lambda i: InferenceExecutor(llm, query=f"query {i}").execute(), range(32)))
+
+    assert answers == [" token0 token1 token2"] * 32
+    assert llm.default_parameters == {"max_new_tokens": 10, "temperature": 0.1}
+    assert sorted(payload["inputs"] for payload in server.payloads) == sorted(
+        InferenceExecutor.DEFAULT_PROMPT.format(query=f"query {i}", context="") for i in range(32)
+    )
+    assert all(payload["parameters"]["repetition_penalty"] == 1.1 for payload in server.payloads)
+
+
+def test_inference_retries_transient_errors(servers) -> None:
+    server = servers(fail_next=2)
+    llm = LLMInferenceTGIEndpoint(urls=[server.url], retry_policy=fast_retry_policy(max_retries=2))
+
+    assert llm.inference("Hello")[0]["generated_text"]
+    assert server.num_requests == 3
+
+
+def test_inference_gives_up_after_max_retries(servers) -> None:
+    server = servers(fail_next=10)
+    llm = LLMInferenceTGIEndpoint(urls=[server.url], retry_policy=fast_retry_policy(max_retries=1))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        llm.inference("Hello")
+    assert server.num_requests == 2
+
+
+def test_router_prefers_the_fastest_replica(servers) -> None:
+    slow_server = servers(latency=0.05)
+    fast_server = servers()
+    llm = LLMInferenceTGIEndpoint(urls=[slow_server.url, fast_server.url])
+
+    for _ in range(20):
+        llm.inference("Hello")
+
+    assert fast_server.num_requests > slow_server.num_requests
+
+
+def test_router_routes_around_failing_replica(servers) -> None:
+    failing_server = servers(fail_next=100)
+    healthy_server = servers()
+    llm = LLMInferenceTGIEndpoint(
+        urls=[failing_server.url, healthy_server.url], retry_policy=fast_retry_policy(max_retries=1)
+    )
+
+    for _ in range(10):
+        llm.inference("Hello")
+
+    assert failing_server.num_requests == 1
+    assert healthy_server.num_requests == 10
+
+
+def test_retry_is_sent_to_another_replica(servers) -> None:
+    failing_server = servers(fail_next=1)
+    healthy_server = servers()
+    llm = LLMInferenceTGIEndpoint(
+        urls=[failing_server.url, healthy_server.url], retry_policy=fast_retry_policy(max_retries=1)
+    )
+    # The failing replica stays the best one despite its failure penalty.
+    llm.router._replicas[0].latency = 0.001
+    llm.router._replicas[1].latency = 100.0
+
+    assert llm.inference("Hello")[0]["generated_text"]
+
+    assert failing_server.num_requests == 1
+    assert healthy_server.num_requests == 1
+
+
+def test_hedged_request_is_sent_to_another_replica(servers) -> None:
+    slow_server = servers(latency=1.0)
+    fast_server = servers()
+    latency_tracker = LatencyTracker()
+    for _ in range(5):
+        latency_tracker.record(0.01)
+    llm = LLMInferenceTGIEndpoint(
+        urls=[slow_server.url, fast_server.url],
+        hedger=Hedger(percentile=95, latency_tracker=latency_tracker, min_samples=5),
+    )
+    # Make the slow replica look like the best one, so the primary request is sent to it.
+    llm.router._replicas[0].latency = 0.001
+    llm.router._replicas[1].latency = 0.002
+
+    start_time = time.perf_counter()
+    assert llm.inference("Hello")[0]["generated_text"]
+
+    assert time.perf_counter() - start_time < 0.5
+    assert slow_server.num_requests == 1
+    assert fast_server.num_requests == 1
+
+
+def test_inference_stream_yields_tokens_and_cancels_on_close(servers) -> None:
+    server = servers(num_tokens=50, token_latency=0.01)
+    llm = LLMInferenceTGIEndpoint(urls=[server.url])
+
+    assert list(llm.inference_stream("Hello")) == [f" token{i}" for i in range(50)]
+
+    stream = llm.inference_stream("Hello")
+    assert next(stream) == " token0"
+    stream.close()
+
+    deadline = time.monotonic() + 2
+    while server.num_cancelled_streams == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.num_cancelled_streams == 1
@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from opik.api_objects import opik_client
+
+from llm_engineering.infrastructure import tracing
+from llm_engineering.settings import settings
+
+
+class FakeOpikClient:
+    def __init__(self) -> None:
+        self.spans: list[dict] = []
+        self.traces: list[dict] = []
+        self.scores: list[dict] = []
+
+    def span(self, **kwargs) -> None:
+        self.spans.append(kwargs)
+
+    def trace(self, **kwargs) -> None:
+        self.traces.append(kwargs)
+
+    def log_traces_feedback_scores(self, scores: list[dict]) -> None:
+        self.scores.extend(scores)
+
+
+@pytest.fixture
+def client(monkeypatch) -> FakeOpikClient:
+    client = FakeOpikClient()
+    monkeypatch.setattr(opik_client, "get_client_cached", lambda: client)
+
+    return client
+
+
+@tracing.track(name="child")
+def child(text: str) -> str:
+    return text.upper()
+
+
+@tracing.track
+def parent(texts: list[str]) -> list[str]:
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        outputs = list(executor.map(tracing.propagate_context(child), texts))
+
+    tracing.log_trace_scores_async(lambda: {"num_texts": len(texts)})
+
+    return outputs
+
+
+def test_sampled_trace_contains_the_nested_spans(client, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 1.0)
+
+    assert parent(["a", "b"]) == ["A", "B"]
+    tracing.trace_scores_queue.join()
+
+    assert len(client.traces) == 1
+    trace_id = client.traces[0]["id"]
+    assert sorted(span["name"] for span in client.spans) == ["child", "child", "parent"]
+    assert all(span["trace_id"] == trace_id for span in client.spans)
+    assert client.scores == [{"id": trace_id, "name": "num_texts", "value": 2}]
+
+
+def test_unsampled_trace_is_not_recorded(client, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 0.0)
+
+    assert parent(["a", "b"]) == ["A", "B"]
+    tracing.trace_scores_queue.join()
+
+    assert client.traces == []
+    assert client.spans == []
+    assert client.scores == []
+
+
+def test_traced_payloads_are_truncated(client, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 1.0)
+
+    child("x" * 5000)
+
+    span_input = client.spans[0]["input"]["text"]
+    assert len(span_input) < 2100
+    assert span_input.endswith("... (5000 characters)")
+
+
+def test_truncate_payload() -> None:
+    payload = {"chunks": [{"content": "c" * 10, "embedding": list(range(100))}] * 20}
+
+    truncated = tracing.truncate_payload(payload, max_length=5, max_items=3)
+
+    assert len(truncated["chunks"]) == 4
+    assert truncated["chunks"][-1] == "... (20 items)"
+    assert truncated["chunks"][0]["content"] == "ccccc... (10 characters)"
+    assert truncated["chunks"][0]["embedding"] == [0, 1, 2, "... (100 items)"]
@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+
+import pytest
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.application.rag.retriever import ContextRetriever
+from llm_engineering.domain.base import vector
+from llm_engineering.domain.embedded_chunks import EmbeddedArticleChunk, EmbeddedPostChunk, EmbeddedRepositoryChunk
+from llm_engineering.infrastructure.db.qdrant import ThreadedAsyncQdrantClient
+from llm_engineering.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def empty_collections_cache(monkeypatch) -> None:
+    monkeypatch.setattr(vector, "_existing_collections", set())
+    monkeypatch.setattr(vector, "_collections_metadata", {})
+
+
+def create_chunk(chunk_class: type, content: str, embedding: list[float], author_id: uuid.UUID | None = None):
+    return chunk_class(
+        content=content,
+        embedding=embedding,
+        platform="medium",
+        document_id=uuid.uuid4(),
+        author_id=author_id or uuid.uuid4(),
+        author_full_name="Paul Iusztin",
+        link="https://example.com",
+        name="repository",
+    )
+
+
+def test_async_odm_round_trip(monkeypatch) -> None:
+    monkeypatch.setattr(vector, "aconnection", AsyncQdrantClient(location=":memory:"))
+    embedding_size = EmbeddingModelSingleton().embedding_size
+    chunks = [
+        create_chunk(EmbeddedArticleChunk, f"chunk {i}", [float(i + 1)] + [1.0] * (embedding_size - 1))
+        for i in range(5)
+    ]
+
+    async def run():
+        assert await EmbeddedArticleChunk.abulk_insert(chunks)
+        collection = await EmbeddedArticleChunk.aget_or_create_collection()
+        documents, next_offset = await EmbeddedArticleChunk.abulk_find(limit=10)
+        batch_results = await EmbeddedArticleChunk.asearch_batch(
+            query_vectors=[chunks[0].embedding, chunks[4].embedding], limit=1
+        )
+        results = await EmbeddedArticleChunk.asearch(query_vector=chunks[4].embedding, limit=2)
+
+        return collection, documents, next_offset, batch_results, results
+
+    collection, documents, next_offset, batch_results, results = asyncio.run(run())
+
+    assert collection.points_count == 5
+    assert set(documents) == set(chunks)
+    assert next_offset is None
+    assert [results[0].id for results in batch_results] == [chunks[0].id, chunks[4].id]
+    assert results[0] == chunks[4]
+
+
+def test_async_reads_without_collection_metadata_dont_block(monkeypatch) -> None:
+    aclient = AsyncQdrantClient(location=":memory:")
+    monkeypatch.setattr(vector, "aconnection", aclient)
+    # The sync client would block the event loop.
+    monkeypatch.setattr(vector, "connection", None)
+    embedding_size = EmbeddingModelSingleton().embedding_size
+    chunk = create_chunk(EmbeddedArticleChunk, "chunk", [1.0] * embedding_size)
+
+    async def run():
+        # A legacy collection, without a metadata record.
+        await EmbeddedArticleChunk.acreate_collection()
+        await aclient.upsert(collection_name=EmbeddedArticleChunk.get_collection_name(), points=[chunk.to_point()])
+
+        return await EmbeddedArticleChunk.asearch(query_vector=chunk.embedding, limit=1)
+
+    assert asyncio.run(run()) == [chunk]
+    assert vector._collections_metadata[EmbeddedArticleChunk.get_collection_name()][1] == {}
+
+
+def test_async_retriever_matches_the_sync_one(monkeypatch) -> None:
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(vector, "connection", client)
+    monkeypatch.setattr(vector, "aconnection", ThreadedAsyncQdrantClient(client))
+    monkeypatch.setattr(settings, "QDRANT_LOCAL_PATH", ":memory:")
+
+    embedding_size = EmbeddingModelSingleton().embedding_size
+    for chunk_class in (EmbeddedPostChunk, EmbeddedArticleChunk, EmbeddedRepositoryChunk):
+        chunk_class.bulk_insert(
+            [
+                create_chunk(chunk_class, f"{chunk_class.__name__} {i}", [float(i + 1)] * embedding_size)
+                for i in range(5)
+            ]
+        )
+
+    retriever = ContextRetriever(mock=True)
+    query = "Write an article about vector databases."
+
+    sync_documents = retriever.search(query, k=6)
+    async_documents = asyncio.run(retriever.asearch(query, k=6))
+
+    assert len(async_documents) > 0
+    assert {document.id for document in async_documents} == {document.id for document in sync_documents}
@@ -0,0 +1,226 @@
+import uuid
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+from qdrant_client.models import Record
+
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.domain.base import vector
+from llm_engineering.domain.embedded_chunks import EmbeddedArticleChunk
+from llm_engineering.settings import settings
+
+
+class FlakyQdrantClient:
+    def __init__(self, client: QdrantClient, errors: list[Exception]) -> None:
+        self._client = client
+        self._errors = errors
+        self.num_upserts = 0
+        self.num_collection_checks = 0
+
+    def upsert(self, **kwargs):
+        if kwargs["collection_name"] == vector.COLLECTIONS_METADATA_COLLECTION:
+            return self._client.upsert(**kwargs)
+
+        self.num_upserts += 1
+        if self._errors:
+            raise self._errors.pop(0)
+
+        return self._client.upsert(**kwargs)
+
+    def collection_exists(self, **kwargs) -> bool:
+        if kwargs["collection_name"] != vector.COLLECTIONS_METADATA_COLLECTION:
+            self.num_collection_checks += 1
+
+        return self._client.collection_exists(**kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+class LaggingQdrantClient:
+    """Acknowledges the upserts right away, but only applies them after a few reads, as a busy Qdrant would."""
+
+    def __init__(self, client: QdrantClient, num_lagging_reads: int) -> None:
+        self._client = client
+        self._num_lagging_reads = num_lagging_reads
+        self._pending_upserts: list[dict] = []
+
+    def upsert(self, **kwargs):
+        if kwargs["collection_name"] == vector.COLLECTIONS_METADATA_COLLECTION:
+            return self._client.upsert(**kwargs)
+
+        self._pending_upserts.append(kwargs)
+
+    def retrieve(self, **kwargs):
+        self._num_lagging_reads -= 1
+        if self._num_lagging_reads <= 0:
+            for upsert_kwargs in self._pending_upserts:
+                self._client.upsert(**upsert_kwargs)
+            self._pending_upserts.clear()
+
+        return self._client.retrieve(**kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+class FailingScrollQdrantClient:
+    def __init__(self, client: QdrantClient, num_successful_scrolls: int) -> None:
+        self._client = client
+        self._num_successful_scrolls = num_successful_scrolls
+
+    def scroll(self, **kwargs):
+        if self._num_successful_scrolls <= 0:
+            raise UnexpectedResponse(status_code=503, reason_phrase="Service Unavailable", content=b"", headers=None)
+
+        self._num_successful_scrolls -= 1
+
+        return self._client.scroll(**kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+@pytest.fixture
+def client(monkeypatch) -> QdrantClient:
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(vector, "connection", client)
+    monkeypatch.setattr(vector, "_existing_collections", set())
+    monkeypatch.setattr(vector, "_collections_metadata", {})
+    monkeypatch.setattr(settings, "QDRANT_LOCAL_PATH", ":memory:")
+    monkeypatch.setattr(settings, "QDRANT_RETRY_BASE_DELAY", 0.0)
+
+    return client
+
+
+def generate_chunks(num_chunks: int):
+    embedding_size = EmbeddingModelSingleton().embedding_size
+    for i in range(num_chunks):
+        yield EmbeddedArticleChunk(
+            content=f"chunk {i}",
+            embedding=[float(i + 1)] * embedding_size,
+            platform="medium",
+            document_id=uuid.uuid4(),
+            author_id=uuid.uuid4(),
+            author_full_name="Paul Iusztin",
+            link="https://example.com",
+        )
+
+
+def test_bulk_upsert_loads_a_generator_in_batches(client, monkeypatch) -> None:
+    flaky_client = FlakyQdrantClient(client, errors=[])
+    monkeypatch.setattr(vector, "connection", flaky_client)
+
+    assert EmbeddedArticleChunk.bulk_upsert(generate_chunks(25), batch_size=10)
+    assert EmbeddedArticleChunk.bulk_upsert(generate_chunks(5), batch_size=10)
+
+    assert EmbeddedArticleChunk.count() == 30
+    assert flaky_client.num_upserts == 4
+    assert flaky_client.num_collection_checks == 1
+
+
+def test_bulk_upsert_retries_transient_errors(client, monkeypatch) -> None:
+    flaky_client = FlakyQdrantClient(client, errors=[ResponseHandlingException(ConnectionError("reset"))])
+    monkeypatch.setattr(vector, "connection", flaky_client)
+
+    assert EmbeddedArticleChunk.bulk_upsert(generate_chunks(10), batch_size=10)
+
+    assert EmbeddedArticleChunk.count() == 10
+    assert flaky_client.num_upserts == 2
+
+
+def test_bulk_upsert_fails_on_client_errors(client, monkeypatch) -> None:
+    error = UnexpectedResponse(status_code=400, reason_phrase="Bad Request", content=b"", headers=None)
+    flaky_client = FlakyQdrantClient(client, errors=[error])
+    monkeypatch.setattr(vector, "connection", flaky_client)
+
+    assert EmbeddedArticleChunk.bulk_upsert(generate_chunks(10), batch_size=10) is False
+    assert flaky_client.num_upserts == 1
+
+
+def test_bulk_upsert_waits_for_the_reingested_points(client, monkeypatch) -> None:
+    chunks = list(generate_chunks(10))
+    assert EmbeddedArticleChunk.bulk_upsert(chunks, batch_size=4)
+
+    # The same points are re-ingested, so they already exist before the new upserts are applied.
+    lagging_client = LaggingQdrantClient(client, num_lagging_reads=3)
+    monkeypatch.setattr(vector, "connection", lagging_client)
+    updated_chunks = [chunk.model_copy(update={"content": f"updated {chunk.content}"}) for chunk in chunks]
+
+    assert EmbeddedArticleChunk.bulk_upsert(updated_chunks, batch_size=4)
+
+    assert lagging_client._num_lagging_reads <= 0
+    documents = {document.id: document for document in EmbeddedArticleChunk.iter_all()}
+    assert all(documents[chunk.id].content == chunk.content for chunk in updated_chunks)
+    records, _ = client.scroll(collection_name=EmbeddedArticleChunk.get_collection_name(), limit=len(chunks))
+    assert len(records) == len(chunks)
+    assert all(vector.UPSERT_ID_PAYLOAD_FIELD not in record.payload for record in records)
+
+
+def test_iter_all_reads_the_whole_collection_in_pages(client) -> None:
+    EmbeddedArticleChunk.bulk_upsert(generate_chunks(25))
+
+    documents = list(EmbeddedArticleChunk.iter_all(page_size=10))
+
+    assert len(documents) == 25
+    assert [document.id for document in documents] == sorted(document.id for document in documents)
+
+
+def test_iter_all_partitioned_scan_yields_every_document_once(client) -> None:
+    EmbeddedArticleChunk.bulk_upsert(generate_chunks(100))
+    expected_ids = {document.id for document in EmbeddedArticleChunk.iter_all()}
+
+    documents = list(EmbeddedArticleChunk.iter_all(page_size=7, workers=4))
+
+    assert len(documents) == 100
+    assert {document.id for document in documents} == expected_ids
+
+
+def test_iter_all_selects_payload_fields(client) -> None:
+    EmbeddedArticleChunk.bulk_upsert(generate_chunks(5))
+
+    documents = list(EmbeddedArticleChunk.iter_all(payload_fields=["content"]))
+
+    assert sorted(document.content for document in documents) == [f"chunk {i}" for i in range(5)]
+    assert all("link" not in document.model_fields_set for document in documents)
+
+
+def test_iter_all_stops_the_scans_when_closed_early(client) -> None:
+    EmbeddedArticleChunk.bulk_upsert(generate_chunks(50))
+
+    documents = EmbeddedArticleChunk.iter_all(page_size=5, workers=4)
+    first_document = next(documents)
+    documents.close()
+
+    assert first_document.content.startswith("chunk")
+
+
+def test_iter_all_raises_when_a_page_fails(client, monkeypatch) -> None:
+    EmbeddedArticleChunk.bulk_upsert(generate_chunks(25))
+    monkeypatch.setattr(vector, "connection", FailingScrollQdrantClient(client, num_successful_scrolls=1))
+
+    documents = EmbeddedArticleChunk.iter_all(page_size=10)
+
+    assert len([next(documents) for _ in range(10)]) == 10
+    with pytest.raises(UnexpectedResponse):
+        next(documents)
+
+
+def test_trusted_serialization_matches_the_validated_one(client) -> None:
+    chunk = next(generate_chunks(1))
+
+    point = chunk.to_point()
+    trusted_point = chunk.to_point(trusted=True)
+
+    assert trusted_point.id == point.id
+    assert trusted_point.vector == point.vector
+    assert trusted_point.payload == point.payload
+
+    record = Record(id=point.id, payload=point.payload, vector=point.vector)
+    document = EmbeddedArticleChunk.from_record(record)
+    (trusted_document,) = EmbeddedArticleChunk.from_records([record], trusted=True)
+
+    assert trusted_document.model_dump() == document.model_dump()
+    assert trusted_document.author_id == chunk.author_id
+    assert isinstance(trusted_document.document_id, uuid.UUID)
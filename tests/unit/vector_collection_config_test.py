@@ -0,0 +1,98 @@
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import CollectionInfo, PayloadIndexInfo, PayloadSchemaType, SearchParams
+
+from llm_engineering.domain.base import vector
+from llm_engineering.domain.cleaned_documents import CleanedArticleDocument
+from llm_engineering.domain.embedded_chunks import (
+    CHUNK_PAYLOAD_INDEXES,
+    CHUNK_QUANTIZATION_CONFIG,
+    CHUNK_SEARCH_PARAMS,
+    EmbeddedArticleChunk,
+    EmbeddedChunk,
+)
+
+
+class IndexingQdrantClient:
+    """The local mode ignores payload indexes, so they are recorded here and reported by `get_collection`."""
+
+    def __init__(self, client: QdrantClient) -> None:
+        self._client = client
+        self.payload_indexes: dict[str, dict[str, PayloadSchemaType]] = {}
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema: PayloadSchemaType, **kwargs):
+        self.payload_indexes.setdefault(collection_name, {})[field_name] = field_schema
+
+    def get_collection(self, collection_name: str) -> CollectionInfo:
+        collection = self._client.get_collection(collection_name=collection_name)
+        collection.payload_schema = {
+            field_name: PayloadIndexInfo(data_type=field_schema, points=0)
+            for field_name, field_schema in self.payload_indexes.get(collection_name, {}).items()
+        }
+
+        return collection
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+
+@pytest.fixture
+def client(monkeypatch) -> IndexingQdrantClient:
+    client = IndexingQdrantClient(QdrantClient(location=":memory:"))
+    monkeypatch.setattr(vector, "connection", client)
+    monkeypatch.setattr(vector, "_existing_collections", set())
+    monkeypatch.setattr(vector, "_collections_metadata", {})
+
+    return client
+
+
+def test_create_collection_creates_the_declared_payload_indexes(client) -> None:
+    EmbeddedArticleChunk.create_collection()
+    CleanedArticleDocument.create_collection()
+
+    assert client.payload_indexes == {EmbeddedArticleChunk.get_resolved_collection_name(): CHUNK_PAYLOAD_INDEXES}
+
+
+def test_create_payload_indexes_only_adds_the_missing_ones(client) -> None:
+    collection_name = EmbeddedArticleChunk.get_collection_name()
+    client.create_collection(collection_name=collection_name, vectors_config={})
+    client.create_payload_index(collection_name, field_name="author_id", field_schema=PayloadSchemaType.KEYWORD)
+
+    assert EmbeddedArticleChunk.create_payload_indexes() == ["platform", "document_id"]
+    assert EmbeddedArticleChunk.create_payload_indexes() == []
+    assert client.payload_indexes[collection_name] == CHUNK_PAYLOAD_INDEXES
+
+
+@pytest.fixture
+def quantized_chunks(monkeypatch) -> None:
+    """The chunks' config as set by QDRANT_CHUNKS_QUANTIZATION, which is read when the class is defined."""
+
+    monkeypatch.setattr(EmbeddedChunk.Config, "on_disk", True)
+    monkeypatch.setattr(EmbeddedChunk.Config, "quantization_config", CHUNK_QUANTIZATION_CONFIG)
+    monkeypatch.setattr(EmbeddedChunk.Config, "search_params", CHUNK_SEARCH_PARAMS)
+
+
+def test_chunks_are_stored_in_full_precision_by_default() -> None:
+    chunk_config = EmbeddedArticleChunk._get_collection_config(use_vector_index=True)
+
+    assert chunk_config["vectors_config"].on_disk is None
+    assert chunk_config["quantization_config"] is None
+    assert EmbeddedArticleChunk._build_search_requests([[1.0]], limit=3)[0].params is None
+
+
+def test_collection_config_follows_the_document_config(quantized_chunks) -> None:
+    chunk_config = EmbeddedArticleChunk._get_collection_config(use_vector_index=True)
+    document_config = CleanedArticleDocument._get_collection_config(use_vector_index=False)
+
+    assert chunk_config["vectors_config"].on_disk is True
+    assert chunk_config["quantization_config"] == CHUNK_QUANTIZATION_CONFIG
+    assert chunk_config["hnsw_config"] is None
+    assert document_config == {"vectors_config": {}, "on_disk_payload": None}
+
+
+def test_search_requests_use_the_configured_search_params(quantized_chunks) -> None:
+    default_requests = EmbeddedArticleChunk._build_search_requests([[1.0], [2.0]], limit=3)
+    exact_requests = EmbeddedArticleChunk._build_search_requests([[1.0]], limit=3, params=SearchParams(exact=True))
+
+    assert [request.params for request in default_requests] == [CHUNK_SEARCH_PARAMS, CHUNK_SEARCH_PARAMS]
+    assert exact_requests[0].params.exact is True
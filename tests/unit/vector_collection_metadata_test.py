@@ -0,0 +1,158 @@
+import uuid
+
+import pytest
+from qdrant_client import QdrantClient
+
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.domain.base import vector
+from llm_engineering.domain.embedded_chunks import EmbeddedArticleChunk
+from llm_engineering.domain.exceptions import ImproperlyConfigured
+from llm_engineering.settings import settings
+
+METADATA = {"embedding_model_id": "sentence-transformers/all-MiniLM-L6-v2", "chunk_size": 500}
+
+
+@pytest.fixture
+def client(monkeypatch) -> QdrantClient:
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(vector, "connection", client)
+    monkeypatch.setattr(vector, "_existing_collections", set())
+    monkeypatch.setattr(vector, "_collections_metadata", {})
+
+    return client
+
+
+def generate_chunks(num_chunks: int, metadata: dict = METADATA) -> list[EmbeddedArticleChunk]:
+    embedding_size = EmbeddingModelSingleton().embedding_size
+
+    return [
+        EmbeddedArticleChunk(
+            content=f"chunk {i}",
+            embedding=[float(i + 1)] * embedding_size,
+            platform="medium",
+            document_id=uuid.uuid4(),
+            author_id=uuid.uuid4(),
+            author_full_name="Paul Iusztin",
+            link="https://example.com",
+            metadata=metadata,
+        )
+        for i in range(num_chunks)
+    ]
+
+
+def test_collection_metadata_is_recorded_once(client) -> None:
+    assert EmbeddedArticleChunk.bulk_upsert(generate_chunks(5))
+
+    records, _ = client.scroll(collection_name=EmbeddedArticleChunk.get_collection_name())
+    assert all("metadata" not in record.payload for record in records)
+
+    vector._collections_metadata.clear()
+    assert EmbeddedArticleChunk.get_collection_metadata() == {"metadata": METADATA}
+    records, _ = client.scroll(collection_name=vector.COLLECTIONS_METADATA_COLLECTION)
+    # The other record is the collection's write generation.
+    assert len([record for record in records if "values" in record.payload]) == 1
+
+
+def test_documents_are_read_back_with_the_collection_metadata(client) -> None:
+    chunks = generate_chunks(5)
+    EmbeddedArticleChunk.bulk_insert(chunks)
+    vector._collections_metadata.clear()
+
+    documents, _ = EmbeddedArticleChunk.bulk_find(limit=10)
+    (found_document,) = EmbeddedArticleChunk.search(query_vector=chunks[0].embedding, limit=1)
+
+    assert all(document.metadata == METADATA for document in documents)
+    assert found_document.metadata == METADATA
+
+
+def test_missing_collection_metadata_is_cached_until_it_expires(client, monkeypatch) -> None:
+    EmbeddedArticleChunk.create_collection()
+    collection_name = EmbeddedArticleChunk.get_resolved_collection_name()
+    assert EmbeddedArticleChunk.get_collection_metadata() == {}
+
+    # Recorded by another process, e.g., an ingestion.
+    client.create_collection(collection_name=vector.COLLECTIONS_METADATA_COLLECTION, vectors_config={})
+    client.upsert(
+        collection_name=vector.COLLECTIONS_METADATA_COLLECTION,
+        points=[EmbeddedArticleChunk._to_collection_metadata_point({"metadata": METADATA}, collection_name)],
+    )
+    assert EmbeddedArticleChunk.get_collection_metadata() == {}
+
+    monkeypatch.setattr(settings, "QDRANT_COLLECTION_METADATA_TTL_SECONDS", 0.0)
+    EmbeddedArticleChunk.forget_collection_metadata()
+    assert EmbeddedArticleChunk.get_collection_metadata() == {"metadata": METADATA}
+
+
+def test_reads_without_collection_metadata_dont_cost_extra_requests(client, monkeypatch) -> None:
+    # A legacy collection, without a metadata record.
+    EmbeddedArticleChunk.create_collection()
+    chunks = generate_chunks(10)
+    client.upsert(
+        collection_name=EmbeddedArticleChunk.get_collection_name(), points=[chunk.to_point() for chunk in chunks]
+    )
+    EmbeddedArticleChunk.search(query_vector=chunks[0].embedding, limit=10)
+
+    requests = []
+    for method_name in ("collection_exists", "get_aliases", "retrieve"):
+        method = getattr(client, method_name)
+        monkeypatch.setattr(
+            client,
+            method_name,
+            lambda *args, method=method, **kwargs: requests.append(method) or method(*args, **kwargs),
+        )
+
+    assert len(EmbeddedArticleChunk.search(query_vector=chunks[0].embedding, limit=10)) == 10
+    assert len(EmbeddedArticleChunk.search_batch(query_vectors=[chunks[0].embedding] * 3, limit=10)) == 3
+    assert requests == []
+
+
+def test_collection_metadata_is_cached_until_it_expires(client, monkeypatch) -> None:
+    EmbeddedArticleChunk.bulk_insert(generate_chunks(1))
+    collection_name = EmbeddedArticleChunk.get_resolved_collection_name()
+    other_metadata = {"metadata": {**METADATA, "chunk_size": 250}}
+    client.upsert(
+        collection_name=vector.COLLECTIONS_METADATA_COLLECTION,
+        points=[EmbeddedArticleChunk._to_collection_metadata_point(other_metadata, collection_name)],
+    )
+
+    assert EmbeddedArticleChunk.get_collection_metadata() == {"metadata": METADATA}
+
+    monkeypatch.setattr(settings, "QDRANT_COLLECTION_METADATA_TTL_SECONDS", 0.0)
+    EmbeddedArticleChunk.forget_collection_metadata()
+    assert EmbeddedArticleChunk.get_collection_metadata() == other_metadata
+    # Expired right away, so it's read again.
+    client.upsert(
+        collection_name=vector.COLLECTIONS_METADATA_COLLECTION,
+        points=[EmbeddedArticleChunk._to_collection_metadata_point({"metadata": METADATA}, collection_name)],
+    )
+    assert EmbeddedArticleChunk.get_collection_metadata() == {"metadata": METADATA}
+
+
+def test_legacy_payloads_keep_their_metadata(client) -> None:
+    EmbeddedArticleChunk.bulk_insert(generate_chunks(1))
+    (chunk,) = generate_chunks(1, metadata={"embedding_model_id": "legacy"})
+    point = chunk.to_point()
+    point.payload["metadata"] = chunk.metadata
+    client.upsert(collection_name=EmbeddedArticleChunk.get_collection_name(), points=[point])
+
+    (document,) = EmbeddedArticleChunk.search(query_vector=chunk.embedding, limit=1)
+
+    assert document.metadata == {"embedding_model_id": "legacy"}
+
+
+def test_writing_documents_with_other_metadata_fails(client) -> None:
+    EmbeddedArticleChunk.bulk_insert(generate_chunks(1))
+
+    with pytest.raises(ImproperlyConfigured):
+        EmbeddedArticleChunk.bulk_insert(generate_chunks(1, metadata={**METADATA, "chunk_size": 250}))
+
+    with pytest.raises(ImproperlyConfigured):
+        EmbeddedArticleChunk.bulk_insert(generate_chunks(1) + generate_chunks(1, metadata={}))
+
+
+def test_validate_query_metadata(client) -> None:
+    EmbeddedArticleChunk.bulk_insert(generate_chunks(1))
+
+    EmbeddedArticleChunk.validate_query_metadata({"embedding_model_id": METADATA["embedding_model_id"]})
+    with pytest.raises(ImproperlyConfigured):
+        EmbeddedArticleChunk.validate_query_metadata({"embedding_model_id": "BAAI/bge-small-en-v1.5"})
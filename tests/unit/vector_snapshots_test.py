@@ -0,0 +1,94 @@
+import uuid
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.application.preprocessing.vector_snapshots import _rows_to_table, export_snapshot, import_snapshot
+from llm_engineering.domain.base import vector
+from llm_engineering.domain.embedded_chunks import EmbeddedArticleChunk
+from llm_engineering.domain.exceptions import SnapshotError
+from llm_engineering.settings import settings
+
+METADATA = {"embedding_model_id": "model", "embedding_size": 8, "chunk_size": 500}
+
+
+def use_client(monkeypatch) -> QdrantClient:
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(vector, "connection", client)
+    monkeypatch.setattr(vector, "_existing_collections", set())
+    monkeypatch.setattr(vector, "_collections_metadata", {})
+
+    return client
+
+
+@pytest.fixture
+def chunks(monkeypatch) -> list[EmbeddedArticleChunk]:
+    use_client(monkeypatch)
+    embeddings = np.random.default_rng(42).normal(size=(25, EmbeddingModelSingleton().embedding_size))
+    # Normalized, as Qdrant normalizes the vectors of cosine collections.
+    embeddings = (embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)).astype(np.float32)
+    chunks = [
+        EmbeddedArticleChunk(
+            content=f"chunk {i}",
+            embedding=embeddings[i].tolist(),
+            platform="medium",
+            document_id=uuid.uuid4(),
+            author_id=uuid.uuid4(),
+            author_full_name="Paul Iusztin",
+            link=f"https://example.com/{i}",
+            metadata=METADATA,
+        )
+        for i in range(len(embeddings))
+    ]
+    assert EmbeddedArticleChunk.bulk_insert(chunks)
+
+    return chunks
+
+
+def test_snapshot_round_trip(chunks, tmp_path, monkeypatch) -> None:
+    assert export_snapshot(EmbeddedArticleChunk, tmp_path, page_size=10) == len(chunks)
+
+    snapshot_dir = tmp_path / "EmbeddedArticleChunk"
+    assert len(list((snapshot_dir / "payloads").glob("*.parquet"))) == 3
+    vectors = np.load(snapshot_dir / "vectors.npy")
+    assert vectors.dtype == np.float32
+    assert vectors.shape == (len(chunks), EmbeddingModelSingleton().embedding_size)
+
+    # The snapshot is imported into an empty Qdrant, with the unified layout.
+    client = use_client(monkeypatch)
+    monkeypatch.setattr(settings, "QDRANT_UNIFIED_COLLECTIONS", True)
+    assert import_snapshot(EmbeddedArticleChunk, tmp_path, batch_size=8) == len(chunks)
+
+    assert client.count(collection_name="embedded_chunks").count == len(chunks)
+    assert EmbeddedArticleChunk.get_collection_metadata()["metadata"] == METADATA
+    documents = {document.id: document for document in EmbeddedArticleChunk.iter_all(with_vectors=True)}
+    for chunk in chunks:
+        assert documents[chunk.id].model_dump() == chunk.model_dump()
+
+
+def test_missing_snapshot_is_skipped(tmp_path, monkeypatch) -> None:
+    use_client(monkeypatch)
+
+    assert import_snapshot(EmbeddedArticleChunk, tmp_path) == 0
+
+
+def test_snapshot_of_another_embedding_size_is_rejected(chunks, tmp_path, monkeypatch) -> None:
+    export_snapshot(EmbeddedArticleChunk, tmp_path)
+    monkeypatch.setattr(EmbeddingModelSingleton(), "embedding_size", 16)
+
+    with pytest.raises(SnapshotError):
+        import_snapshot(EmbeddedArticleChunk, tmp_path)
+
+
+def test_snapshot_columns_are_not_taken_from_the_first_row_only() -> None:
+    rows = [{"id": "a", "link": None}, {"id": "b", "link": "https://example.com", "extra": 1}]
+
+    table = _rows_to_table(rows)
+
+    assert table.column_names == ["id", "link", "extra"]
+    assert table.to_pylist() == [
+        {"id": "a", "link": None, "extra": None},
+        {"id": "b", "link": "https://example.com", "extra": 1},
+    ]
@@ -0,0 +1,134 @@
+import uuid
+
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import PayloadSchemaType
+
+from llm_engineering.application.networks import EmbeddingModelSingleton
+from llm_engineering.domain.base import VectorBaseDocument, vector
+from llm_engineering.domain.embedded_chunks import (
+    CHUNKS_UNIFIED_COLLECTION,
+    EmbeddedArticleChunk,
+    EmbeddedChunk,
+    EmbeddedPostChunk,
+    EmbeddedRepositoryChunk,
+)
+from llm_engineering.domain.types import DataCategory
+from llm_engineering.settings import settings
+
+
+@pytest.fixture
+def client(monkeypatch) -> QdrantClient:
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(vector, "connection", client)
+    monkeypatch.setattr(vector, "_existing_collections", set())
+    monkeypatch.setattr(vector, "_collections_metadata", {})
+    monkeypatch.setattr(settings, "QDRANT_UNIFIED_COLLECTIONS", True)
+
+    return client
+
+
+def generate_chunks(num_chunks: int, embedding_offset: float = 0.0) -> list[EmbeddedChunk]:
+    embedding_size = EmbeddingModelSingleton().embedding_size
+    common = {
+        "platform": "medium",
+        "author_id": uuid.uuid4(),
+        "author_full_name": "Paul Iusztin",
+        "document_id": uuid.uuid4(),
+    }
+
+    chunks = []
+    for i in range(num_chunks):
+        embedding = [embedding_offset + i + 1.0] + [1.0] * (embedding_size - 1)
+        chunks.append(
+            EmbeddedPostChunk(content=f"post {i}", embedding=embedding, metadata={"chunk_size": 250}, **common)
+        )
+        chunks.append(
+            EmbeddedArticleChunk(
+                content=f"article {i}",
+                embedding=embedding,
+                link="https://example.com",
+                metadata={"min_length": 1000},
+                **common,
+            )
+        )
+        chunks.append(
+            EmbeddedRepositoryChunk(
+                content=f"repository {i}",
+                embedding=embedding,
+                name="repo",
+                link="https://github.com",
+                metadata={"chunk_size": 1500},
+                **common,
+            )
+        )
+
+    return chunks
+
+
+def insert(chunks: list[EmbeddedChunk]) -> None:
+    for chunk_class, class_chunks in VectorBaseDocument.group_by_class(chunks).items():
+        assert chunk_class.bulk_insert(class_chunks)
+
+
+def test_all_the_categories_share_one_collection(client) -> None:
+    insert(generate_chunks(3))
+
+    assert [
+        collection.name for collection in client.get_collections().collections if "embedded" in collection.name
+    ] == [f"{CHUNKS_UNIFIED_COLLECTION}_v1"]
+    assert client.count(collection_name=CHUNKS_UNIFIED_COLLECTION).count == 9
+    assert EmbeddedArticleChunk.count() == 3
+
+    records, _ = client.scroll(collection_name=CHUNKS_UNIFIED_COLLECTION, limit=10)
+    assert {record.payload["category"] for record in records} == {
+        DataCategory.POSTS,
+        DataCategory.ARTICLES,
+        DataCategory.REPOSITORIES,
+    }
+
+
+def test_category_searches_are_filtered(client) -> None:
+    chunks = generate_chunks(3)
+    insert(chunks)
+
+    documents = EmbeddedRepositoryChunk.search(query_vector=chunks[0].embedding, limit=10)
+    (batch_documents,) = EmbeddedRepositoryChunk.search_batch(query_vectors=[chunks[0].embedding], limit=10)
+
+    assert len(documents) == 3
+    assert all(isinstance(document, EmbeddedRepositoryChunk) for document in documents + batch_documents)
+    assert documents[0].metadata == {"chunk_size": 1500}
+
+
+def test_unified_searches_dispatch_by_category(client) -> None:
+    chunks = generate_chunks(3)
+    insert(chunks)
+
+    (documents,) = EmbeddedChunk.search_batch(query_vectors=[chunks[0].embedding], limit=9)
+    found_documents = {document.id: document for document in documents}
+
+    assert len(found_documents) == 9
+    for chunk in chunks:
+        assert type(found_documents[chunk.id]) is type(chunk)
+        assert found_documents[chunk.id].model_dump() == chunk.model_dump(exclude={"embedding"}) | {"embedding": None}
+
+    assert {type(document) for document in EmbeddedChunk.iter_all()} == {
+        EmbeddedPostChunk,
+        EmbeddedArticleChunk,
+        EmbeddedRepositoryChunk,
+    }
+
+
+def test_collection_name_and_category_dispatch(client) -> None:
+    assert VectorBaseDocument.collection_name_to_class(CHUNKS_UNIFIED_COLLECTION) is EmbeddedChunk
+    assert EmbeddedChunk.category_to_class(DataCategory.ARTICLES) is EmbeddedArticleChunk
+    assert EmbeddedPostChunk.get_payload_indexes()["category"] == PayloadSchemaType.KEYWORD
+
+
+def test_separate_collections_by_default(client, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "QDRANT_UNIFIED_COLLECTIONS", False)
+    insert(generate_chunks(1))
+
+    assert EmbeddedPostChunk.get_collection_name() == "embedded_posts"
+    records, _ = client.scroll(collection_name="embedded_posts")
+    assert "category" not in records[0].payload
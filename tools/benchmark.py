@@ -0,0 +1,527 @@
+import gc
+import time
+import uuid
+from typing import Callable
+
+import click
+import numpy as np
+from qdrant_client.models import Record
+
+
+@click.group()
+def main() -> None:
+    """Micro-benchmarks of the data access layer."""
+
+
+@main.command()
+@click.option("--num-documents", default=100_000, type=int, help="Number of documents (de)serialized.")
+@click.option("--embedding-size", default=384, type=int, help="Size of the embeddings.")
+@click.option("--content-length", default=1000, type=int, help="Number of characters of the chunks' content.")
+def serialization(num_documents: int, embedding_size: int, content_length: int) -> None:
+    """
+    Compares the per-document cost of the validated and trusted conversions between the vector documents and the
+    Qdrant points.
+    """
+
+    from llm_engineering.domain.cleaned_documents import CleanedArticleDocument
+    from llm_engineering.domain.embedded_chunks import EmbeddedArticleChunk
+
+    rng = np.random.default_rng(42)
+    author_id = uuid.uuid4()
+    embeddings = rng.normal(size=(num_documents, embedding_size)).astype(np.float32).tolist()
+    datasets = {
+        "EmbeddedArticleChunk": [
+            EmbeddedArticleChunk(
+                content="x" * content_length,
+                embedding=embedding,
+                platform="medium",
+                document_id=uuid.uuid4(),
+                author_id=author_id,
+                author_full_name="Paul Iusztin",
+                num_tokens=content_length // 4,
+                link="https://medium.com/article",
+                metadata={"embedding_model_id": "sentence-transformers/all-MiniLM-L6-v2"},
+            )
+            for embedding in embeddings
+        ],
+        "CleanedArticleDocument": [
+            CleanedArticleDocument(
+                content="x" * content_length,
+                platform="medium",
+                author_id=author_id,
+                author_full_name="Paul Iusztin",
+                link="https://medium.com/article",
+            )
+            for _ in range(num_documents)
+        ],
+    }
+
+    for class_name, documents in datasets.items():
+        document_class = documents[0].__class__
+        points = [document.to_point() for document in documents]
+        records = [Record(id=point.id, payload=point.payload, vector=point.vector or None) for point in points]
+
+        __report(
+            f"{class_name}.to_point()", num_documents, lambda documents=documents: [d.to_point() for d in documents]
+        )
+        __report(
+            f"{class_name}.to_point(trusted=True)",
+            num_documents,
+            lambda documents=documents: [d.to_point(trusted=True) for d in documents],
+        )
+        __report(
+            f"{class_name}.from_record()",
+            num_documents,
+            lambda document_class=document_class, records=records: [document_class.from_record(r) for r in records],
+        )
+        __report(
+            f"{class_name}.from_records(trusted=True)",
+            num_documents,
+            lambda document_class=document_class, records=records: document_class.from_records(records, trusted=True),
+        )
+
+
+@main.command()
+@click.option("--host", default="localhost", help="Host of the Qdrant server.")
+@click.option("--port", default=6333, type=int, help="REST port of the Qdrant server.")
+@click.option("--grpc-port", default=6334, type=int, help="gRPC port of the Qdrant server.")
+@click.option("--num-points", default=50_000, type=int, help="Number of points upserted.")
+@click.option("--embedding-size", default=384, type=int, help="Size of the embeddings.")
+@click.option("--batch-size", default=512, type=int, help="Number of points per upsert request.")
+@click.option("--num-queries", default=1_000, type=int, help="Number of search queries.")
+@click.option("--search-batch-size", default=32, type=int, help="Number of queries per batch search request.")
+def transport(
+    host: str,
+    port: int,
+    grpc_port: int,
+    num_points: int,
+    embedding_size: int,
+    batch_size: int,
+    num_queries: int,
+    search_batch_size: int,
+) -> None:
+    """
+    Compares the REST and gRPC transports of a running Qdrant server (e.g. the one of `docker compose up`) on bulk
+    upserts and batch searches.
+    """
+
+    from qdrant_client import QdrantClient, models
+
+    rng = np.random.default_rng(42)
+    vectors = rng.normal(size=(num_points, embedding_size)).astype(np.float32).tolist()
+    payload = {"content": "x" * 1000, "platform": "medium", "author_id": str(uuid.uuid4())}
+    points = [models.PointStruct(id=str(uuid.uuid4()), vector=vector, payload=payload) for vector in vectors]
+    queries = rng.normal(size=(num_queries, embedding_size)).astype(np.float32).tolist()
+
+    for name, prefer_grpc in (("REST", False), ("gRPC", True)):
+        client = QdrantClient(host=host, port=port, grpc_port=grpc_port, prefer_grpc=prefer_grpc)
+        collection_name = f"benchmark_transport_{uuid.uuid4().hex[:8]}"
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=embedding_size, distance=models.Distance.COSINE),
+        )
+
+        def upsert(client: QdrantClient = client, collection_name: str = collection_name) -> None:
+            for start in range(0, num_points, batch_size):
+                client.upsert(collection_name=collection_name, points=points[start : start + batch_size], wait=True)
+
+        def search_batch(client: QdrantClient = client, collection_name: str = collection_name) -> None:
+            for start in range(0, num_queries, search_batch_size):
+                client.search_batch(
+                    collection_name=collection_name,
+                    requests=[
+                        models.SearchRequest(vector=query, limit=10, with_payload=True)
+                        for query in queries[start : start + search_batch_size]
+                    ],
+                )
+
+        try:
+            __report(f"{name} upsert (batch_size={batch_size})", num_points, upsert)
+            __report(f"{name} search_batch (batch_size={search_batch_size})", num_queries, search_batch, unit="query")
+        finally:
+            client.delete_collection(collection_name)
+            client.close()
+
+
+@main.command()
+@click.option("--host", default="localhost", help="Host of the Qdrant server.")
+@click.option("--port", default=6333, type=int, help="REST port of the Qdrant server.")
+@click.option("--num-points", default=100_000, type=int, help="Number of points upserted.")
+@click.option("--num-authors", default=1_000, type=int, help="Number of distinct authors the points are spread over.")
+@click.option("--embedding-size", default=384, type=int, help="Size of the embeddings.")
+@click.option("--num-queries", default=500, type=int, help="Number of filtered search queries.")
+def payload_indexes(
+    host: str, port: int, num_points: int, num_authors: int, embedding_size: int, num_queries: int
+) -> None:
+    """
+    Compares the latency of searches filtered on `author_id` before and after the payload index declared by the
+    embedded chunks is created, on a running Qdrant server.
+    """
+
+    from qdrant_client import QdrantClient, models
+
+    from llm_engineering.domain.embedded_chunks import CHUNK_PAYLOAD_INDEXES
+
+    rng = np.random.default_rng(42)
+    author_ids = [str(uuid.uuid4()) for _ in range(num_authors)]
+    vectors = rng.normal(size=(num_points, embedding_size)).astype(np.float32)
+    queries = rng.normal(size=(num_queries, embedding_size)).astype(np.float32).tolist()
+    query_filters = [
+        models.Filter(must=[models.FieldCondition(key="author_id", match=models.MatchValue(value=author_id))])
+        for author_id in rng.choice(author_ids, size=num_queries)
+    ]
+
+    client = QdrantClient(host=host, port=port)
+    collection_name = f"benchmark_payload_indexes_{uuid.uuid4().hex[:8]}"
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(size=embedding_size, distance=models.Distance.COSINE),
+    )
+
+    def search() -> None:
+        for query, query_filter in zip(queries, query_filters, strict=True):
+            client.search(collection_name=collection_name, query_vector=query, query_filter=query_filter, limit=10)
+
+    try:
+        client.upload_collection(
+            collection_name=collection_name,
+            vectors=vectors,
+            payload=({"author_id": author_ids[i % num_authors], "platform": "medium"} for i in range(num_points)),
+            batch_size=1_000,
+            wait=True,
+        )
+
+        __report("filtered search without payload index", num_queries, search, unit="query")
+
+        for field_name, field_schema in CHUNK_PAYLOAD_INDEXES.items():
+            client.create_payload_index(
+                collection_name=collection_name, field_name=field_name, field_schema=field_schema, wait=True
+            )
+
+        __report("filtered search with payload index", num_queries, search, unit="query")
+    finally:
+        client.delete_collection(collection_name)
+        client.close()
+
+
+@main.command()
+@click.option("--host", default="localhost", help="Host of the Qdrant server.")
+@click.option("--port", default=6333, type=int, help="REST port of the Qdrant server.")
+@click.option("--num-points", default=100_000, type=int, help="Number of points upserted.")
+@click.option("--embedding-size", default=384, type=int, help="Size of the embeddings.")
+@click.option("--num-queries", default=200, type=int, help="Number of search queries.")
+@click.option("--limit", default=10, type=int, help="Number of neighbours retrieved per query.")
+@click.option("--oversampling", default=2.0, type=float, help="Oversampling of the quantized search candidates.")
+def quantization(
+    host: str, port: int, num_points: int, embedding_size: int, num_queries: int, limit: int, oversampling: float
+) -> None:
+    """
+    Measures the recall@limit and the search latency of the quantized collection layouts against the exact search
+    on the original float32 embeddings, on a running Qdrant server.
+    """
+
+    from qdrant_client import QdrantClient, models
+
+    rng = np.random.default_rng(42)
+    vectors = rng.normal(size=(num_points, embedding_size)).astype(np.float32)
+    queries = rng.normal(size=(num_queries, embedding_size)).astype(np.float32).tolist()
+
+    int8_quantization = models.ScalarQuantization(
+        scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+    )
+    binary_quantization = models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    layouts = {
+        "float32 (in RAM)": ({}, None),
+        "float16": ({"datatype": models.Datatype.FLOAT16}, None),
+        "int8 + float32 on disk": ({"on_disk": True}, int8_quantization),
+        "binary + float32 on disk": ({"on_disk": True}, binary_quantization),
+    }
+
+    client = QdrantClient(host=host, port=port)
+    for name, (vectors_options, quantization_config) in layouts.items():
+        collection_name = f"benchmark_quantization_{uuid.uuid4().hex[:8]}"
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=embedding_size, distance=models.Distance.COSINE, **vectors_options),
+            quantization_config=quantization_config,
+        )
+
+        try:
+            client.upload_collection(collection_name=collection_name, vectors=vectors, batch_size=1_000, wait=True)
+            while client.get_collection(collection_name).status != models.CollectionStatus.GREEN:
+                time.sleep(1.0)
+
+            def search_ids(search_params: models.SearchParams, collection_name: str = collection_name) -> list[set]:
+                return [
+                    {
+                        point.id
+                        for point in client.search(
+                            collection_name=collection_name,
+                            query_vector=query,
+                            limit=limit,
+                            search_params=search_params,
+                        )
+                    }
+                    for query in queries
+                ]
+
+            exact_ids = search_ids(
+                models.SearchParams(exact=True, quantization=models.QuantizationSearchParams(ignore=True))
+            )
+
+            for rescore in (False, True) if quantization_config else (False,):
+                search_params = models.SearchParams(
+                    quantization=models.QuantizationSearchParams(rescore=rescore, oversampling=oversampling)
+                    if quantization_config
+                    else None
+                )
+                start_time = time.perf_counter()
+                approximate_ids = search_ids(search_params)
+                latency = (time.perf_counter() - start_time) / num_queries
+                recall = np.mean([len(a & e) / limit for a, e in zip(approximate_ids, exact_ids, strict=True)])
+
+                label = f"{name}{' + rescore' if rescore else ''}"
+                click.echo(f"{label:<40} recall@{limit} {recall:>6.3f} {latency * 1e3:>8.2f} ms/query")
+        finally:
+            client.delete_collection(collection_name)
+
+    client.close()
+
+
+@main.command()
+@click.option("--num-points", default=100_000, type=int, help="Number of points upserted.")
+@click.option("--num-authors", default=100, type=int, help="Number of distinct authors the points are spread over.")
+@click.option("--embedding-size", default=384, type=int, help="Size of the embeddings.")
+@click.option("--num-queries", default=200, type=int, help="Number of search queries.")
+def embedded_store(num_points: int, num_authors: int, embedding_size: int, num_queries: int) -> None:
+    """
+    Measures the search latency of the embedded vector store (exact and, if hnswlib is installed, HNSW) against
+    qdrant-client's local mode.
+    """
+
+    import tempfile
+
+    from qdrant_client import QdrantClient, models
+
+    from llm_engineering.infrastructure.db.embedded_vector_store import EmbeddedVectorStore, hnswlib
+
+    rng = np.random.default_rng(42)
+    author_ids = [str(uuid.uuid4()) for _ in range(num_authors)]
+    points = [
+        models.PointStruct(id=str(uuid.uuid4()), vector=vector, payload={"author_id": author_ids[i % num_authors]})
+        for i, vector in enumerate(rng.normal(size=(num_points, embedding_size)).astype(np.float32).tolist())
+    ]
+    queries = rng.normal(size=(num_queries, embedding_size)).astype(np.float32).tolist()
+    query_filter = models.Filter(
+        must=[models.FieldCondition(key="author_id", match=models.MatchValue(value=author_ids[0]))]
+    )
+
+    with tempfile.TemporaryDirectory() as embedded_path:
+        clients = {"qdrant local mode": QdrantClient(location=":memory:")}
+        clients["embedded (exact)"] = EmbeddedVectorStore(f"{embedded_path}/exact")
+        if hnswlib is not None:
+            clients["embedded (HNSW)"] = EmbeddedVectorStore(f"{embedded_path}/hnsw", use_hnsw=True)
+
+        for name, client in clients.items():
+            client.create_collection(
+                "benchmark", vectors_config=models.VectorParams(size=embedding_size, distance=models.Distance.COSINE)
+            )
+            client.create_payload_index("benchmark", field_name="author_id", field_schema="keyword")
+            for start in range(0, num_points, 1_000):
+                client.upsert("benchmark", points=points[start : start + 1_000])
+            # Builds the HNSW index and the payload index before timing.
+            client.search("benchmark", query_vector=queries[0], limit=10)
+            client.search("benchmark", query_vector=queries[0], query_filter=query_filter, limit=10)
+
+            __report(
+                f"{name} search",
+                num_queries,
+                lambda client=client: [client.search("benchmark", query_vector=q, limit=10) for q in queries],
+                unit="query",
+            )
+            __report(
+                f"{name} filtered search",
+                num_queries,
+                lambda client=client: [
+                    client.search("benchmark", query_vector=q, query_filter=query_filter, limit=10) for q in queries
+                ],
+                unit="query",
+            )
+            __report(
+                f"{name} search_batch (batch_size=32)",
+                num_queries,
+                lambda client=client: [
+                    client.search_batch(
+                        "benchmark",
+                        requests=[models.SearchRequest(vector=q, limit=10) for q in queries[start : start + 32]],
+                    )
+                    for start in range(0, num_queries, 32)
+                ],
+                unit="query",
+            )
+            client.close()
+
+
+@main.command()
+@click.option("--host", default=None, help="Host of the Qdrant server. Defaults to the embedded vector store.")
+@click.option("--port", default=6333, type=int, help="REST port of the Qdrant server.")
+@click.option("--num-points", default=90_000, type=int, help="Number of points upserted, split over 3 categories.")
+@click.option("--embedding-size", default=384, type=int, help="Size of the embeddings.")
+@click.option("--num-queries", default=200, type=int, help="Number of search queries.")
+@click.option("--k", default=9, type=int, help="Chunks retrieved per query.")
+def unified_collection(
+    host: str | None, port: int, num_points: int, embedding_size: int, num_queries: int, k: int
+) -> None:
+    """
+    Compares the per-query latency of the retriever's fan-out over one collection per category with a single search
+    in a unified collection holding all the categories.
+    """
+
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    from qdrant_client import QdrantClient, models
+
+    from llm_engineering.infrastructure.db.embedded_vector_store import EmbeddedVectorStore
+
+    categories = ["posts", "articles", "repositories"]
+    rng = np.random.default_rng(42)
+    vectors = rng.normal(size=(num_points, embedding_size)).astype(np.float32).tolist()
+    queries = rng.normal(size=(num_queries, embedding_size)).astype(np.float32).tolist()
+    vectors_config = models.VectorParams(size=embedding_size, distance=models.Distance.COSINE)
+    prefix = f"benchmark_layout_{uuid.uuid4().hex[:8]}"
+    collection_names = {category: f"{prefix}_{category}" for category in categories}
+    unified_collection_name = f"{prefix}_unified"
+
+    with tempfile.TemporaryDirectory() as embedded_path:
+        client = QdrantClient(host=host, port=port) if host else EmbeddedVectorStore(embedded_path)
+        try:
+            for collection_name in [*collection_names.values(), unified_collection_name]:
+                client.create_collection(collection_name, vectors_config=vectors_config)
+            client.create_payload_index(unified_collection_name, field_name="category", field_schema="keyword")
+
+            for start in range(0, num_points, 1_000):
+                points = [
+                    models.PointStruct(
+                        id=str(uuid.uuid4()), vector=vector, payload={"category": categories[(start + i) % 3]}
+                    )
+                    for i, vector in enumerate(vectors[start : start + 1_000])
+                ]
+                for category in categories:
+                    client.upsert(
+                        collection_names[category],
+                        points=[point for point in points if point.payload["category"] == category],
+                    )
+                client.upsert(unified_collection_name, points=points)
+
+            category_filter = models.Filter(
+                must=[models.FieldCondition(key="category", match=models.MatchValue(value="articles"))]
+            )
+            with ThreadPoolExecutor(max_workers=len(categories)) as executor:
+
+                def fan_out() -> None:
+                    for query in queries:
+                        searches = [
+                            executor.submit(client.search, collection_name, query_vector=query, limit=k // 3)
+                            for collection_name in collection_names.values()
+                        ]
+                        [search.result() for search in searches]
+
+                __report("one collection per category (fan-out)", num_queries, fan_out, unit="query")
+
+            __report(
+                "unified collection",
+                num_queries,
+                lambda: [client.search(unified_collection_name, query_vector=q, limit=k) for q in queries],
+                unit="query",
+            )
+            __report(
+                "unified collection (category filter)",
+                num_queries,
+                lambda: [
+                    client.search(unified_collection_name, query_vector=q, query_filter=category_filter, limit=k)
+                    for q in queries
+                ],
+                unit="query",
+            )
+        finally:
+            for collection_name in [*collection_names.values(), unified_collection_name]:
+                client.delete_collection(collection_name)
+            client.close()
+
+
+@main.command()
+@click.option("--host", default=None, help="URI of the MongoDB server. Defaults to DATABASE_HOST.")
+@click.option("--num-documents", default=100_000, type=int, help="Number of articles inserted.")
+@click.option("--num-authors", default=100, type=int, help="Number of distinct authors the articles are spread over.")
+@click.option("--num-queries", default=500, type=int, help="Number of lookups per query type.")
+def data_warehouse_indexes(host: str | None, num_documents: int, num_authors: int, num_queries: int) -> None:
+    """
+    Compares the latency of the crawlers' `link` lookups and the feature engineering's `author_id` queries before
+    and after the indexes declared by the documents are created, in a scratch database of a running MongoDB server.
+    """
+
+    from pymongo import MongoClient
+
+    from llm_engineering.domain.documents import ArticleDocument
+    from llm_engineering.settings import settings
+
+    rng = np.random.default_rng(42)
+    author_ids = [str(uuid.uuid4()) for _ in range(num_authors)]
+    links = [f"https://medium.com/@author/article-{i}" for i in range(num_documents)]
+    queried_links = rng.choice(links, size=num_queries).tolist()
+    queried_author_ids = rng.choice(author_ids, size=num_queries).tolist()
+
+    client = MongoClient(host or settings.DATABASE_HOST)
+    database_name = f"benchmark_indexes_{uuid.uuid4().hex[:8]}"
+    collection = client[database_name][ArticleDocument.get_collection_name()]
+
+    def find_by_link() -> None:
+        for link in queried_links:
+            collection.find_one({"link": link})
+
+    def find_by_author() -> None:
+        for author_id in queried_author_ids:
+            list(collection.find({"author_id": author_id}, projection=["_id"]))
+
+    try:
+        collection.insert_many(
+            {
+                "_id": str(uuid.uuid4()),
+                "content": {"Title": f"Article {i}", "Content": "text " * 200},
+                "platform": "medium",
+                "author_id": author_ids[i % num_authors],
+                "author_full_name": "Paul Iusztin",
+                "link": link,
+            }
+            for i, link in enumerate(links)
+        )
+
+        __report("find_one(link) without index", num_queries, find_by_link, unit="query")
+        __report("find(author_id) without index", num_queries, find_by_author, unit="query")
+
+        collection.create_indexes(list(ArticleDocument.get_indexes()))
+
+        __report("find_one(link) with index", num_queries, find_by_link, unit="query")
+        __report("find(author_id) with index", num_queries, find_by_author, unit="query")
+    finally:
+        client.drop_database(database_name)
+        client.close()
+
+
+def __report(name: str, num_documents: int, fn: Callable[[], object], unit: str = "document") -> None:
+    # Full collections triggered by the previous allocations would otherwise be charged to the measured function.
+    gc.collect()
+    gc.disable()
+    try:
+        start_time = time.perf_counter()
+        fn()
+        elapsed_time = time.perf_counter() - start_time
+    finally:
+        gc.enable()
+
+    click.echo(f"{name:<55} {elapsed_time:>8.2f}s {elapsed_time / num_documents * 1e6:>10.2f} us/{unit}")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,12 @@ from llm_engineering.domain.documents import ArticleDocument, PostDocument, Repo
     default=False,
     help="Whether to import a JSON file into your data warehouse.",
 )
+@click.option(
+    "--create-indexes",
+    is_flag=True,
+    default=False,
+    help="Whether to create the indexes declared by the documents that are missing from your data warehouse.",
+)
 @click.option(
     "--data-dir",
     default=Path("data/data_warehouse_raw_data"),
@@ -30,9 +36,10 @@ from llm_engineering.domain.documents import ArticleDocument, PostDocument, Repo
 def main(
     export_raw_data,
     import_raw_data,
+    create_indexes,
     data_dir: Path,
 ) -> None:
-    assert export_raw_data or import_raw_data, "Specify at least one operation."
+    assert export_raw_data or import_raw_data or create_indexes, "Specify at least one operation."
 
     if export_raw_data:
         __export(data_dir)
@@ -40,6 +47,9 @@ def main(
     if import_raw_data:
         __import(data_dir)
 
+    if create_indexes:
+        __create_indexes()
+
 
 def __export(data_dir: Path) -> None:
     logger.info(f"Exporting data warehouse to {data_dir}...")
@@ -52,13 +62,27 @@ def __export(data_dir: Path) -> None:
 
 
 def __export_data_category(data_dir: Path, category_class: type[NoSQLBaseDocument]) -> None:
-    data = category_class.bulk_find()
-    serialized_data = [d.to_mongo() for d in data]
     export_file = data_dir / f"{category_class.__name__}.json"
 
-    logger.info(f"Exporting {len(serialized_data)} items of {category_class.__name__} to {export_file}...")
+    logger.info(f"Exporting {category_class.__name__} to {export_file}...")
+    # The documents are streamed to the file, so they are never all held in memory.
+    num_items = 0
     with export_file.open("w") as f:
-        json.dump(serialized_data, f)
+        f.write("[")
+        for document in category_class.iter_find(trusted=True):
+            if num_items > 0:
+                f.write(", ")
+            json.dump(document.to_mongo(), f)
+            num_items += 1
+        f.write("]")
+
+    logger.info(f"Exported {num_items} items of {category_class.__name__} to {export_file}.")
+
+
+def __create_indexes() -> None:
+    for category_class in [ArticleDocument, PostDocument, RepositoryDocument, UserDocument]:
+        index_names = category_class.ensure_indexes()
+        logger.info(f"Ensured the indexes {index_names} of {category_class.__name__}.")
 
 
 def __import(data_dir: Path) -> None:
@@ -0,0 +1,121 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+from loguru import logger
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """
+    A local stand-in for the OpenAI chat completions API, answering the self-query and query expansion prompts.
+
+    Every completion waits `latency` seconds. The self-query prompts are answered with "none" (no author), while the
+    query expansion prompts are answered with the requested number of rephrased questions, joined by the requested
+    separator. Point `ChatOpenAI` to it with the `OPENAI_API_BASE` environment variable.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0) -> None:
+        super().__init__((host, port), _FakeOpenAIRequestHandler)
+
+        self.latency = latency
+
+        self.num_requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def complete(self, prompt: str) -> str:
+        with self._lock:
+            self.num_requests += 1
+
+        expansion = re.search(r"generate (\d+)\s+different versions", prompt)
+        separator = re.search(r"seperated by '(.+?)'", prompt)
+        if expansion is None or separator is None:
+            return "none"
+
+        question = prompt.rsplit("Original question:", 1)[-1].strip()
+
+        return separator.group(1).join(f"{question} (perspective {i + 1})" for i in range(int(expansion.group(1))))
+
+
+class _FakeOpenAIRequestHandler(BaseHTTPRequestHandler):
+    server: FakeOpenAIServer
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        content_length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(content_length) or b"{}")
+
+        if not self.path.endswith("/chat/completions"):
+            self._send_json({"error": {"message": f"Unknown route: {self.path}"}}, status=404)
+
+            return
+
+        time.sleep(self.server.latency)
+
+        prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+        content = self.server.complete(prompt)
+        self._send_json(
+            {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }
+        )
+
+    def _send_json(self, body: dict, status: int = 200) -> None:
+        data = json.dumps(body).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", help="Host to bind the server to.")
+@click.option("--port", default=8081, type=int, help="Port to bind the server to.")
+@click.option("--latency", default=0.2, type=float, help="Seconds to wait before answering a completion.")
+def main(host: str, port: int, latency: float) -> None:
+    server = FakeOpenAIServer(host=host, port=port, latency=latency)
+    logger.info(f"Fake OpenAI server listening on {server.url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+from loguru import logger
+
+
+class FakeTGIServer(ThreadingHTTPServer):
+    """
+    A local stand-in for a Hugging Face TGI server, exposing the `/generate` and `/generate_stream` routes.
+
+    Every request generates `num_tokens` fake tokens, waiting `latency` seconds before answering plus
+    `token_latency` seconds per token. The next `fail_next` requests answer with a 503, which makes it easy to test
+    retries and routing. The counters are exposed to the tests as attributes.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        token_latency: float = 0.0,
+        num_tokens: int = 8,
+        fail_next: int = 0,
+    ) -> None:
+        super().__init__((host, port), _FakeTGIRequestHandler)
+
+        self.latency = latency
+        self.token_latency = token_latency
+        self.num_tokens = num_tokens
+        self.fail_next = fail_next
+
+        self.num_requests = 0
+        self.num_cancelled_streams = 0
+        self.payloads: list[dict] = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeTGIServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def generate_tokens(self, inputs: str) -> list[str]:
+        return [f" token{i}" for i in range(self.num_tokens)]
+
+    def _register_request(self, payload: dict) -> bool:
+        """Returns False if the request must fail."""
+
+        with self._lock:
+            self.num_requests += 1
+            self.payloads.append(payload)
+            if self.fail_next > 0:
+                self.fail_next -= 1
+
+                return False
+
+        return True
+
+
+class _FakeTGIRequestHandler(BaseHTTPRequestHandler):
+    server: FakeTGIServer
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        content_length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(content_length) or b"{}")
+
+        if not self.server._register_request(payload):
+            self._send_json({"error": "Model is overloaded", "error_type": "overloaded"}, status=503)
+
+            return
+
+        time.sleep(self.server.latency)
+        tokens = self.server.generate_tokens(payload.get("inputs", ""))
+
+        if self.path == "/generate":
+            time.sleep(self.server.token_latency * len(tokens))
+            self._send_json({"generated_text": "".join(tokens)})
+        elif self.path == "/generate_stream":
+            self._stream(tokens)
+        else:
+            self._send_json({"error": f"Unknown route: {self.path}"}, status=404)
+
+    def _stream(self, tokens: list[str]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            for i, token in enumerate(tokens):
+                time.sleep(self.server.token_latency)
+
+                event = {"index": i, "token": {"id": i, "text": token, "logprob": 0.0, "special": False}}
+                if i == len(tokens) - 1:
+                    event["generated_text"] = "".join(tokens)
+                self._write_chunk(b"data:" + json.dumps(event).encode() + b"\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server._lock:
+                self.server.num_cancelled_streams += 1
+            self.close_connection = True
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, body: dict, status: int = 200) -> None:
+        data = json.dumps(body).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", help="Host to bind the server to.")
+@click.option("--port", default=8080, type=int, help="Port to bind the server to.")
+@click.option("--latency", default=0.0, type=float, help="Seconds to wait before answering a request.")
+@click.option("--token-latency", default=0.02, type=float, help="Seconds to wait for every generated token.")
+@click.option("--num-tokens", default=32, type=int, help="Number of tokens generated per request.")
+def main(host: str, port: int, latency: float, token_latency: float, num_tokens: int) -> None:
+    server = FakeTGIServer(host=host, port=port, latency=latency, token_latency=token_latency, num_tokens=num_tokens)
+    logger.info(f"Fake TGI server listening on {server.url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
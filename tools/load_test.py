@@ -0,0 +1,315 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import click
+import httpx
+import numpy as np
+from loguru import logger
+
+VOCABULARY = (
+    "rag retrieval augmented generation vector database embeddings llm fine tuning inference latency throughput "
+    "qdrant mongodb chunking reranking cross encoder query expansion self query prompt context window token "
+    "quantization lora sagemaker deployment monitoring pipeline feature store dataset evaluation agent"
+).split()
+
+STAGES = (
+    "self_query",
+    "query_expansion",
+    "embedding",
+    "vector_search",
+    "rerank",
+    "context_building",
+    "generation",
+)
+
+
+@click.command()
+@click.option("--endpoint", default="/rag", type=click.Choice(["/rag", "/search"]), help="Route to load test.")
+@click.option("--qps", default=10.0, type=float, help="Target number of requests per second (open loop).")
+@click.option("--duration", default=30.0, type=float, help="Duration of the test in seconds.")
+@click.option(
+    "--arrivals",
+    default="poisson",
+    type=click.Choice(["poisson", "uniform"]),
+    help="Whether the requests are sent at exponentially distributed or fixed intervals.",
+)
+@click.option("--max-in-flight", default=512, type=int, help="Max concurrent requests before dropping new ones.")
+@click.option("--query-log", default=None, type=Path, help="Queries to replay (one per line or JSONL with 'query').")
+@click.option("--num-chunks", default=1000, type=int, help="Number of synthetic chunks seeded per collection.")
+@click.option("--qdrant-path", default=":memory:", help="Qdrant local mode storage (a directory or ':memory:').")
+@click.option("--llm-latency", default=0.5, type=float, help="Latency of the fake LLM before generating tokens.")
+@click.option("--llm-token-latency", default=0.0, type=float, help="Latency of the fake LLM per generated token.")
+@click.option("--chat-latency", default=0.2, type=float, help="Latency of the fake OpenAI chat model.")
+@click.option("--no-cache", is_flag=True, default=False, help="Whether to bypass the answer cache.")
+@click.option("--seed", default=42, type=int, help="Random seed of the synthetic data and traffic.")
+@click.option("--output", default=None, type=Path, help="Path of the JSON report. Printed if not set.")
+def main(
+    endpoint: str,
+    qps: float,
+    duration: float,
+    arrivals: str,
+    max_in_flight: int,
+    query_log: Path | None,
+    num_chunks: int,
+    qdrant_path: str,
+    llm_latency: float,
+    llm_token_latency: float,
+    chat_latency: float,
+    no_cache: bool,
+    seed: int,
+    output: Path | None,
+) -> None:
+    """
+    Load tests the RAG API against local stand-ins: a fake TGI server as LLM, a fake OpenAI server as chat model and
+    Qdrant's local mode seeded with synthetic chunks. The traffic is open loop, so the latencies are measured from
+    the scheduled send time and include the queueing delay when the API can't keep up.
+    """
+
+    from tools.fake_openai_server import FakeOpenAIServer
+    from tools.fake_tgi_server import FakeTGIServer
+
+    random.seed(seed)
+
+    llm_server = FakeTGIServer(latency=llm_latency, token_latency=llm_token_latency).start()
+    chat_server = FakeOpenAIServer(latency=chat_latency).start()
+
+    # The settings are loaded and the connections are opened when the package is first imported, so the stand-ins
+    # are configured through the environment before importing anything from `llm_engineering`.
+    os.environ["QDRANT_LOCAL_PATH"] = qdrant_path
+    os.environ["LLM_INFERENCE_BACKEND"] = "tgi"
+    os.environ["TGI_ENDPOINT_URLS"] = json.dumps([llm_server.url])
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["OPENAI_API_BASE"] = chat_server.url
+    os.environ["TRACING_MODE"] = "off"
+
+    __seed_vector_db(num_chunks)
+    queries = __load_queries(query_log) if query_log else None
+
+    server, base_url = __start_api()
+    try:
+        results, elapsed_time = __send_traffic(
+            base_url=base_url,
+            endpoint=endpoint,
+            qps=qps,
+            duration=duration,
+            arrivals=arrivals,
+            max_in_flight=max_in_flight,
+            queries=queries,
+            headers={"Cache-Control": "no-cache"} if no_cache else {},
+        )
+    finally:
+        server.should_exit = True
+        llm_server.stop()
+        chat_server.stop()
+
+    report = __build_report(
+        results,
+        elapsed_time,
+        config={
+            "endpoint": endpoint,
+            "qps": qps,
+            "duration": duration,
+            "arrivals": arrivals,
+            "query_log": str(query_log) if query_log else None,
+            "num_chunks": num_chunks,
+            "llm_latency": llm_latency,
+            "llm_token_latency": llm_token_latency,
+            "chat_latency": chat_latency,
+            "no_cache": no_cache,
+        },
+    )
+    report_json = json.dumps(report, indent=4)
+
+    if output:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(report_json)
+        logger.info(f"Load test report saved to {output}")
+    else:
+        print(report_json)  # noqa: T201
+
+
+def __seed_vector_db(num_chunks: int) -> None:
+    from llm_engineering.application.networks import EmbeddingModelSingleton
+    from llm_engineering.domain.embedded_chunks import (
+        EmbeddedArticleChunk,
+        EmbeddedPostChunk,
+        EmbeddedRepositoryChunk,
+    )
+
+    logger.info(f"Seeding {num_chunks} synthetic chunks per collection.")
+
+    embedding_size = EmbeddingModelSingleton().embedding_size
+    rng = np.random.default_rng(random.randint(0, 2**32))
+    author_id = uuid.uuid4()
+
+    for chunk_class in (EmbeddedPostChunk, EmbeddedArticleChunk, EmbeddedRepositoryChunk):
+        chunk_class.create_collection()
+
+        # Random unit vectors: the retrieval quality doesn't matter, only the amount of work does.
+        embeddings = rng.normal(size=(num_chunks, embedding_size)).astype(np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        def generate_chunks(chunk_class=chunk_class, embeddings=embeddings):
+            for embedding in embeddings:
+                content = " ".join(random.choices(VOCABULARY, k=random.randint(50, 300)))
+
+                yield chunk_class(
+                    content=content,
+                    embedding=embedding.tolist(),
+                    platform="synthetic",
+                    document_id=uuid.uuid4(),
+                    author_id=author_id,
+                    author_full_name="Load Test",
+                    num_tokens=len(content.split()),
+                    link="https://example.com",
+                    name="synthetic",
+                )
+
+        chunk_class.bulk_upsert(generate_chunks())
+
+
+def __load_queries(query_log: Path) -> list[str]:
+    queries = []
+    for line in query_log.read_text().splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        queries.append(json.loads(line)["query"] if line.startswith("{") else line)
+
+    assert len(queries) > 0, f"No queries found in {query_log}."
+
+    return queries
+
+
+def __generate_query() -> str:
+    return f"Write a post about {' '.join(random.choices(VOCABULARY, k=random.randint(3, 12)))}."
+
+
+def __start_api():
+    import uvicorn
+
+    from llm_engineering.infrastructure.inference_pipeline_api import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    return server, f"http://127.0.0.1:{port}"
+
+
+def __send_traffic(
+    base_url: str,
+    endpoint: str,
+    qps: float,
+    duration: float,
+    arrivals: str,
+    max_in_flight: int,
+    queries: list[str] | None,
+    headers: dict[str, str],
+) -> tuple[list[dict], float]:
+    logger.info(f"Sending {qps} requests per second to {endpoint} for {duration} seconds.")
+
+    results: list[dict] = []
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+    client = httpx.Client(
+        base_url=base_url,
+        timeout=httpx.Timeout(300.0),
+        limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+    )
+
+    def send(query: str, scheduled_time: float) -> None:
+        error = None
+        try:
+            response = client.post(endpoint, json={"query": query}, headers=headers)
+            status = response.status_code
+            if status != 200:
+                error = response.text
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+            error = str(e)
+        finally:
+            in_flight.release()
+
+        results.append({"status": status, "latency": time.perf_counter() - scheduled_time, "error": error})
+
+    start_time = time.perf_counter()
+    scheduled_time = start_time
+    num_requests = 0
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        while scheduled_time - start_time < duration:
+            time.sleep(max(scheduled_time - time.perf_counter(), 0))
+
+            query = queries[num_requests % len(queries)] if queries else __generate_query()
+            if in_flight.acquire(blocking=False):
+                executor.submit(send, query, scheduled_time)
+            else:
+                results.append({"status": "dropped", "latency": None, "error": None})
+            num_requests += 1
+
+            interval = random.expovariate(qps) if arrivals == "poisson" else 1 / qps
+            scheduled_time += interval
+
+    elapsed_time = time.perf_counter() - start_time
+    client.close()
+
+    return results, elapsed_time
+
+
+def __build_report(results: list[dict], elapsed_time: float, config: dict) -> dict:
+    from llm_engineering.infrastructure import metrics
+
+    latencies = np.array([result["latency"] for result in results if result["status"] == 200])
+    num_errors = sum(1 for result in results if result["status"] not in (200, "dropped"))
+    num_dropped = sum(1 for result in results if result["status"] == "dropped")
+    # A few distinct error messages are enough to tell a misconfigured stand-in from an overloaded API.
+    error_samples = list(dict.fromkeys(result["error"][:500] for result in results if result["error"]))[:5]
+
+    def summarize(values: np.ndarray) -> dict:
+        if len(values) == 0:
+            return {}
+
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+
+        return {"mean": float(values.mean()), "p50": p50, "p95": p95, "p99": p99, "max": float(values.max())}
+
+    stages = {}
+    for stage in STAGES:
+        count = metrics.stage_latency_seconds.count(stage=stage)
+        if count == 0:
+            continue
+
+        stages[stage] = {
+            "count": count,
+            **{
+                f"p{int(quantile * 100)}": metrics.stage_latency_seconds.quantile(quantile, stage=stage)
+                for quantile in (0.5, 0.95, 0.99)
+            },
+        }
+
+    return {
+        "config": config,
+        "num_requests": len(results),
+        "num_succeeded": len(latencies),
+        "num_errors": num_errors,
+        "num_dropped": num_dropped,
+        "elapsed_time": elapsed_time,
+        "throughput": len(latencies) / elapsed_time,
+        "latency": {key: float(value) for key, value in summarize(latencies).items()},
+        "stages": stages,
+        "error_samples": error_samples,
+    }
+
+
+if __name__ == "__main__":
+    main()
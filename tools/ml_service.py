@@ -1,6 +1,44 @@
-from llm_engineering.infrastructure.inference_pipeline_api import app  # noqa
+import click
 
-if __name__ == "__main__":
-    import uvicorn
+from llm_engineering.infrastructure.inference_pipeline_api import app
+from llm_engineering.settings import settings
+
+
+@click.command()
+@click.option("--host", default=settings.ML_SERVICE_HOST, help="Host to bind the server to.")
+@click.option("--port", default=settings.ML_SERVICE_PORT, type=int, help="Port to bind the server to.")
+@click.option(
+    "--workers",
+    default=settings.ML_SERVICE_WORKERS,
+    type=int,
+    help="Number of worker processes forked after preloading the models.",
+)
+@click.option(
+    "--threads-per-worker",
+    default=settings.ML_SERVICE_THREADS_PER_WORKER,
+    type=int,
+    help="Number of threads running the blocking parts of the requests in every worker.",
+)
+@click.option(
+    "--reload",
+    is_flag=True,
+    default=False,
+    help="Whether to run a single auto-reloading worker for development.",
+)
+def main(host: str, port: int, workers: int, threads_per_worker: int, reload: bool) -> None:
+    if reload:
+        import uvicorn
+
+        uvicorn.run("tools.ml_service:app", host=host, port=port, reload=True)
+
+        return
 
-    uvicorn.run("tools.ml_service:app", host="0.0.0.0", port=8000, reload=True)
+    from llm_engineering.infrastructure.serving import PreforkServer, preload_models
+
+    preload_models()
+
+    PreforkServer(app, host=host, port=port, workers=workers, threads_per_worker=threads_per_worker).run()
+
+
+if __name__ == "__main__":
+    main()
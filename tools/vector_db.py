@@ -0,0 +1,151 @@
+from pathlib import Path
+
+import click
+from loguru import logger
+
+from llm_engineering.application.preprocessing.reindexing import CollectionReindexer
+from llm_engineering.application.preprocessing.vector_snapshots import export_snapshot, import_snapshot
+from llm_engineering.domain.base.vector import VectorBaseDocument
+from llm_engineering.domain.cleaned_documents import (
+    CleanedArticleDocument,
+    CleanedPostDocument,
+    CleanedRepositoryDocument,
+)
+from llm_engineering.domain.embedded_chunks import (
+    EmbeddedArticleChunk,
+    EmbeddedChunk,
+    EmbeddedPostChunk,
+    EmbeddedRepositoryChunk,
+)
+
+DOCUMENT_CLASSES: list[type[VectorBaseDocument]] = [
+    CleanedPostDocument,
+    CleanedArticleDocument,
+    CleanedRepositoryDocument,
+    EmbeddedPostChunk,
+    EmbeddedArticleChunk,
+    EmbeddedRepositoryChunk,
+]
+
+
+def get_embedded_chunk_classes() -> list[type[EmbeddedChunk]]:
+    if EmbeddedChunk.get_unified_collection():
+        return [EmbeddedChunk]
+
+    return [EmbeddedPostChunk, EmbeddedArticleChunk, EmbeddedRepositoryChunk]
+
+
+@click.group()
+def main() -> None:
+    """Maintenance of the Qdrant collections."""
+
+
+@main.command()
+def create_payload_indexes() -> None:
+    """Creates the payload indexes declared by the documents' Config that are missing from existing collections."""
+
+    for document_class in DOCUMENT_CLASSES:
+        if not document_class.get_payload_indexes() or not document_class.collection_exists():
+            continue
+
+        indexed_fields = document_class.create_payload_indexes()
+        if indexed_fields:
+            logger.info(f"Indexed {indexed_fields} in '{document_class.get_collection_name()}'.")
+        else:
+            logger.info(f"'{document_class.get_collection_name()}' is up to date.")
+
+
+@main.command()
+@click.option("--batch-size", default=None, type=int, help="Chunks re-embedded at once (QDRANT_REINDEX_BATCH_SIZE).")
+@click.option(
+    "--max-points-per-second",
+    default=None,
+    type=float,
+    help="Throughput cap of the re-indexing (QDRANT_REINDEX_MAX_POINTS_PER_SECOND).",
+)
+@click.option(
+    "--keep-versions",
+    default=None,
+    type=int,
+    help="Previous versions kept for rollbacks (QDRANT_REINDEX_KEEP_VERSIONS).",
+)
+def reindex(batch_size: int | None, max_points_per_second: float | None, keep_versions: int | None) -> None:
+    """
+    Re-embeds the embedded chunks with the current TEXT_EMBEDDING_MODEL_ID into new versions of their collections,
+    then switches the collections' aliases to them. The legacy collections (not behind an alias) are only replaced
+    by the `cutover` command.
+    """
+
+    for document_class in get_embedded_chunk_classes():
+        reindexer = CollectionReindexer(
+            document_class,
+            batch_size=batch_size,
+            max_points_per_second=max_points_per_second,
+            keep_versions=keep_versions,
+        )
+        if reindexer.get_live_collection() is None:
+            logger.info(f"'{document_class.get_collection_name()}' doesn't exist, skipping it.")
+
+            continue
+
+        reindexer.run()
+
+
+@main.command()
+@click.option(
+    "--keep-versions",
+    default=None,
+    type=int,
+    help="Previous versions kept for rollbacks (QDRANT_REINDEX_KEEP_VERSIONS).",
+)
+def cutover(keep_versions: int | None) -> None:
+    """
+    Replaces the legacy embedded chunks collections by an alias to their latest re-indexed version, once verified
+    again. Pause the writes meanwhile: the searches fail between the deletion of a collection and the creation of
+    its alias.
+    """
+
+    for document_class in get_embedded_chunk_classes():
+        reindexer = CollectionReindexer(document_class, keep_versions=keep_versions)
+        if not reindexer.is_legacy():
+            logger.info(f"'{document_class.get_collection_name()}' isn't a legacy collection, skipping it.")
+
+            continue
+
+        reindexer.cutover()
+        reindexer.collect_garbage()
+
+
+@main.command()
+@click.option(
+    "--data-dir",
+    default=Path("data/vector_db_snapshot"),
+    type=Path,
+    help="Path to the directory where the snapshot is written.",
+)
+@click.option("--page-size", default=None, type=int, help="Points read per request (QDRANT_SCROLL_PAGE_SIZE).")
+def export_snapshots(data_dir: Path, page_size: int | None) -> None:
+    """Exports the documents, with their embeddings, to Parquet payloads and NumPy vectors."""
+
+    for document_class in DOCUMENT_CLASSES:
+        export_snapshot(document_class, data_dir, page_size=page_size)
+
+
+@main.command()
+@click.option(
+    "--data-dir",
+    default=Path("data/vector_db_snapshot"),
+    type=Path,
+    help="Path to the directory where the snapshot was written.",
+)
+@click.option("--batch-size", default=None, type=int, help="Points sent per request (QDRANT_UPSERT_BATCH_SIZE).")
+@click.option("--workers", default=None, type=int, help="Concurrent upload requests (QDRANT_UPSERT_WORKERS).")
+def import_snapshots(data_dir: Path, batch_size: int | None, workers: int | None) -> None:
+    """Reseeds the collections from a snapshot, without re-embedding the chunks."""
+
+    for document_class in DOCUMENT_CLASSES:
+        import_snapshot(document_class, data_dir, batch_size=batch_size, workers=workers)
+
+
+if __name__ == "__main__":
+    main()